@@ -0,0 +1,282 @@
+import asyncio
+import contextlib
+import math
+import os
+import time
+from collections import OrderedDict, deque
+
+import orjson
+
+from SRC.metrics import Counter
+
+SHED = Counter("http_requests_shed_total", "Requests refused by admission control.", ("route_class", "reason"))
+
+# limit/queue/max_wait_ms per route class; ADMISSION_LIMITS overrides any of them
+DEFAULT_LIMITS = "reads=64/256/500,search=16/64/500,writes=32/128/1000,bulk=2/4/5000,stream=500/0/0"
+
+# Clients with their own rate/burst; RATE_LIMIT_CLIENTS adds to or overrides these
+DEFAULT_CLIENT_RATES = "streamlit=500:1000"
+
+# Never limited: probes and scrapes must keep working while the API is overloaded
+EXEMPT_PREFIXES = ("/health/", "/metrics", "/debug/", "/docs", "/redoc", "/openapi.json")
+
+
+def parse_limits(spec):
+    """Parse "reads=64/256/500,bulk=2/4/5000" into {"reads": (64, 256, 0.5), ...}."""
+    limits = {}
+    for item in spec.split(","):
+        name, _, values = item.partition("=")
+        if name.strip():
+            limit, queue, wait_ms = values.split("/")
+            limits[name.strip()] = (int(limit), int(queue), float(wait_ms) / 1000)
+    return limits
+
+
+def parse_rates(spec):
+    """Parse "frontend=500:1000,etl=5:10" into {"frontend": (500.0, 1000.0), ...}."""
+    rates = {}
+    for item in spec.split(","):
+        client, _, values = item.partition("=")
+        if client.strip():
+            rate, _, burst = values.partition(":")
+            rates[client.strip()] = (float(rate), float(burst or rate))
+    return rates
+
+
+def route_class(method, path):
+    """Return which limiter a request goes through, or None if it is exempt."""
+    if path == "/" or path.startswith(EXEMPT_PREFIXES):
+        return None
+    if path.startswith("/packages/changes"):
+        return "stream"
+    if path.startswith(("/packages/bulk", "/packages/export", "/analytics/")):
+        return "bulk"
+    if path.startswith("/packages/search"):
+        return "search"
+    if method in ("GET", "HEAD"):
+        return "reads"
+    return "writes"
+
+
+class Rejected(Exception):
+    """Admission refused; carries the status and Retry-After to answer with."""
+
+    def __init__(self, status_code, reason, retry_after):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """At most `limit` requests at once, up to `queue` more waiting at most `max_wait` seconds.
+
+    Anything beyond that is refused immediately, so a slow backend turns
+    into fast 503s instead of an ever-growing pile of waiting requests.
+    """
+
+    def __init__(self, limit, queue, max_wait):
+        self.limit = limit
+        self.queue = queue
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters = deque()
+        self.admitted = 0
+
+    async def acquire(self):
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.queue:
+            raise Rejected(503, "queue_full", 1)
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await asyncio.wait_for(future, self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with contextlib.suppress(ValueError):
+                self._waiters.remove(future)
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we gave up: pass it on
+                self.release()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise Rejected(503, "queue_timeout", max(1, math.ceil(self.max_wait))) from None
+        self.admitted += 1
+
+    def release(self):
+        """Hand the slot to the oldest waiter, or free it."""
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self):
+        return {"limit": self.limit, "active": self.active, "queued": len(self._waiters),
+                "queue": self.queue, "admitted": self.admitted}
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now):
+        """Spend one token; return 0 on success or the seconds until one is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Per-client token buckets, with per-client overrides of the default rate.
+
+    Buckets of the least recently seen clients are dropped beyond
+    `max_clients`; a client coming back simply starts with a full bucket.
+    """
+
+    def __init__(self, rate, burst, overrides=None, max_clients=10000):
+        self.rate = rate
+        self.burst = burst
+        self.overrides = overrides or {}
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self.limited = 0
+
+    def check(self, client):
+        """Return 0 if `client` may proceed, else the seconds it should wait."""
+        rate, burst = self.overrides.get(client, (self.rate, self.burst))
+        if rate <= 0:
+            return 0
+        now = time.monotonic()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(rate, burst, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        wait = bucket.take(now)
+        if wait:
+            self.limited += 1
+        return wait
+
+    def stats(self):
+        return {"rate": self.rate, "burst": self.burst, "clients": len(self._buckets), "limited": self.limited}
+
+
+def parse_names(spec):
+    """Parse "10.0.0.5, gateway" into {"10.0.0.5", "gateway"}."""
+    return {item.strip() for item in spec.split(",") if item.strip()}
+
+
+def client_id(scope, user=None, trusted=frozenset()):
+    """Identify the caller for rate limiting.
+
+    The authenticated user if there is one, else the peer address. X-Client-Id
+    is only honoured from a trusted peer address or user (a proxy or gateway
+    naming the client it forwards for); from anyone else it is ignored, so a
+    caller can neither borrow another client's quota nor mint fresh buckets.
+    """
+    client = scope.get("client")
+    caller = user if user is not None else (client[0] if client else "unknown")
+    if caller in trusted:
+        for name, value in scope["headers"]:
+            if name == b"x-client-id":
+                return value.decode("latin-1")
+    return caller
+
+
+class AdmissionControl:
+    """Per-client rate limits and per-route-class concurrency limits, shared by one worker.
+
+    A client over its rate gets 429; a request whose class is at its
+    concurrency limit with a full queue, or that waited past the class's
+    deadline, gets 503. Both carry Retry-After. Limits are per worker process.
+    """
+
+    def __init__(self, limits=None, rate_limiter=None):
+        if limits is None:
+            limits = parse_limits(DEFAULT_LIMITS)
+            limits.update(parse_limits(os.getenv("ADMISSION_LIMITS", "")))
+        self.limiters = {name: ConcurrencyLimiter(*values) for name, values in limits.items()}
+        self.rate_limiter = rate_limiter or RateLimiter(
+            float(os.getenv("RATE_LIMIT_RPS", "50")),
+            float(os.getenv("RATE_LIMIT_BURST", "100")),
+            {**parse_rates(DEFAULT_CLIENT_RATES), **parse_rates(os.getenv("RATE_LIMIT_CLIENTS", ""))},
+        )
+
+    async def admit(self, name, client):
+        """Return the limiter to release once the request is done (None if unlimited); raise Rejected."""
+        wait = self.rate_limiter.check(client)
+        if wait:
+            SHED.inc(name, "rate_limited")
+            raise Rejected(429, "rate_limited", max(1, math.ceil(wait)))
+        limiter = self.limiters.get(name)
+        if limiter is None:
+            return None
+        try:
+            await limiter.acquire()
+        except Rejected as e:
+            SHED.inc(name, e.reason)
+            raise
+        return limiter
+
+    def stats(self):
+        """Return per-class concurrency and queue state plus rate limiter counts."""
+        return {"classes": {name: limiter.stats() for name, limiter in self.limiters.items()},
+                "rate_limit": self.rate_limiter.stats()}
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that puts every non-exempt HTTP request through an AdmissionControl."""
+
+    def __init__(self, app, control, identify=None, trusted=None):
+        self.app = app
+        self.control = control
+        # async (scope) -> authenticated user or None; must not raise
+        self.identify = identify
+        self.trusted = trusted if trusted is not None else parse_names(os.getenv("RATE_LIMIT_TRUSTED", ""))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        name = route_class(scope["method"], scope["path"])
+        if name is None:
+            return await self.app(scope, receive, send)
+
+        user = await self.identify(scope) if self.identify is not None else None
+        try:
+            limiter = await self.control.admit(name, client_id(scope, user, self.trusted))
+        except Rejected as e:
+            return await self._reject(send, e)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if limiter is not None:
+                limiter.release()
+
+    async def _reject(self, send, rejected):
+        message = "Too many requests" if rejected.status_code == 429 else "Server is busy, try again later"
+        body = orjson.dumps({"success": False, "error": message})
+        await send({
+            "type": "http.response.start",
+            "status": rejected.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(rejected.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
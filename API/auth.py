@@ -0,0 +1,239 @@
+"""Authenticate API callers and map each one to the owner of their packages.
+
+AUTH_MODE picks how bearer tokens are checked:
+
+    off       no authentication; every caller sees every package (default)
+    tokens    fixed AUTH_TOKENS="token=user,..." pairs, for scripts and services
+    supabase  Supabase Auth access tokens, checked at {SUPABASE_URL}/auth/v1/user
+
+Answers are cached per worker, keyed by the token's SHA-256, for
+AUTH_CACHE_SECONDS or until the token expires, whichever is sooner, so
+most requests skip the round-trip to the auth server.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import time
+
+import httpx
+from fastapi import HTTPException, Request
+
+from SRC.cache import LRUCache
+from SRC.metrics import Counter
+from SRC.resilience import BackendUnavailable
+
+logger = logging.getLogger(__name__)
+
+AUTH_MODE = os.getenv("AUTH_MODE", "off").lower()
+AUTH_CACHE_SECONDS = float(os.getenv("AUTH_CACHE_SECONDS", "300"))
+# Rejections are cached briefly so a bad token cannot hammer the auth server
+AUTH_REJECT_CACHE_SECONDS = float(os.getenv("AUTH_REJECT_CACHE_SECONDS", "10"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+
+TOKEN_CHECKS = Counter("auth_token_checks_total", "Bearer tokens checked, by where the answer came from.",
+                       ("source", "outcome"))
+
+
+class InvalidToken(Exception):
+    """The token is unknown, malformed or expired."""
+
+
+def parse_tokens(spec):
+    """Parse "s3cret=alice,0ther=bob" into {"s3cret": "alice", "0ther": "bob"}."""
+    tokens = {}
+    for item in spec.split(","):
+        token, _, user = item.partition("=")
+        if token.strip() and user.strip():
+            tokens[token.strip()] = user.strip()
+    return tokens
+
+
+def parse_users(spec):
+    """Parse "alice, bob" into {"alice", "bob"}."""
+    return {item.strip() for item in spec.split(",") if item.strip()}
+
+
+def token_expiry(token):
+    """Return the `exp` claim (epoch seconds) of a JWT, or None for other tokens.
+
+    Only used to bound how long a verified token is cached; the signature is
+    checked by the auth server.
+    """
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class StaticTokens:
+    """Verifies tokens against a fixed token -> user mapping."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+    async def verify(self, token):
+        user = self.tokens.get(token)
+        if user is None:
+            raise InvalidToken("Unknown token")
+        return user
+
+    async def close(self):
+        pass
+
+
+class SupabaseTokens:
+    """Verifies Supabase Auth access tokens with the project's auth server."""
+
+    def __init__(self, url, key, timeout=5.0):
+        self._client = httpx.AsyncClient(base_url=url.rstrip("/"), headers={"apikey": key}, timeout=timeout)
+
+    async def verify(self, token):
+        try:
+            response = await self._client.get("/auth/v1/user", headers={"Authorization": f"Bearer {token}"})
+        except httpx.HTTPError as e:
+            raise BackendUnavailable(f"Auth server unreachable: {e}")
+        if response.status_code in (401, 403):
+            raise InvalidToken("Invalid or expired token")
+        if response.is_error:
+            raise BackendUnavailable(f"Auth server answered {response.status_code}")
+        try:
+            user = response.json()["id"]
+        except (KeyError, TypeError, ValueError):
+            user = None
+        if not isinstance(user, str) or not user:
+            raise InvalidToken("Auth server did not identify the token's user")
+        return user
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class CachedVerifier:
+    """Caches another verifier's answers so repeat requests skip the auth server.
+
+    Concurrent checks of the same uncached token share one call to the
+    wrapped verifier. Only the token's hash is kept in memory.
+    """
+
+    def __init__(self, verifier, ttl=AUTH_CACHE_SECONDS, reject_ttl=AUTH_REJECT_CACHE_SECONDS, maxsize=AUTH_CACHE_SIZE):
+        self.verifier = verifier
+        self.ttl = ttl
+        self.reject_ttl = reject_ttl
+        self._cache = LRUCache(maxsize=maxsize, ttl=max(ttl, reject_ttl))
+        self._inflight = {}
+
+    async def verify(self, token):
+        """Return the user a token belongs to; raise InvalidToken if it is not valid."""
+        key = hashlib.sha256(token.encode()).hexdigest()
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > time.time():
+            TOKEN_CHECKS.inc("cache", "rejected" if cached[1] is None else "accepted")
+            return self._answer(cached[1])
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._inflight[key] = asyncio.ensure_future(self._check(key, token))
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return self._answer(await asyncio.shield(future))
+
+    async def _check(self, key, token):
+        now = time.time()
+        try:
+            user = await self.verifier.verify(token)
+        except InvalidToken:
+            TOKEN_CHECKS.inc("server", "rejected")
+            self._cache.set(key, (now + self.reject_ttl, None))
+            return None
+        TOKEN_CHECKS.inc("server", "accepted")
+        self._cache.set(key, (min(now + self.ttl, token_expiry(token) or float("inf")), user))
+        return user
+
+    def _answer(self, user):
+        if user is None:
+            raise InvalidToken("Invalid or expired token")
+        return user
+
+    def stats(self):
+        return self._cache.stats()
+
+    async def close(self):
+        await self.verifier.close()
+
+
+def verifier_from_env(mode=AUTH_MODE):
+    """Build the cached token verifier for `mode`, or None when authentication is off."""
+    if mode == "off":
+        return None
+    if mode == "tokens":
+        verifier = StaticTokens(parse_tokens(os.getenv("AUTH_TOKENS", "")))
+    elif mode == "supabase":
+        verifier = SupabaseTokens(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"),
+                                  float(os.getenv("AUTH_TIMEOUT_SECONDS", "5")))
+    else:
+        raise ValueError(f"Unknown AUTH_MODE '{mode}' (expected off, tokens or supabase)")
+    logger.info("Authenticating requests with %s", mode)
+    return CachedVerifier(verifier)
+
+
+class Authenticator:
+    """FastAPI dependency resolving the caller's bearer token to the owner they act as.
+
+    Returns None (every package) when authentication is off. The verifier is
+    built per worker by `start()`, like the other clients.
+    """
+
+    def __init__(self, mode=AUTH_MODE, admins=None):
+        self.mode = mode
+        self.admins = set(admins) if admins is not None else parse_users(os.getenv("AUTH_ADMINS", ""))
+        self.verifier = None
+
+    def start(self):
+        self.verifier = verifier_from_env(self.mode)
+
+    async def close(self):
+        if self.verifier is not None:
+            await self.verifier.close()
+
+    async def __call__(self, request: Request):
+        if self.mode == "off":
+            return None
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token.strip():
+            raise HTTPException(status_code=401, detail="Missing bearer token", headers={"WWW-Authenticate": "Bearer"})
+        try:
+            user = await self.verifier.verify(token.strip())
+        except InvalidToken as e:
+            raise HTTPException(status_code=401, detail=str(e), headers={"WWW-Authenticate": "Bearer"})
+        request.state.user = user
+        return user
+
+    async def identify(self, scope):
+        """Return the user an ASGI request's bearer token belongs to, or None; never raises.
+
+        Used by admission control, which runs before the dependency; the
+        verifier's cache answers the dependency's own check that follows.
+        """
+        if self.mode == "off" or self.verifier is None:
+            return None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() != "bearer" or not token.strip():
+                    return None
+                try:
+                    return await self.verifier.verify(token.strip())
+                except (InvalidToken, BackendUnavailable):
+                    return None
+        return None
+
+    async def admin(self, request: Request):
+        """Like the authenticator itself, but only for AUTH_ADMINS (reports across every owner)."""
+        user = await self(request)
+        if user is not None and user not in self.admins:
+            raise HTTPException(status_code=403, detail="Admin access required")
+        return user
@@ -1,25 +1,165 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from datetime import date
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
 import sys, os
+import asyncio
 import logging
+import time
+import httpx
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from SRC.logic import PackageManager
+from SRC.logic import AsyncPackageManager
+from SRC.analytics import DeliveryAnalytics
+from SRC.bulk import BulkRowParser
+from SRC.cursors import decode_cursor, decode_ranked_cursor
+from SRC.export import get_encoder, EXPORT_MEDIA_TYPES
+from SRC.history import now_ms, to_ms
+from SRC.events import format_sse
+from SRC.metrics import CONTENT_TYPE, REGISTRY, SIZE_BUCKETS, Collected, Counter, Gauge, Histogram
+from SRC.profiling import profiler
+from SRC.logging_config import configure_logging, current_request, dropped_records
+from SRC.resilience import BackendUnavailable
+from API.responses import json_response, encoded_cache_stats
+from API.admission import AdmissionControl, AdmissionMiddleware
+from API.auth import Authenticator
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+# ----------------------------- Lifespan -------------------------------
+# Built per worker process by the lifespan, never at import time
+package_manager: AsyncPackageManager | None = None
+analytics: DeliveryAnalytics | None = None
+
+RECONCILE_SECONDS = float(os.getenv("STATS_RECONCILE_SECONDS", "300"))
+# How often other processes' status changes (the tracking poller's, other workers') are picked up,
+# and how long to leave them to reach the history log
+CHANGE_SYNC_SECONDS = float(os.getenv("CHANGE_SYNC_SECONDS", "5"))
+CHANGE_SYNC_LAG_SECONDS = float(os.getenv("CHANGE_SYNC_LAG_SECONDS", "5"))
+SWEEP_SECONDS = float(os.getenv("OVERDUE_SWEEP_SECONDS", "300"))
+ANALYTICS_ENABLED = os.getenv("ANALYTICS_ENABLED", "true").lower() == "true"
+ANALYTICS_REFRESH_SECONDS = float(os.getenv("ANALYTICS_REFRESH_SECONDS", "60"))
+ANALYTICS_REBUILD_SECONDS = float(os.getenv("ANALYTICS_REBUILD_SECONDS", "3600"))
+WARMUP_PACKAGES = int(os.getenv("WARMUP_PACKAGES", "200"))
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", os.getenv("SQLITE_POOL_SIZE", "8")))
+# Lets the warm-up requests through authentication; without it they stop at the 401
+WARMUP_TOKEN = os.getenv("WARMUP_TOKEN")
+background_tasks = set()
+lifecycle = {"state": "starting", "started_at": time.monotonic()}
+
+async def reconcile_periodically():
+    """Rebuild in-process indexes and counters from the store every RECONCILE_SECONDS."""
+    while True:
+        await asyncio.sleep(RECONCILE_SECONDS)
+        await package_manager.warm_indexes()
+
+async def sync_changes_periodically():
+    """Every CHANGE_SYNC_SECONDS, catch up with status changes other processes logged since the last pass."""
+    since = now_ms() - int(CHANGE_SYNC_LAG_SECONDS * 1000)
+    while True:
+        await asyncio.sleep(CHANGE_SYNC_SECONDS)
+        since = await package_manager.follow_history(since, now_ms() - int(CHANGE_SYNC_LAG_SECONDS * 1000))
+
+async def sweep_periodically():
+    """Mark newly overdue packages as Delayed every SWEEP_SECONDS."""
+    while True:
+        await package_manager.sweep_overdue()
+        await asyncio.sleep(SWEEP_SECONDS)
+
+async def refresh_analytics_periodically():
+    """Load analytics in the background, then top them up every ANALYTICS_REFRESH_SECONDS.
+
+    Every ANALYTICS_REBUILD_SECONDS a fresh copy is loaded and swapped in,
+    which picks up deletes and edits that incremental refreshes cannot see.
+    """
+    global analytics
+    rebuilt_at = time.monotonic()
+    while True:
+        try:
+            if time.monotonic() - rebuilt_at >= ANALYTICS_REBUILD_SECONDS:
+                fresh = DeliveryAnalytics()
+                if await fresh.refresh_async(package_manager.db):
+                    analytics = fresh
+                    rebuilt_at = time.monotonic()
+            else:
+                await analytics.refresh_async(package_manager.db)
+        except BackendUnavailable as e:
+            logger.warning("Analytics refresh skipped, backend unavailable: %s", e)
+        await asyncio.sleep(ANALYTICS_REFRESH_SECONDS)
+
+async def warm_up():
+    """Open pooled backend connections, prime the package cache and run each hot route once."""
+    start = time.perf_counter()
+
+    # One concurrent round-trip per pooled connection, so none is opened on a live request
+    await asyncio.gather(*(package_manager.get_all_packages(limit=1) for _ in range(WARMUP_CONNECTIONS)))
+
+    newest = package_manager.search_index.max_id
+    if WARMUP_PACKAGES and newest:
+        await package_manager.get_packages_batch(list(range(max(1, newest - WARMUP_PACKAGES + 1), newest + 1)))
+
+    # In-process requests build the middleware stack and exercise validation and encoding
+    paths = ["/packages/?limit=1", "/packages/stats", "/packages/search/?courier=warmup&limit=1"]
+    if newest:
+        paths.append(f"/packages/{newest}")
+    headers = {"Authorization": f"Bearer {WARMUP_TOKEN}"} if WARMUP_TOKEN else {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://warmup",
+                                 headers=headers) as client:
+        for path in paths:
+            response = await client.get(path)
+            if response.status_code >= 500:
+                logger.warning("Warm-up request %s failed with %s", path, response.status_code)
+
+    logger.info("Warm-up finished in %.2fs", time.perf_counter() - start)
+
+@asynccontextmanager
+async def lifespan(app):
+    """Build this worker's clients and warm it up before serving; release them on shutdown."""
+    global package_manager, analytics
+    authenticate.start()
+    package_manager = AsyncPackageManager()
+    await package_manager.start()
+    try:
+        await warm_up()
+    except BackendUnavailable as e:
+        logger.warning("Warm-up skipped, backend unavailable: %s", e)
+    background_tasks.add(asyncio.create_task(reconcile_periodically()))
+    if CHANGE_SYNC_SECONDS > 0:
+        background_tasks.add(asyncio.create_task(sync_changes_periodically()))
+    if SWEEP_SECONDS > 0:
+        background_tasks.add(asyncio.create_task(sweep_periodically()))
+    if ANALYTICS_ENABLED:
+        analytics = DeliveryAnalytics()
+        background_tasks.add(asyncio.create_task(refresh_analytics_periodically()))
+    lifecycle["state"] = "ready"
+    logger.info("Worker %s ready", os.getpid())
+
+    yield
+
+    # uvicorn has stopped accepting connections and waited for in-flight
+    # requests (up to --timeout-graceful-shutdown) before we get here
+    lifecycle["state"] = "draining"
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    profiler.stop()
+    await package_manager.close()
+    await authenticate.close()
+    logger.info("Worker %s stopped", os.getpid())
+
 # ----------------------------- App Setup -------------------------------
+# Resolves the caller to the owner whose packages they see (None with AUTH_MODE=off)
+authenticate = Authenticator()
+
 app = FastAPI(
     title="Package Delivery Tracker API",
     version="2.0",
-    description="API for tracking package deliveries"
+    description="API for tracking package deliveries",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -30,7 +170,74 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-package_manager = PackageManager()
+# ----------------------------- Metrics -------------------------------
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() == "true"
+
+REQUEST_SECONDS = Histogram("http_request_seconds", "Request latency in seconds.", ("method", "route"))
+REQUESTS = Counter("http_requests_total", "Requests served.", ("method", "route", "status"))
+IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled.")
+REQUEST_BYTES = Histogram("http_request_bytes", "Request body size in bytes.", ("method", "route"), buckets=SIZE_BUCKETS)
+RESPONSE_BYTES = Histogram("http_response_bytes", "Response body size in bytes (as sent).", ("method", "route"), buckets=SIZE_BUCKETS)
+
+def _cache_stats():
+    return {**package_manager.cache_stats(), "encoded": encoded_cache_stats()}
+
+def _cache_metric(field):
+    return lambda: [((cache,), stats[field]) for cache, stats in _cache_stats().items()]
+
+Collected("cache_hits_total", "Cache lookups that were served.", "counter", _cache_metric("hits"), ("cache",))
+Collected("cache_misses_total", "Cache lookups that missed.", "counter", _cache_metric("misses"), ("cache",))
+Collected("cache_evictions_total", "Entries evicted to stay within maxsize.", "counter", _cache_metric("evictions"), ("cache",))
+Collected("cache_entries", "Entries currently cached.", "gauge", _cache_metric("size"), ("cache",))
+Collected("cache_hit_ratio", "Hits over lookups since startup.", "gauge", _cache_metric("hit_ratio"), ("cache",))
+def _coalescing_metric(field):
+    return lambda: [((kind,), stats[field]) for kind, stats in package_manager.db.coalescing_stats().items()]
+
+Collected("write_batches_total", "Coalesced write batches sent to the backend.", "counter", _coalescing_metric("batches"), ("kind",))
+Collected("write_batch_items_total", "Writes sent as part of coalesced batches.", "counter", _coalescing_metric("items"), ("kind",))
+Collected("log_records_dropped_total", "Log records dropped because the log queue was full.", "counter", lambda: [((), dropped_records())])
+BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+def _breaker_metric():
+    state = package_manager.db.resilience_stats().get("breaker")
+    return [((), BREAKER_STATES[state])] if state else []
+
+Collected("db_breaker_state", "Backend circuit breaker: 0 closed, 1 half-open, 2 open.", "gauge", _breaker_metric)
+Collected("change_feed_subscribers", "Open change feed streams.", "gauge", lambda: [((), package_manager.changes.subscriber_count)])
+def _admission_metric(field):
+    return lambda: [((name,), stats[field]) for name, stats in admission.stats()["classes"].items()]
+
+Collected("admission_active_requests", "Requests holding a concurrency slot.", "gauge", _admission_metric("active"), ("route_class",))
+Collected("admission_queue_depth", "Requests waiting for a concurrency slot.", "gauge", _admission_metric("queued"), ("route_class",))
+Collected("admission_concurrency_limit", "Concurrency limit per route class.", "gauge", _admission_metric("limit"), ("route_class",))
+Collected("rate_limited_clients", "Clients with a live token bucket.", "gauge", lambda: [((), admission.rate_limiter.stats()["clients"])])
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record latency, status, in-flight count and payload sizes per route; expose the request to log sampling."""
+    # Reset afterwards: warm-up requests run in the lifespan's context, which background tasks inherit
+    token = current_request.set(request.scope)
+    start = time.perf_counter()
+    status = "500"
+    IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        current_request.reset(token)
+        IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        labels = (request.method, route.path if route else "unmatched")
+        REQUEST_SECONDS.observe(time.perf_counter() - start, *labels)
+        REQUESTS.inc(*labels, status)
+        if request.headers.get("content-length"):
+            REQUEST_BYTES.observe(int(request.headers["content-length"]), *labels)
+        if status != "500" and response.headers.get("content-length"):
+            RESPONSE_BYTES.observe(int(response.headers["content-length"]), *labels)
+
+# Added last so it runs outermost: excess load is refused before any other work
+admission = AdmissionControl()
+app.add_middleware(AdmissionMiddleware, control=admission, identify=authenticate.identify)
 
 # ----------------------------- Data Models -------------------------------
 class PackageCreate(BaseModel):
@@ -42,18 +249,17 @@ class PackageCreate(BaseModel):
     destination: str
     notes: str | None = None
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "tracking_number": "1Z999AA10123456784",
-                "courier": "UPS",
-                "status": "In Transit",
-                "expected_delivery": "2025-10-15",
-                "origin": "New York, NY",
-                "destination": "Los Angeles, CA",
-                "notes": "Fragile item"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "tracking_number": "1Z999AA10123456784",
+            "courier": "UPS",
+            "status": "In Transit",
+            "expected_delivery": "2025-10-15",
+            "origin": "New York, NY",
+            "destination": "Los Angeles, CA",
+            "notes": "Fragile item"
         }
+    })
 
 class PackageUpdate(BaseModel):
     tracking_number: str | None = Field(None, min_length=1, max_length=50)
@@ -64,14 +270,65 @@ class PackageUpdate(BaseModel):
     destination: str | None = None
     notes: str | None = None
 
+class PackageBulkUpdate(BaseModel):
+    ids: list[int] | None = None
+    tracking_numbers: list[str] | None = None
+    updates: PackageUpdate
+
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "tracking_numbers": ["1Z999AA10123456784", "1Z999AA10123456785"],
+            "updates": {"status": "Out for Delivery"}
+        }
+    })
+
+# The response models below document the API schema only: endpoints return
+# pre-encoded JSON through json_response, which FastAPI does not validate or
+# filter against `response_model`. Keep them in step with the stored rows.
+class Package(BaseModel):
+    id: int
+    tracking_number: str
+    courier: str
+    status: str | None = None
+    expected_delivery: str | None = None
+    origin: str | None = None
+    destination: str | None = None
+    notes: str | None = None
+    owner: str | None = None
+
 class PackageResponse(BaseModel):
     success: bool
     data: dict | list | None = None
     error: str | None = None
+    next_cursor: str | None = None
+
+class PackageItemResponse(BaseModel):
+    success: bool
+    data: Package | None = None
+    previous_status: str | None = None
+    error: str | None = None
+
+class PackageListResponse(BaseModel):
+    success: bool
+    data: list[Package] = []
+    error: str | None = None
+    next_cursor: str | None = None
+
+class PackageBatchResponse(BaseModel):
+    success: bool
+    data: list[Package] = []
+    missing: list[int] = []
+    error: str | None = None
+
+class PackageBulkUpdateResponse(BaseModel):
+    success: bool
+    data: list[dict] = []
+    updated: int = 0
+    error: str | None = None
 
 # ----------------------------- API Endpoints -------------------------------
 @app.get("/", tags=["Health"])
-def home():
+async def home():
     """Health check endpoint."""
     return {
         "message": "Welcome to the Package Delivery Tracker API",
@@ -79,30 +336,87 @@ def home():
         "status": "operational"
     }
 
-@app.get("/packages/", tags=["Packages"], response_model=PackageResponse)
-def get_packages(
+@app.get("/health/live", tags=["Health"])
+async def liveness():
+    """Liveness probe: the worker's event loop is responding."""
+    return {"success": True, "data": {"status": "alive", "pid": os.getpid(),
+                                      "uptime_s": round(time.monotonic() - lifecycle["started_at"], 1)}}
+
+@app.get("/health/ready", tags=["Health"])
+async def readiness():
+    """Readiness probe: 200 once warmed up, 503 while starting or draining."""
+    ready = lifecycle["state"] == "ready"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"success": ready, "data": {"status": lifecycle["state"], "pid": os.getpid(),
+                                            "indexed": len(package_manager.search_index) if package_manager else 0,
+                                            "backend": package_manager.db.resilience_stats() if package_manager else {}}}
+    )
+
+@app.get("/metrics", tags=["Health"])
+async def metrics():
+    """Expose request, database, cache and payload metrics in Prometheus text format."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/debug/profile", tags=["Health"], dependencies=[Depends(authenticate.admin)])
+async def get_profile(limit: int = Query(25, ge=1, le=200)):
+    """Report sampling profiler results by phase and by function."""
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled")
+    return profiler.report(limit)
+
+@app.post("/debug/profile", tags=["Health"], dependencies=[Depends(authenticate.admin)])
+async def control_profile(action: str = Query(..., pattern="^(start|stop|reset)$")):
+    """Start, stop or reset the sampling profiler."""
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled")
+    getattr(profiler, action)()
+    logger.info("Profiler %s", action)
+    return {"success": True, "data": {"running": profiler.running}}
+
+@app.get("/debug/admission", tags=["Health"], dependencies=[Depends(authenticate.admin)])
+async def admission_stats():
+    """Report this worker's concurrency, queue depth and rate limiting per route class."""
+    return {"success": True, "data": admission.stats()}
+
+@app.get("/packages/", tags=["Packages"], response_model=PackageListResponse)
+async def get_packages(
+    request: Request,
     limit: int = Query(100, ge=1, le=500),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0),
+    after: str | None = None,
+    owner: str | None = Depends(authenticate)
 ):
     """
     Retrieve all packages with pagination.
     
     - **limit**: Maximum number of packages to return (1-500)
-    - **offset**: Number of packages to skip
+    - **after**: `next_cursor` from the previous page (recommended; constant cost per page)
+    - **offset**: Number of packages to skip (kept for compatibility; slows down on deep pages)
     """
-    logger.info(f"Fetching packages with limit={limit}, offset={offset}")
-    result = package_manager.get_all_packages(limit=limit, offset=offset)
+    logger.info("Fetching packages with limit=%s, offset=%s, after=%s", limit, offset, after)
+    try:
+        after_id = decode_cursor(after) if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    result = await package_manager.get_all_packages(limit=limit, offset=offset, after=after_id, owner=owner)
     
     if not result.get("success"):
         raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
     
-    return result
+    return json_response(request, result)
 
-@app.get("/packages/search/", tags=["Packages"], response_model=PackageResponse)
-def search_packages(
+@app.get("/packages/search/", tags=["Packages"], response_model=PackageListResponse)
+async def search_packages(
+    request: Request,
     tracking_number: str | None = None,
     courier: str | None = None,
-    status: str | None = None
+    status: str | None = None,
+    destination: str | None = None,
+    limit: int = Query(100, ge=1, le=500),
+    after: str | None = None,
+    owner: str | None = Depends(authenticate)
 ):
     """
     Search packages by various criteria.
@@ -110,24 +424,232 @@ def search_packages(
     - **tracking_number**: Partial or full tracking number
     - **courier**: Courier name
     - **status**: Package status
+    - **destination**: Partial destination
+    - **limit**: Maximum number of packages to return (1-500)
+    - **after**: `next_cursor` from the previous page
+    
+    Exact and prefix matches are listed before other partial matches.
     """
-    logger.info(f"Searching packages: tracking={tracking_number}, courier={courier}, status={status}")
-    result = package_manager.search_packages(
+    logger.info("Searching packages: tracking=%s, courier=%s, status=%s, destination=%s", tracking_number, courier, status, destination)
+    try:
+        position = decode_ranked_cursor(after) if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    result = await package_manager.search_packages(
         tracking_number=tracking_number,
         courier=courier,
-        status=status
+        status=status,
+        destination=destination,
+        limit=limit,
+        after=position,
+        owner=owner
     )
     
     if not result.get("success"):
         raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
     
-    return result
+    return json_response(request, result)
 
-@app.get("/packages/{id}", tags=["Packages"], response_model=PackageResponse)
-def get_package(id: int):
+@app.get("/packages/stats", tags=["Packages"], response_model=PackageResponse)
+async def get_package_stats(request: Request, owner: str | None = Depends(authenticate)):
+    """
+    Package counts by status and by courier, plus overdue counts.
+    
+    Served from counters kept current on every write and reconciled with the
+    database every `STATS_RECONCILE_SECONDS`, so the cost does not grow with the table.
+    """
+    result = package_manager.package_stats(owner)
+    
+    if not result.get("success"):
+        raise HTTPException(status_code=503, detail=result.get("error", "Unknown error"))
+    
+    return json_response(request, result)
+
+DURATION_UNITS = {"m": "minutes", "h": "hours", "d": "days"}
+
+def parse_duration(text):
+    """Parse "90m", "24h" or "7d" into a timedelta."""
+    return timedelta(**{DURATION_UNITS[text[-1]]: int(text[:-1])})
+
+@app.get("/packages/overdue", tags=["Packages"], response_model=PackageListResponse)
+async def get_overdue_packages(
+    request: Request,
+    limit: int = Query(100, ge=1, le=500),
+    after: str | None = None,
+    owner: str | None = Depends(authenticate)
+):
+    """
+    Open packages past their expected delivery date, earliest first.
+    
+    - **limit**: Maximum number of packages to return (1-500)
+    - **after**: `next_cursor` from the previous page
+    
+    Served from an in-process index sorted by expected delivery, so the cost
+    follows the page size rather than the table size.
+    """
+    try:
+        position = decode_ranked_cursor(after) if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    result = await package_manager.get_overdue_packages(limit=limit, after=position, owner=owner)
+    
+    if not result.get("success"):
+        raise HTTPException(status_code=503, detail=result.get("error", "Unknown error"))
+    
+    return json_response(request, result)
+
+@app.get("/packages/due", tags=["Packages"], response_model=PackageListResponse)
+async def get_due_packages(
+    request: Request,
+    within: str = Query("24h", pattern=r"^\d{1,4}[mhd]$", description="Window such as 90m, 24h or 7d"),
+    limit: int = Query(100, ge=1, le=500),
+    after: str | None = None,
+    owner: str | None = Depends(authenticate)
+):
+    """
+    Open packages due between today and the end of the `within` window, earliest first.
+    
+    - **within**: How far ahead to look (minutes, hours or days; dates are whole days)
+    - **limit**: Maximum number of packages to return (1-500)
+    - **after**: `next_cursor` from the previous page
+    """
+    try:
+        position = decode_ranked_cursor(after) if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    result = await package_manager.get_due_packages(parse_duration(within), limit=limit, after=position, owner=owner)
+    
+    if not result.get("success"):
+        raise HTTPException(status_code=503, detail=result.get("error", "Unknown error"))
+    
+    return json_response(request, result)
+
+@app.get("/packages/changes", tags=["Packages"])
+async def package_changes(
+    request: Request,
+    status: str | None = None,
+    courier: str | None = None,
+    last_event_id: str | None = None,
+    owner: str | None = Depends(authenticate)
+):
+    """
+    Server-Sent Events feed of package creates, updates and deletes.
+    
+    - **status** / **courier**: Only send events for matching packages (an update
+      leaving the filtered status is still sent)
+    - **last_event_id**: Resume after this event (browsers send `Last-Event-ID` automatically)
+    
+    A `reset` event means the requested position is no longer buffered (or
+    comes from another worker or before a restart) and the client should
+    reload the list before applying further deltas.
+    """
+    if last_event_id is None:
+        last_event_id = request.headers.get("last-event-id") or None
+    logger.info("Change feed subscriber: status=%s, courier=%s, last_event_id=%s", status, courier, last_event_id)
+    subscription, missed = package_manager.changes.subscribe(status, courier, last_event_id, owner)
+
+    async def body():
+        try:
+            yield "retry: 3000\n\n"
+            if missed is None:
+                yield "event: reset\ndata: {}\n\n"
+            for event in missed or []:
+                yield format_sse(event)
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    return
+                yield format_sse(event)
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/packages/export", tags=["Packages"])
+async def export_packages(
+    format: str = Query("ndjson", pattern="^(csv|ndjson|arrow)$"),
+    tracking_number: str | None = None,
+    courier: str | None = None,
+    status: str | None = None,
+    destination: str | None = None,
+    chunk_size: int = Query(1000, ge=1, le=10000),
+    owner: str | None = Depends(authenticate)
+):
+    """
+    Stream every matching package as CSV, NDJSON or an Arrow IPC stream.
+    
+    Rows are read in id-keyset chunks and written out as they arrive, so
+    memory stays flat regardless of table size. Filters match `/packages/search/`.
+    """
+    logger.info("Exporting packages as %s: tracking=%s, courier=%s, status=%s, destination=%s", format, tracking_number, courier, status, destination)
+    try:
+        encoder = get_encoder(format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    chunks = package_manager.iter_packages(tracking_number, courier, status, destination, chunk_size, owner)
+    first = await anext(chunks)
+    if not first.get("success"):
+        raise HTTPException(status_code=500, detail=first.get("error", "Unknown error"))
+
+    async def body():
+        yield encoder.start() + encoder.encode(first["data"])
+        async for result in chunks:
+            if not result.get("success"):
+                logger.error("Export aborted: %s", result.get('error'))
+                return
+            yield encoder.encode(result["data"])
+        yield encoder.finish()
+
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=packages.{format}"}
+    )
+
+@app.get("/packages/batch", tags=["Packages"], response_model=PackageBatchResponse)
+async def get_packages_batch(
+    request: Request,
+    ids: str = Query(..., description="Comma-separated package IDs"),
+    owner: str | None = Depends(authenticate)
+):
+    """Retrieve several packages by ID in one request."""
+    try:
+        id_list = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if not id_list:
+        raise HTTPException(status_code=400, detail="No ids provided")
+    if len(id_list) > 500:
+        raise HTTPException(status_code=400, detail="At most 500 ids per request")
+
+    logger.info("Fetching %s packages by id", len(id_list))
+    result = await package_manager.get_packages_batch(id_list, owner)
+
+    if not result.get("success"):
+        raise HTTPException(
+            status_code=500,
+            detail=result.get("error", "Failed to fetch packages")
+        )
+
+    return json_response(request, result)
+
+@app.get("/packages/{id}", tags=["Packages"], response_model=PackageItemResponse)
+async def get_package(request: Request, id: int, owner: str | None = Depends(authenticate)):
     """Retrieve a single package by ID."""
-    logger.info(f"Fetching package {id}")
-    result = package_manager.get_package(id)
+    logger.info("Fetching package %s", id)
+    result = await package_manager.get_package(id, owner)
     
     if not result.get("success"):
         raise HTTPException(
@@ -135,51 +657,206 @@ def get_package(id: int):
             detail=result.get("error", "Package not found")
         )
     
-    return result
+    return json_response(request, result)
+
+@app.get("/packages/{id}/history", tags=["History"], response_model=PackageResponse)
+async def get_package_history(request: Request, id: int, owner: str | None = Depends(authenticate)):
+    """Status timeline of one package, oldest first."""
+    logger.info("Fetching history for package %s", id)
+    result = await package_manager.get_package_history(id, owner)
+    
+    if not result.get("success"):
+        # Another owner's package
+        status_code = 404 if result.get("error") == "Package not found" else 500
+        raise HTTPException(status_code=status_code, detail=result.get("error", "Unknown error"))
+    
+    return json_response(request, result)
+
+@app.get("/history/", tags=["History"], response_model=PackageResponse)
+async def get_status_changes(
+    request: Request,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    owner: str | None = Depends(authenticate)
+):
+    """
+    Status changes of all packages (or the caller's) in a time range, oldest first.
+    
+    - **since**: Start of the range, inclusive (default: one hour ago)
+    - **until**: End of the range, exclusive (default: now)
+    - **limit**: Maximum number of events to return (1-10000)
+    """
+    until = until or datetime.now(timezone.utc)
+    since = since or until - timedelta(hours=1)
+    logger.info("Fetching status changes between %s and %s", since, until)
+    result = await package_manager.get_status_changes(to_ms(since), to_ms(until), limit, owner)
+    
+    if not result.get("success"):
+        raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
+    
+    return json_response(request, result)
+
+# ----------------------------- Analytics -------------------------------
+async def analytics_response(request, report, *args):
+    """Build an analytics report off the event loop (group-bys over every package)."""
+    if analytics is None:
+        raise HTTPException(status_code=404, detail="Analytics are disabled")
+    result = await asyncio.to_thread(getattr(analytics, report), *args)
+    if not result.get("success"):
+        raise HTTPException(status_code=503, detail=result.get("error", "Unknown error"))
+    return json_response(request, result)
+
+# Reports cover every owner's packages, so only admins may read them
+@app.get("/analytics/summary", tags=["Analytics"], response_model=PackageResponse, dependencies=[Depends(authenticate.admin)])
+async def analytics_summary(request: Request, window_days: int = Query(30, ge=1, le=365)):
+    """
+    Delivery performance across all packages.
+    
+    On-time rate, lateness percentiles (days past expected delivery), transit
+    time and deliveries per day over the last `window_days`. Timings come from
+    the status history, so packages without history only count towards volume.
+    """
+    return await analytics_response(request, "summary", window_days)
+
+@app.get("/analytics/couriers", tags=["Analytics"], response_model=PackageResponse, dependencies=[Depends(authenticate.admin)])
+async def analytics_couriers(request: Request, window_days: int = Query(30, ge=1, le=365)):
+    """Delivery performance per courier, busiest first."""
+    return await analytics_response(request, "by_courier", window_days)
 
-@app.post("/packages/", tags=["Packages"], response_model=PackageResponse)
-def create_package(pkg: PackageCreate):
+@app.get("/analytics/lanes", tags=["Analytics"], response_model=PackageResponse, dependencies=[Depends(authenticate.admin)])
+async def analytics_lanes(
+    request: Request,
+    limit: int = Query(50, ge=1, le=1000),
+    window_days: int = Query(30, ge=1, le=365)
+):
+    """Delivery performance per origin/destination lane for the busiest `limit` lanes."""
+    return await analytics_response(request, "by_lane", limit, window_days)
+
+@app.get("/analytics/daily", tags=["Analytics"], response_model=PackageResponse, dependencies=[Depends(authenticate.admin)])
+async def analytics_daily(
+    request: Request,
+    days: int = Query(30, ge=1, le=366),
+    courier: str | None = None
+):
+    """Packages created and delivered per day (UTC) with the on-time rate, optionally for one courier."""
+    return await analytics_response(request, "daily", days, courier)
+
+@app.post("/packages/", tags=["Packages"], response_model=PackageItemResponse)
+async def create_package(request: Request, pkg: PackageCreate, owner: str | None = Depends(authenticate)):
     """Create a new package."""
-    logger.info(f"Creating package with tracking number: {pkg.tracking_number}")
-    result = package_manager.add_package(
+    logger.info("Creating package with tracking number: %s", pkg.tracking_number)
+    result = await package_manager.add_package(
         pkg.tracking_number,
         pkg.courier,
         pkg.status,
         pkg.expected_delivery,
         pkg.origin,
         pkg.destination,
-        pkg.notes
+        pkg.notes,
+        owner
     )
     
     if not result.get("success"):
         raise HTTPException(status_code=400, detail=result.get("error", "Unknown error"))
     
-    return result
+    return json_response(request, result)
+
+@app.post("/packages/bulk", tags=["Packages"], response_model=PackageResponse)
+async def bulk_import_packages(
+    request: Request,
+    format: str | None = Query(None, pattern="^(csv|ndjson)$"),
+    chunk_size: int = Query(500, ge=1, le=5000),
+    owner: str | None = Depends(authenticate)
+):
+    """
+    Import many packages from a streamed CSV or NDJSON body.
+    
+    - **format**: `csv` (header line required) or `ndjson`; defaults from Content-Type
+    - **chunk_size**: Rows validated, duplicate-checked and inserted per batch
+    
+    Returns a per-row report; one bad row does not reject the rest.
+    """
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    logger.info("Bulk importing packages as %s in chunks of %s", fmt, chunk_size)
+    parser = BulkRowParser(fmt)
+    results = []
+    batch = []
+
+    async def flush():
+        if batch:
+            results.extend(await package_manager.add_packages(list(batch), owner))
+            batch.clear()
 
-@app.put("/packages/{id}", tags=["Packages"], response_model=PackageResponse)
-def update_package(id: int, pkg: PackageUpdate):
+    async def consume(parsed_rows):
+        for row_number, row, error in parsed_rows:
+            if error:
+                results.append({"row": row_number, "success": False, "error": error})
+                continue
+            batch.append((row_number, row))
+            if len(batch) >= chunk_size:
+                await flush()
+
+    try:
+        async for chunk in request.stream():
+            await consume(parser.feed(chunk))
+        await consume(parser.close())
+        await flush()
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Body must be UTF-8 encoded")
+
+    results.sort(key=lambda result: result["row"])
+    inserted = sum(1 for result in results if result["success"])
+    return json_response(request, {
+        "success": True,
+        "data": {"inserted": inserted, "failed": len(results) - inserted, "results": results}
+    })
+
+@app.put("/packages/{id}", tags=["Packages"], response_model=PackageItemResponse)
+async def update_package(request: Request, id: int, pkg: PackageUpdate, owner: str | None = Depends(authenticate)):
     """Update an existing package."""
-    logger.info(f"Updating package {id}")
+    logger.info("Updating package %s", id)
     updates = pkg.model_dump(exclude_none=True)
     
     if not updates:
         raise HTTPException(status_code=400, detail="No fields to update")
     
-    result = package_manager.update_package(id, updates)
+    result = await package_manager.update_package(id, updates, owner)
     
     if not result.get("success"):
+        # Invalid updates are the caller's mistake, not a missing package
+        status_code = 404 if result.get("error") == "Package not found" else 400
         raise HTTPException(
-            status_code=404,
+            status_code=status_code,
             detail=result.get("error", "Package not found")
         )
     
-    return result
+    return json_response(request, result)
+
+@app.patch("/packages/bulk", tags=["Packages"], response_model=PackageBulkUpdateResponse)
+async def update_packages_bulk(request: Request, bulk: PackageBulkUpdate, owner: str | None = Depends(authenticate)):
+    """Apply the same update to many packages, selected by id or tracking number."""
+    updates = bulk.updates.model_dump(exclude_none=True)
 
-@app.delete("/packages/{id}", tags=["Packages"], response_model=PackageResponse)
-def delete_package(id: int):
+    if not updates:
+        raise HTTPException(status_code=400, detail="No fields to update")
+
+    result = await package_manager.update_packages(updates, ids=bulk.ids, tracking_numbers=bulk.tracking_numbers, owner=owner)
+
+    if not result.get("success"):
+        raise HTTPException(
+            status_code=400,
+            detail=result.get("error", "Bulk update failed")
+        )
+
+    logger.info("Bulk update applied to %s packages", result['updated'])
+    return json_response(request, result)
+
+@app.delete("/packages/{id}", tags=["Packages"], response_model=PackageItemResponse)
+async def delete_package(request: Request, id: int, owner: str | None = Depends(authenticate)):
     """Delete a package."""
-    logger.info(f"Deleting package {id}")
-    result = package_manager.delete_package(id)
+    logger.info("Deleting package %s", id)
+    result = await package_manager.delete_package(id, owner)
     
     if not result.get("success"):
         raise HTTPException(
@@ -187,18 +864,43 @@ def delete_package(id: int):
             detail=result.get("error", "Package not found")
         )
     
-    return result
+    return json_response(request, result)
 
 # ----------------------------- Error Handlers -------------------------------
+@app.exception_handler(BackendUnavailable)
+async def backend_unavailable_handler(request, exc):
+    """Fail fast with 503/504 and Retry-After while the database is down or slow."""
+    logger.warning("Backend unavailable on %s %s: %s", request.method, request.url.path, exc)
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"success": False, "error": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
-    logger.error(f"Unhandled exception: {str(exc)}")
-    return {
-        "success": False,
-        "error": "An internal server error occurred"
-    }
+    logger.error("Unhandled exception: %s", exc, exc_info=exc)
+    return JSONResponse(
+        status_code=500,
+        content={"success": False, "error": "An internal server error occurred"}
+    )
 
 # ----------------------------- Run -------------------------------
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+
+    host = os.getenv("API_HOST", "0.0.0.0")
+    port = int(os.getenv("API_PORT", "8000"))
+    if os.getenv("API_MODE", "development").lower() == "production":
+        # Each worker process runs the lifespan: its own clients, pools and warm-up.
+        # Indexes, caches, counters, the change feed and buffered history are per
+        # process and only see that worker's writes, so more than one is opt-in.
+        uvicorn.run(
+            "API.main:app", host=host, port=port,
+            workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+            timeout_graceful_shutdown=int(os.getenv("DRAIN_SECONDS", "30")),
+            log_config=None,
+            access_log=False
+        )
+    else:
+        uvicorn.run("API.main:app", host=host, port=port, reload=True)
\ No newline at end of file
@@ -0,0 +1,137 @@
+import hashlib
+import gzip
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+
+from SRC.metrics import Histogram
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+
+ENCODE_SECONDS = Histogram("response_encode_seconds", "Time spent serializing and hashing response bodies.")
+COMPRESS_SECONDS = Histogram("response_compress_seconds", "Time spent compressing response bodies.", ("coding",))
+
+
+class _CompressedCache:
+    """Remembers compressed forms of recently served bodies, keyed by content.
+
+    Serializing and hashing a result is cheap next to compressing it, so
+    every response is encoded afresh and its ETag (a hash of the body)
+    picks up earlier compression work for identical bodies, whichever
+    result object produced them.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, etag, coding):
+        with self._lock:
+            body = self._entries.get((etag, coding))
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((etag, coding))
+            self.hits += 1
+            return body
+
+    def put(self, etag, coding, body):
+        with self._lock:
+            self._entries[(etag, coding)] = body
+            self._entries.move_to_end((etag, coding))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        """Return size and hit/miss counters, shaped like LRUCache.stats()."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_compressed = _CompressedCache()
+
+
+def _encode(result):
+    """Return (body, strong ETag) of a result."""
+    start = time.perf_counter()
+    body = orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS)
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    ENCODE_SECONDS.observe(time.perf_counter() - start)
+    return body, etag
+
+
+def encoded_cache_stats():
+    """Return hit/miss counters for the compressed-response cache."""
+    return _compressed.stats()
+
+
+def _etag_matches(request, etag):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Compressed variants carry a suffix on the same strong validator
+    candidates = {tag.strip().removeprefix("W/").split("-")[0].rstrip('"') + '"' for tag in header.split(",")}
+    return etag in candidates
+
+
+def _negotiate(request):
+    accepted = request.headers.get("accept-encoding", "")
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def json_response(request: Request, result, status_code=200):
+    """Serialize a result with orjson, answering conditional GETs and compressing large bodies.
+
+    Responses carry a strong ETag (a content hash); an If-None-Match hit
+    returns 304 with no body. Bodies of at least COMPRESS_MIN_BYTES are
+    sent brotli- or gzip-encoded when the client accepts it.
+    """
+    body, etag = _encode(result)
+    # Bodies differ per caller once requests are authenticated
+    headers = {"ETag": etag, "Vary": "Accept-Encoding, Authorization"}
+
+    if request.method in ("GET", "HEAD") and _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    coding = _negotiate(request) if len(body) >= COMPRESS_MIN_BYTES else None
+    if coding:
+        compressed = _compressed.get(etag, coding)
+        if compressed is None:
+            start = time.perf_counter()
+            compressed = brotli.compress(body, quality=4) if coding == "br" else gzip.compress(body, compresslevel=5)
+            _compressed.put(etag, coding, compressed)
+            COMPRESS_SECONDS.observe(time.perf_counter() - start, coding)
+        body = compressed
+        headers["Content-Encoding"] = coding
+        headers["ETag"] = etag[:-1] + f'-{coding}"'
+
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
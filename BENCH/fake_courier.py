@@ -0,0 +1,75 @@
+"""Serve a fake courier tracking API for testing the tracking poller.
+
+    python BENCH/fake_courier.py --port 9100 --rate 20 --latency-ms 50
+    COURIER_ENDPOINTS="UPS=http://127.0.0.1:9100/ups,FedEx=http://127.0.0.1:9100/fedex" python -m SRC.poller
+
+POST /<courier>/track with {"tracking_numbers": [...]} answers
+{"results": [{"tracking_number": ..., "status": <code>}, ...]}. Every
+tracking number moves through MP -> IT -> OD -> DL one step every
+--step-seconds, starting from a stage derived from the number itself, so
+runs are reproducible; one in twenty gets stuck at EX instead of OD.
+Each courier path is limited to --rate requests per second (429 with
+Retry-After beyond that) and fails --fail-rate of requests with 503.
+"""
+import argparse
+import asyncio
+import random
+import time
+import zlib
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+STAGES = ("MP", "IT", "OD", "DL")
+
+
+def status_at(tracking_number, elapsed, step_seconds):
+    """Return the courier code for `tracking_number` `elapsed` seconds after the server started."""
+    digest = zlib.crc32(tracking_number.encode())
+    stage = min(len(STAGES) - 1, digest % len(STAGES) + int(elapsed / step_seconds))
+    if STAGES[stage] == "OD" and digest % 20 == 0:
+        return "EX"
+    return STAGES[stage]
+
+
+def build_app(rate, latency_ms, fail_rate, step_seconds):
+    app = FastAPI(title="Fake courier")
+    started = time.monotonic()
+    next_slot = {}
+
+    @app.post("/{courier}/track")
+    async def track(courier: str, request: Request):
+        if rate > 0:
+            now = time.monotonic()
+            slot = max(now, next_slot.get(courier, 0.0))
+            if slot - now > 1:
+                return JSONResponse({"error": "rate limited"}, 429, {"Retry-After": "1"})
+            next_slot[courier] = slot + 1 / rate
+        if latency_ms:
+            await asyncio.sleep(random.uniform(0.5, 1.5) * latency_ms / 1000)
+        if random.random() < fail_rate:
+            return JSONResponse({"error": "unavailable"}, 503)
+
+        elapsed = time.monotonic() - started
+        numbers = (await request.json())["tracking_numbers"]
+        return {"results": [{"tracking_number": number, "status": status_at(number, elapsed, step_seconds)}
+                            for number in numbers]}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--rate", type=float, default=20, help="requests per second per courier (0 = unlimited)")
+    parser.add_argument("--latency-ms", type=float, default=50, help="mean response latency")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--step-seconds", type=float, default=300, help="time between status steps")
+    args = parser.parse_args()
+    app = build_app(args.rate, args.latency_ms, args.fail_rate, args.step_seconds)
+    uvicorn.run(app, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Load-test the API end to end against a local SQLite stand-in for Supabase.
+
+    python BENCH/load.py --size 100k --concurrency 32 --duration 10 --output run.json
+    python BENCH/load.py --size 100k --compare run.json
+
+Each run copies a seeded dataset (see seed.py), starts `API/main.py` under
+uvicorn with DATABASE_BACKEND=sqlite, then drives one scenario at a time
+with a fixed number of closed-loop workers. Pass --url to drive an already
+running server instead (its data should come from the same dataset).
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from SRC.cursors import encode_cursor
+from SRC.statuses import STATUSES
+from BENCH.results import REPO_ROOT, compare, print_table, summarize, write_results
+from BENCH.seed import COURIERS, CITIES, SIZES, parse_size, seed, tracking_number
+
+SCENARIOS = ("list", "get", "deep_offset", "deep_keyset", "search", "create", "update", "delete")
+
+
+class Workload:
+    """Builds requests for each scenario from a seeded dataset of `size` rows."""
+
+    def __init__(self, size, rng):
+        self.size = size
+        self.rng = rng
+        self.created = []
+        self.counter = 0
+
+    def list(self):
+        return "GET", "/packages/", {"params": {"limit": 100}}
+
+    def get(self):
+        return "GET", f"/packages/{self.rng.randint(1, self.size)}", {}
+
+    def deep_offset(self):
+        offset = self.rng.randint(self.size // 2, max(self.size // 2, self.size - 100))
+        return "GET", "/packages/", {"params": {"limit": 100, "offset": offset}}
+
+    def deep_keyset(self):
+        after = self.rng.randint(self.size // 2, max(self.size // 2, self.size - 100))
+        return "GET", "/packages/", {"params": {"limit": 100, "after": encode_cursor(after)}}
+
+    def search(self):
+        params = self.rng.choice((
+            {"tracking_number": tracking_number(self.rng.randrange(self.size))[:8]},
+            {"courier": self.rng.choice(COURIERS)},
+            {"destination": self.rng.choice(CITIES).split(",")[0], "status": self.rng.choice(STATUSES)},
+        ))
+        return "GET", "/packages/search/", {"params": {**params, "limit": 50}}
+
+    def create(self):
+        self.counter += 1
+        return "POST", "/packages/", {"json": {
+            "tracking_number": f"BENCH{os.getpid()}-{self.counter}",
+            "courier": self.rng.choice(COURIERS),
+            "status": "Pending",
+            "expected_delivery": "2025-06-01",
+            "origin": self.rng.choice(CITIES),
+            "destination": self.rng.choice(CITIES),
+        }}
+
+    def update(self):
+        return "PUT", f"/packages/{self.rng.randint(1, self.size)}", {"json": {"status": self.rng.choice(STATUSES)}}
+
+    def delete(self):
+        if not self.created:
+            return None
+        return "DELETE", f"/packages/{self.created.pop()}", {}
+
+
+async def run_scenario(client, workload, name, concurrency, duration, warmup):
+    """Drive one scenario with `concurrency` workers; return its summary."""
+    latencies = []
+    errors = 0
+    measuring = False
+    deadline = time.monotonic() + warmup + duration
+
+    async def worker():
+        nonlocal errors
+        while time.monotonic() < deadline:
+            request = getattr(workload, name)()
+            if request is None:
+                return
+            method, path, kwargs = request
+            start = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            elapsed = time.perf_counter() - start
+            if name == "create" and response.status_code == 200:
+                workload.created.append(response.json()["data"]["id"])
+            if not measuring:
+                continue
+            latencies.append(elapsed)
+            if response.status_code >= 400 and not (name == "update" and response.status_code == 404):
+                errors += 1
+
+    tasks = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    await asyncio.sleep(warmup)
+    measuring = True
+    started = time.perf_counter()
+    await asyncio.gather(*tasks)
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(dataset, workers):
+    """Start the API on a copy of `dataset`; return (process, base url, working dir)."""
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    db_path = os.path.join(workdir, "packages.db")
+    shutil.copyfile(dataset, db_path)
+
+    port = free_port()
+    # One client driving the whole load would otherwise be rate limited
+    env = {**os.environ, "DATABASE_BACKEND": "sqlite", "SQLITE_PATH": db_path, "RATE_LIMIT_RPS": "0"}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "API.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=REPO_ROOT, env=env,
+    )
+    return process, f"http://127.0.0.1:{port}", workdir
+
+
+async def wait_ready(url, timeout=600):
+    async with httpx.AsyncClient(base_url=url) as client:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health/ready")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"API at {url} did not become ready")
+
+
+async def run(args, url):
+    await wait_ready(url)
+    workload = Workload(args.size, random.Random(args.seed))
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {}
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        for name in args.scenarios:
+            results[name] = await run_scenario(client, workload, name, args.concurrency, args.duration, args.warmup)
+            print(f"{name:<24} {results[name]['throughput_rps']:>10} req/s  p99 {results[name]['p99_ms']} ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the package API")
+    parser.add_argument("--size", type=parse_size, default=SIZES["100k"], help="10k, 100k, 1m or a row count")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before each scenario")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--url", help="drive an already running API instead of starting one")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change that counts as a regression")
+    args = parser.parse_args()
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    process = workdir = None
+    url = args.url
+    if url is None:
+        process, url, workdir = start_server(seed(args.size, args.seed), args.workers)
+    try:
+        results = asyncio.run(run(args, url))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print()
+    print_table(results, ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "errors"))
+    params = {key: value for key, value in vars(args).items() if key not in ("output", "compare", "threshold")}
+    if args.output:
+        write_results(args.output, "load", params, results)
+    if args.compare:
+        print(f"\nCompared with {args.compare}:")
+        regressions = compare(results, args.compare, {"throughput_rps": 1, "p99_ms": -1}, args.threshold)
+        if regressions:
+            sys.exit(f"Regressions: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
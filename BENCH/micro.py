@@ -0,0 +1,99 @@
+"""Micro-benchmarks for validation, search and serialization hot paths.
+
+    python BENCH/micro.py --output micro.json
+    python BENCH/micro.py --compare micro.json --filter encode
+
+Each benchmark is timed with timeit (auto-ranged loop count, best of
+--repeat runs) and reported in nanoseconds per call.
+"""
+import argparse
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+import orjson
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from SRC.db import DatabaseManager
+from SRC.storage import SQLiteStorage
+from SRC.logic import PackageManager, SEARCH_FIELDS, row_matches_search
+from SRC.indexes import NgramIndex
+from SRC.cursors import encode_cursor, decode_cursor
+from SRC.export import CsvEncoder
+from API.responses import _encode
+from BENCH.results import compare, print_table, write_results
+from BENCH.seed import generate
+
+
+def benchmarks(manager, rows):
+    """Return {name: zero-argument callable} for every micro-benchmark."""
+    page = [{"id": i + 1, **row} for i, row in enumerate(rows[:100])]
+    index = NgramIndex(SEARCH_FIELDS)
+    index.warm({"id": i + 1, "status": row["status"], **{f: row[f] for f in SEARCH_FIELDS}} for i, row in enumerate(rows))
+    row = page[0]
+    body = orjson.dumps({"success": True, "data": page})
+    cursor = encode_cursor(123456)
+
+    return {
+        "prepare_package": lambda: manager._prepare_package(
+            row["tracking_number"], row["courier"], row["status"], row["expected_delivery"],
+            row["origin"], row["destination"], row["notes"]),
+        "validate_package_row": lambda: manager._validate_package_row(row),
+        "prepare_updates": lambda: manager._prepare_updates({"status": "Delivered", "courier": " UPS "}),
+        "split_chunk_100": lambda: manager._split_chunk(enumerate(page)),
+        "row_matches_search": lambda: row_matches_search(row, "1Z00", "ups", None, "new"),
+        "ngram_search_prefix": lambda: index.search({"tracking_number": "1Z0000001"}, limit=50),
+        "ngram_search_status": lambda: index.search({"destination": "boston"}, status="Delayed", limit=50),
+        "decode_cursor": lambda: decode_cursor(cursor),
+        "orjson_page_100": lambda: orjson.dumps({"success": True, "data": page}),
+        "encode_response_100": lambda: _encode({"success": True, "data": page}),
+        "gzip_page_100": lambda: gzip.compress(body, compresslevel=5),
+        "csv_page_100": lambda: CsvEncoder().encode(page),
+    }
+
+
+def measure(fn, repeat):
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return {"ns_per_call": round(best / number * 1e9, 1), "loops": number}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run micro-benchmarks")
+    parser.add_argument("--rows", type=int, default=10_000, help="rows in the search index")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    manager = PackageManager(DatabaseManager(SQLiteStorage(os.path.join(workdir, "packages.db"))))
+    try:
+        results = {}
+        for name, fn in benchmarks(manager, list(generate(args.rows))).items():
+            if args.filter and args.filter not in name:
+                continue
+            results[name] = measure(fn, args.repeat)
+    finally:
+        manager.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_table(results, ("ns_per_call", "loops"))
+    params = {"rows": args.rows, "repeat": args.repeat, "filter": args.filter}
+    if args.output:
+        write_results(args.output, "micro", params, results)
+    if args.compare:
+        print(f"\nCompared with {args.compare}:")
+        regressions = compare(results, args.compare, {"ns_per_call": -1}, args.threshold)
+        if regressions:
+            sys.exit(f"Regressions: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list (q in 0..100)."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, elapsed, errors=0):
+    """Reduce per-request latencies (seconds) to throughput and percentiles in milliseconds."""
+    latencies = sorted(latencies)
+    ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+    }
+
+
+def environment():
+    """Describe the machine and revision a run was taken on."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def write_results(path, suite, params, results):
+    """Write a run as JSON: {"suite", "environment", "params", "results": {name: {...}}}."""
+    document = {"suite": suite, "environment": environment(), "params": params, "results": results}
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+    return document
+
+
+def compare(current, baseline_path, metrics, threshold):
+    """Print each metric against a previous run; return the names that regressed.
+
+    `metrics` maps a result field to +1 if higher is better or -1 if lower
+    is better. A change worse than `threshold` (a fraction) is a regression.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    for name, result in current.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        for field, direction in metrics.items():
+            old, new = before.get(field), result.get(field)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            regressed = change * direction < -threshold
+            print(f"  {name:<24} {field:<16} {old:>12} -> {new:<12} {change:+.1%}{'  REGRESSION' if regressed else ''}")
+            if regressed:
+                regressions.append(f"{name}.{field}")
+    return regressions
+
+
+def print_table(results, columns):
+    """Print results as an aligned table, one row per benchmark."""
+    print(f"{'benchmark':<24}" + "".join(f"{column:>16}" for column in columns))
+    for name, result in results.items():
+        print(f"{name:<24}" + "".join(f"{str(result.get(column)):>16}" for column in columns))
@@ -0,0 +1,97 @@
+"""Build reproducible SQLite datasets for the benchmarks.
+
+    python BENCH/seed.py --size 100000
+
+Datasets are written to BENCH/data/packages-<size>.db and reused by later
+runs; the same --size and --seed always produce the same rows.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from SRC.storage import SQLiteStorage
+from SRC.statuses import STATUSES
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+COURIERS = ("UPS", "FedEx", "DHL", "USPS", "Amazon Logistics", "OnTrac", "Canada Post", "Royal Mail")
+CITIES = (
+    "New York, NY", "Los Angeles, CA", "Chicago, IL", "Houston, TX", "Phoenix, AZ",
+    "Philadelphia, PA", "San Antonio, TX", "San Diego, CA", "Dallas, TX", "Austin, TX",
+    "Seattle, WA", "Denver, CO", "Boston, MA", "Atlanta, GA", "Miami, FL", "Portland, OR",
+)
+# Most packages are in flight; a long tail is closed
+STATUS_WEIGHTS = (15, 35, 10, 30, 7, 3)
+BASE_DATE = date(2025, 1, 1)
+
+
+def tracking_number(i):
+    """Deterministic, unique tracking number for dataset row `i`."""
+    return f"1Z{i:010d}{(i * 7919) % 97:02d}"
+
+
+def generate(size, seed=42):
+    """Yield `size` package rows, identical for the same seed."""
+    rng = random.Random(seed)
+    for i in range(size):
+        yield {
+            "tracking_number": tracking_number(i),
+            "courier": rng.choice(COURIERS),
+            "status": rng.choices(STATUSES, STATUS_WEIGHTS)[0],
+            "expected_delivery": (BASE_DATE + timedelta(days=rng.randrange(730))).isoformat(),
+            "origin": rng.choice(CITIES),
+            "destination": rng.choice(CITIES),
+            "notes": None if rng.random() < 0.8 else "Fragile item",
+        }
+
+
+def dataset_path(size):
+    return os.path.join(DATA_DIR, f"packages-{size}.db")
+
+
+def seed(size, seed=42, path=None, chunk_size=5000):
+    """Create (or reuse) a dataset of `size` packages and return its path."""
+    path = path or dataset_path(size)
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    partial = path + ".partial"
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(partial + suffix):
+            os.remove(partial + suffix)
+
+    start = time.perf_counter()
+    storage = SQLiteStorage(partial)
+    chunk = []
+    for row in generate(size, seed):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            storage.insert(chunk)
+            chunk = []
+    if chunk:
+        storage.insert(chunk)
+    conn = storage._conn()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    os.replace(partial, path)
+    print(f"Seeded {size} packages into {path} in {time.perf_counter() - start:.1f}s")
+    return path
+
+
+def parse_size(value):
+    return SIZES.get(value.lower()) or int(value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create benchmark datasets")
+    parser.add_argument("--size", type=parse_size, action="append", help="10k, 100k, 1m or a row count (repeatable)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    for size in args.size or list(SIZES.values()):
+        print(seed(size, args.seed))
@@ -1,9 +1,10 @@
 import streamlit as st
-import requests
 import pandas as pd
 from datetime import date, datetime
+import sys, os
 
-BASE_URL = "http://127.0.0.1:8000"
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from client import client_from_env
 
 # Page config
 st.set_page_config(
@@ -29,24 +30,14 @@ st.markdown("""
 st.title("📦 Package Delivery Tracker")
 
 # Helper function for API calls
+@st.cache_resource
+def get_client():
+    """One pooled, caching API client shared by every rerun and session."""
+    return client_from_env()
+
 def api_request(method, endpoint, **kwargs):
     """Make API request with error handling."""
-    try:
-        url = f"{BASE_URL}{endpoint}"
-        response = requests.request(method, url, **kwargs)
-        
-        if response.headers.get("content-type", "").startswith("application/json"):
-            data = response.json()
-            if response.status_code in [200, 201]:
-                return data, None
-            else:
-                return None, data.get("detail", "Unknown error")
-        else:
-            return None, f"Non-JSON response: {response.text[:100]}"
-    except requests.exceptions.ConnectionError:
-        return None, "Could not connect to API. Is the server running?"
-    except Exception as e:
-        return None, f"Error: {str(e)}"
+    return get_client().request(method, endpoint, **kwargs)
 
 # Sidebar for search/filter
 with st.sidebar:
@@ -77,7 +68,7 @@ with st.sidebar:
             st.info("No packages found")
 
 # Tabs for different views
-tab1, tab2, tab3 = st.tabs(["📋 All Packages", "➕ Add Package", "✏️ Update/Delete"])
+tab1, tab2, tab3, tab4 = st.tabs(["📋 All Packages", "➕ Add Package", "✏️ Update/Delete", "📊 Analytics"])
 
 # ============ TAB 1: Display Packages ============
 with tab1:
@@ -87,13 +78,22 @@ with tab1:
     with col1:
         if st.button("🔄 Refresh", use_container_width=False):
             st.session_state.pop("filtered_packages", None)
+            get_client().invalidate()
             st.rerun()
+    with col2:
+        view = st.selectbox("Show", ["All", "Overdue", "Due within 24h"], label_visibility="collapsed")
     
     # Fetch packages
     packages_to_display = st.session_state.get("filtered_packages")
+    views = {
+        "All": ("/packages/", None),
+        "Overdue": ("/packages/overdue", None),
+        "Due within 24h": ("/packages/due", {"within": "24h"}),
+    }
     
     if packages_to_display is None:
-        data, error = api_request("GET", "/packages/")
+        endpoint, params = views[view]
+        data, error = api_request("GET", endpoint, params=params)
         if error:
             st.error(f"❌ {error}")
         elif data and data.get("success"):
@@ -109,19 +109,23 @@ with tab1:
         if 'expected_delivery' in df.columns:
             df['expected_delivery'] = pd.to_datetime(df['expected_delivery']).dt.date
         
-        # Display metrics
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("Total Packages", len(df))
-        with col2:
-            in_transit = len(df[df['status'] == 'In Transit']) if 'status' in df.columns else 0
-            st.metric("In Transit", in_transit)
-        with col3:
-            delivered = len(df[df['status'] == 'Delivered']) if 'status' in df.columns else 0
-            st.metric("Delivered", delivered)
-        with col4:
-            pending = len(df[df['status'] == 'Pending']) if 'status' in df.columns else 0
-            st.metric("Pending", pending)
+        # Display metrics (counted over the whole table by the API)
+        stats, error = api_request("GET", "/packages/stats")
+        if error:
+            st.warning(f"⚠️ Statistics unavailable: {error}")
+        else:
+            by_status = stats["data"]["by_status"]
+            col1, col2, col3, col4, col5 = st.columns(5)
+            with col1:
+                st.metric("Total Packages", stats["data"]["total"])
+            with col2:
+                st.metric("In Transit", by_status.get("In Transit", 0))
+            with col3:
+                st.metric("Delivered", by_status.get("Delivered", 0))
+            with col4:
+                st.metric("Pending", by_status.get("Pending", 0))
+            with col5:
+                st.metric("Overdue", stats["data"]["overdue"])
         
         st.dataframe(
             df,
@@ -269,6 +273,84 @@ with tab3:
                 else:
                     st.info("No changes to update")
 
+    # Bulk status update
+    st.divider()
+    st.write("**Update Many Packages:**")
+
+    with st.form("bulk_update_form"):
+        col1, col2 = st.columns(2)
+
+        with col1:
+            bulk_numbers = st.text_area("Tracking Numbers (one per line)")
+
+        with col2:
+            bulk_status = st.selectbox(
+                "New Status",
+                ["Pending", "In Transit", "Out for Delivery", "Delivered", "Delayed", "Cancelled"]
+            )
+
+        if st.form_submit_button("💾 Update All", use_container_width=True):
+            numbers = [line.strip() for line in bulk_numbers.splitlines() if line.strip()]
+            if numbers:
+                payload = {"tracking_numbers": numbers, "updates": {"status": bulk_status}}
+                data, error = api_request("PATCH", "/packages/bulk", json=payload)
+                if error:
+                    st.error(f"❌ {error}")
+                elif data and data.get("success"):
+                    st.success(f"✅ Updated {data.get('updated', 0)} of {len(numbers)} packages")
+                    not_found = [item["tracking_number"] for item in data.get("data", []) if not item.get("success")]
+                    if not_found:
+                        st.warning(f"⚠️ Not found: {', '.join(not_found)}")
+            else:
+                st.info("Enter at least one tracking number")
+
+    # Load several packages at once
+    batch_ids = st.text_input("Package IDs (comma-separated)", placeholder="e.g. 1, 2, 3")
+    if st.button("🔍 Load Packages", use_container_width=True) and batch_ids.strip():
+        data, error = api_request("GET", "/packages/batch", params={"ids": batch_ids.replace(" ", "")})
+        if error:
+            st.error(f"❌ {error}")
+        elif data and data.get("success"):
+            if data.get("data"):
+                st.dataframe(pd.DataFrame(data["data"]), use_container_width=True, hide_index=True)
+            if data.get("missing"):
+                st.warning(f"⚠️ Not found: {', '.join(str(id) for id in data['missing'])}")
+
+# ============ TAB 4: Analytics ============
+with tab4:
+    st.subheader("Delivery Performance")
+    
+    summary, error = api_request("GET", "/analytics/summary")
+    if error:
+        st.warning(f"⚠️ Analytics unavailable: {error}")
+    else:
+        totals = summary["data"]
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("On-time Rate", f"{totals['on_time_rate']:.0%}" if totals.get("on_time_rate") is not None else "–")
+        with col2:
+            st.metric("Median Transit (h)", totals.get("transit_hours_p50") or "–")
+        with col3:
+            st.metric("p90 Days Late", totals.get("late_days_p90") if totals.get("late_days_p90") is not None else "–")
+        with col4:
+            st.metric("Deliveries / Day", totals.get("deliveries_per_day", 0))
+        st.caption(f"Refreshed at {summary.get('refreshed_at')}")
+        
+        couriers, error = api_request("GET", "/analytics/couriers")
+        if not error and couriers.get("data"):
+            st.markdown("**By courier**")
+            st.dataframe(pd.DataFrame(couriers["data"]), use_container_width=True, hide_index=True)
+        
+        daily, error = api_request("GET", "/analytics/daily", params={"days": 30})
+        if not error and daily.get("data"):
+            st.markdown("**Last 30 days**")
+            st.line_chart(pd.DataFrame(daily["data"]).set_index("day")[["created", "delivered"]])
+        
+        lanes, error = api_request("GET", "/analytics/lanes", params={"limit": 20})
+        if not error and lanes.get("data"):
+            st.markdown("**Busiest lanes**")
+            st.dataframe(pd.DataFrame(lanes["data"]), use_container_width=True, hide_index=True)
+
 # Footer
 st.divider()
 st.caption("📦 Package Delivery Tracker | Built with FastAPI & Streamlit")
\ No newline at end of file
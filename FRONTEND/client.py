@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class ApiClient:
+    """Pooled, caching HTTP client for the Package Delivery Tracker API.
+
+    One keep-alive `requests.Session` is shared across Streamlit reruns.
+    GET responses are cached per (endpoint, params) for a short TTL; after
+    that they are revalidated with If-None-Match when the API sent an
+    ETag. Any successful POST/PUT/PATCH/DELETE drops cached responses under
+    the same top-level path, so the app always sees its own writes. The
+    cache is shared by every session, so it keeps at most `cache_size`
+    responses (least recently used go first) and forgets any response not
+    confirmed for `cache_keep` seconds.
+    """
+
+    def __init__(self, base_url, pool_size=10, timeout=(3.05, 30), cache_ttl=5.0, client_id="streamlit", token=None,
+                 cache_size=256, cache_keep=300.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.cache_keep = max(cache_keep, cache_ttl)
+        self.session = requests.Session()
+        # Honoured by the API's rate limiter only from addresses it trusts (RATE_LIMIT_TRUSTED)
+        self.session.headers["X-Client-Id"] = client_id
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, endpoint, params):
+        return endpoint, tuple(sorted((params or {}).items()))
+
+    def _cached(self, key):
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is None:
+                return None
+            if time.monotonic() - cached["at"] >= self.cache_keep:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return cached
+
+    def _store(self, key, data, etag):
+        with self._lock:
+            self._cache[key] = {"data": data, "etag": etag, "at": time.monotonic()}
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def invalidate(self, endpoint=None):
+        """Drop cached responses under `endpoint`'s top-level path (all if None)."""
+        with self._lock:
+            if endpoint is None:
+                self._cache.clear()
+                return
+            prefix = "/" + endpoint.strip("/").split("/")[0]
+            for key in [key for key in self._cache if key[0].startswith(prefix)]:
+                del self._cache[key]
+
+    def request(self, method, endpoint, params=None, **kwargs):
+        """Make an API request; return (data, error) like the app expects."""
+        method = method.upper()
+        key = self._key(endpoint, params)
+        headers = kwargs.pop("headers", {})
+
+        cached = None
+        if method == "GET":
+            cached = self._cached(key)
+            if cached and time.monotonic() - cached["at"] < self.cache_ttl:
+                return cached["data"], None
+            if cached and cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+
+        try:
+            response = self.session.request(
+                method, f"{self.base_url}{endpoint}",
+                params=params, headers=headers, timeout=self.timeout, **kwargs
+            )
+        except requests.exceptions.ConnectionError:
+            return None, "Could not connect to API. Is the server running?"
+        except requests.exceptions.Timeout:
+            return None, "The API did not respond in time"
+        except Exception as e:
+            return None, f"Error: {str(e)}"
+
+        if response.status_code == 304 and cached:
+            cached["at"] = time.monotonic()
+            return cached["data"], None
+        if response.status_code in (429, 503) and cached:
+            # Shed by the API: a slightly stale page beats an error
+            return cached["data"], None
+
+        if not response.headers.get("content-type", "").startswith("application/json"):
+            return None, f"Non-JSON response: {response.text[:100]}"
+
+        data = response.json()
+        if response.status_code not in [200, 201]:
+            return None, data.get("detail") or data.get("error", "Unknown error")
+
+        if method == "GET":
+            self._store(key, data, response.headers.get("etag"))
+        else:
+            self.invalidate(endpoint)
+        return data, None
+
+
+def client_from_env():
+    """Build an ApiClient configured from API_* environment variables."""
+    return ApiClient(
+        os.getenv("API_BASE_URL", "http://127.0.0.1:8000"),
+        pool_size=int(os.getenv("API_POOL_SIZE", "10")),
+        timeout=(float(os.getenv("API_CONNECT_TIMEOUT", "3.05")), float(os.getenv("API_READ_TIMEOUT", "30"))),
+        cache_ttl=float(os.getenv("API_CACHE_TTL", "5")),
+        cache_size=int(os.getenv("API_CACHE_SIZE", "256")),
+        client_id=os.getenv("API_CLIENT_ID", "streamlit"),
+        token=os.getenv("API_TOKEN"),
+    )
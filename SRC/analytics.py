@@ -0,0 +1,365 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import date, datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from SRC.cache import LRUCache
+from SRC.statuses import CLOSED_STATUSES, STATUS_CODES
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 5000
+MS_PER_DAY = 86_400_000
+DELIVERED = STATUS_CODES["Delivered"]
+DELAYED = STATUS_CODES["Delayed"]
+CLOSED_CODES = [STATUS_CODES[status] for status in CLOSED_STATUSES]
+QUANTILES = (0.5, 0.9, 0.95)
+EPOCH = date(1970, 1, 1).toordinal()
+
+INPUT_COLUMNS = ("id", "courier", "origin", "destination", "status", "expected_delivery")
+
+# Column name -> dtype; floats use NaN for "unknown"
+COLUMNS = {
+    "id": np.int64,
+    "courier": np.int32,
+    "origin": np.int32,
+    "destination": np.int32,
+    "status": np.int8,
+    "expected_day": np.float64,
+    "created_ms": np.float64,
+    "delivered_ms": np.float64,
+}
+
+
+class Vocabulary:
+    """Maps category values (couriers, cities) to stable integer codes."""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def _code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def encode(self, values):
+        """Return int32 codes for a Series of values; None becomes -1."""
+        local, uniques = pd.factorize(values)
+        mapping = np.fromiter((self._code(value) for value in uniques), dtype=np.int32, count=len(uniques))
+        # local is -1 for missing values, which picks the appended -1
+        return np.append(mapping, np.int32(-1))[local]
+
+    def categorical(self, codes):
+        return pd.Categorical.from_codes(codes, categories=pd.Index(self.values, dtype=object))
+
+
+def _epoch_days(values):
+    """Convert a Series of ISO date strings to days since 1970-01-01 (NaN if missing or malformed)."""
+    parsed = pd.to_datetime(values.astype(object).str.slice(0, 10), format="%Y-%m-%d", errors="coerce")
+    days = parsed.to_numpy(dtype="datetime64[D]").astype(np.float64)
+    days[parsed.isna().to_numpy()] = np.nan
+    return days
+
+
+def _today():
+    """Return today as days since 1970-01-01."""
+    return date.today().toordinal() - EPOCH
+
+
+def _records(frame):
+    """Turn a result frame into JSON-ready dicts (rounded floats, None for NaN)."""
+    frame = frame.round(3).astype(object)
+    return frame.where(frame.notna(), None).to_dict("records")
+
+
+class DeliveryAnalytics:
+    """Columnar, incrementally refreshed copy of packages and their status timeline.
+
+    Packages are held as NumPy arrays (courier, origin and destination as
+    categorical codes, dates as epoch days/ms) that grow in place as new rows
+    arrive. `refresh` only reads packages with ids above the last one seen
+    and history events after the last watermark; `rebuild` starts over,
+    picking up deletes and edits to fields other than status. Reports are
+    vectorized pandas group-bys, memoized until the data changes.
+    """
+
+    def __init__(self, event_lag=10.0, max_reports=256):
+        self.event_lag = event_lag
+        self.couriers = Vocabulary()
+        self.cities = Vocabulary()
+        self._columns = {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self._size = 0
+        self._max_id = 0
+        self._events_since = 0
+        self._events_seen = set()
+        self._lock = threading.Lock()
+        # Keyed by data version, so reports of older versions just age out
+        self._reports = LRUCache(maxsize=max_reports, ttl=float("inf"))
+        self.version = 0
+        self.loaded = False
+        self.refreshed_at = None
+
+    def __len__(self):
+        return self._size
+
+    # ----------------------------- Ingestion -----------------------------
+
+    def _reserve(self, extra):
+        capacity = len(self._columns["id"])
+        if self._size + extra <= capacity:
+            return
+        capacity = max(self._size + extra, capacity * 2, 1024)
+        for name, column in self._columns.items():
+            grown = np.full(capacity, np.nan, dtype=column.dtype) if column.dtype.kind == "f" else np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def add_packages(self, rows):
+        """Append a chunk of package rows (ascending ids above any already loaded)."""
+        frame = pd.DataFrame.from_records(rows, columns=INPUT_COLUMNS)
+        frame = frame[frame["id"] > self._max_id]
+        if frame.empty:
+            return
+        chunk = {
+            "id": frame["id"].to_numpy(dtype=np.int64),
+            "courier": self.couriers.encode(frame["courier"]),
+            "origin": self.cities.encode(frame["origin"]),
+            "destination": self.cities.encode(frame["destination"]),
+            "status": frame["status"].map(STATUS_CODES).fillna(-1).to_numpy(dtype=np.int8),
+            "expected_day": _epoch_days(frame["expected_delivery"]),
+        }
+        with self._lock:
+            self._reserve(len(frame))
+            end = self._size + len(frame)
+            for name, values in chunk.items():
+                self._columns[name][self._size:end] = values
+            self._size = end
+            self._max_id = int(chunk["id"][-1])
+            self.version += 1
+
+    def apply_events(self, events):
+        """Fold status-change events (oldest first) into current status, creation and delivery times."""
+        if not events:
+            return
+        package_ids = np.fromiter((event["package_id"] for event in events), dtype=np.int64, count=len(events))
+        codes = np.fromiter((event["status_code"] for event in events), dtype=np.int8, count=len(events))
+        changed_at = np.fromiter((event["changed_at"] for event in events), dtype=np.float64, count=len(events))
+        # Stable sort by package keeps each package's events in time order
+        order = np.argsort(package_ids, kind="stable")
+        package_ids, codes, changed_at = package_ids[order], codes[order], changed_at[order]
+        with self._lock:
+            ids = self._columns["id"][:self._size]
+            rows = np.searchsorted(ids, package_ids)
+            known = rows < self._size
+            known[known] = ids[rows[known]] == package_ids[known]
+            rows, codes, changed_at = rows[known], codes[known], changed_at[known]
+
+            np.fmin.at(self._columns["created_ms"], rows, changed_at)
+            delivered = codes == DELIVERED
+            np.fmin.at(self._columns["delivered_ms"], rows[delivered], changed_at[delivered])
+
+            # The last event of each package sets its current status
+            last = np.append(rows[1:] != rows[:-1], True)
+            self._columns["status"][rows[last]] = codes[last]
+            self.version += 1
+
+    def _fresh_events(self, events, since, seen):
+        """Drop events already applied (same ms as the watermark); return them and the watermark after `events`.
+
+        The watermark is only returned, not stored, so a refresh that fails
+        later reads the same events again next time.
+        """
+        fresh = [event for event in events if event["id"] not in seen]
+        if events:
+            last = events[-1]["changed_at"]
+            seen = (set(seen) if last == since else set()) | {event["id"] for event in events if event["changed_at"] == last}
+            since = last
+        return fresh, since, seen
+
+    def _events_until(self):
+        # Status changes are buffered before they are written; leave them time to land
+        return int((time.time() - self.event_lag) * 1000)
+
+    def _refreshed(self, packages, events):
+        self.loaded = True
+        self.refreshed_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        if packages or events:
+            logger.info("Analytics refreshed: %s new packages, %s status events (%s total)", packages, events, self._size)
+
+    def refresh(self, db):
+        """Load packages and status events added since the last refresh; return False on failure."""
+        # Events are read first: every package they mention was stored before them
+        until, events = self._events_until(), []
+        since, seen = self._events_since, self._events_seen
+        while True:
+            page = db.get_history_between(since, until, PAGE_SIZE)
+            if not page.get("success"):
+                return False
+            fresh, since, seen = self._fresh_events(page["data"], since, seen)
+            events.extend(fresh)
+            if len(page["data"]) < PAGE_SIZE or not fresh:
+                break
+
+        added = 0
+        while True:
+            page = db.scan_packages(after=self._max_id, limit=PAGE_SIZE)
+            if not page.get("success"):
+                return False
+            self.add_packages(page["data"])
+            added += len(page["data"])
+            if len(page["data"]) < PAGE_SIZE:
+                break
+
+        self.apply_events(events)
+        self._events_since, self._events_seen = since, seen
+        self._refreshed(added, len(events))
+        return True
+
+    async def refresh_async(self, db):
+        """Like `refresh` with an AsyncDatabaseManager; array work runs off the event loop."""
+        until, events = self._events_until(), []
+        since, seen = self._events_since, self._events_seen
+        while True:
+            page = await db.get_history_between(since, until, PAGE_SIZE)
+            if not page.get("success"):
+                return False
+            fresh, since, seen = self._fresh_events(page["data"], since, seen)
+            events.extend(fresh)
+            if len(page["data"]) < PAGE_SIZE or not fresh:
+                break
+
+        added = 0
+        while True:
+            page = await db.scan_packages(after=self._max_id, limit=PAGE_SIZE)
+            if not page.get("success"):
+                return False
+            await asyncio.to_thread(self.add_packages, page["data"])
+            added += len(page["data"])
+            if len(page["data"]) < PAGE_SIZE:
+                break
+
+        await asyncio.to_thread(self.apply_events, events)
+        self._events_since, self._events_seen = since, seen
+        self._refreshed(added, len(events))
+        return True
+
+    # ----------------------------- Reports -----------------------------
+
+    def _frame(self):
+        """Return one row per package with derived delivery columns."""
+        with self._lock:
+            n = self._size
+            columns = {name: column[:n].copy() for name, column in self._columns.items()}
+            couriers = self.couriers.categorical(columns["courier"])
+            origins = self.cities.categorical(columns["origin"])
+            destinations = self.cities.categorical(columns["destination"])
+
+        delivered_day = np.floor(columns["delivered_ms"] / MS_PER_DAY)
+        late_days = delivered_day - columns["expected_day"]
+        return pd.DataFrame({
+            "courier": couriers,
+            "origin": origins,
+            "destination": destinations,
+            "open": ~np.isin(columns["status"], CLOSED_CODES),
+            "delayed": columns["status"] == DELAYED,
+            "delivered": columns["status"] == DELIVERED,
+            "timed": ~np.isnan(late_days),
+            "on_time": late_days <= 0,
+            "late_days": late_days,
+            "transit_hours": (columns["delivered_ms"] - columns["created_ms"]) / 3_600_000,
+            "created_day": np.floor(columns["created_ms"] / MS_PER_DAY),
+            "delivered_day": delivered_day,
+        })
+
+    def _performance(self, frame, keys, window_days):
+        """Volume, on-time rate, lateness percentiles and recent throughput per group."""
+        recent = frame["delivered_day"] >= _today() - window_days
+        grouped = frame.assign(recent=recent).groupby(keys, observed=True)
+        stats = grouped.agg(
+            packages=("open", "size"),
+            open=("open", "sum"),
+            delayed=("delayed", "sum"),
+            delivered=("delivered", "sum"),
+            timed=("timed", "sum"),
+            on_time=("on_time", "sum"),
+            transit_hours_mean=("transit_hours", "mean"),
+            recent=("recent", "sum"),
+        )
+        stats["on_time_rate"] = stats["on_time"] / stats["timed"].where(stats["timed"] > 0)
+        stats["deliveries_per_day"] = stats.pop("recent") / window_days
+
+        timed = frame[frame["timed"]]
+        if len(timed):
+            late = timed.groupby(keys, observed=True)["late_days"].quantile(list(QUANTILES)).unstack()
+            late.columns = [f"late_days_p{round(q * 100)}" for q in QUANTILES]
+            transit = timed.groupby(keys, observed=True)["transit_hours"].median().rename("transit_hours_p50")
+            stats = stats.join(late).join(transit)
+        return stats.sort_values("packages", ascending=False).reset_index()
+
+    def _memoized(self, key, build):
+        key = (self.version,) + key
+        result = self._reports.get(key)
+        if result is None:
+            result = {"success": True, "data": build(), "refreshed_at": self.refreshed_at}
+            self._reports.set(key, result)
+        return result
+
+    def _not_loaded(self):
+        return {"success": False, "error": "Analytics are not available yet"}
+
+    def summary(self, window_days=30):
+        """Totals across all packages: volume, on-time rate, lateness percentiles, throughput."""
+        if not self.loaded:
+            return self._not_loaded()
+
+        def build():
+            frame = self._frame()
+            records = _records(self._performance(frame.assign(all=0), ["all"], window_days).drop(columns="all"))
+            return records[0] if records else {"packages": 0}
+
+        return self._memoized(("summary", window_days), build)
+
+    def by_courier(self, window_days=30):
+        """Per-courier performance, busiest first."""
+        if not self.loaded:
+            return self._not_loaded()
+        return self._memoized(("courier", window_days),
+                              lambda: _records(self._performance(self._frame(), ["courier"], window_days)))
+
+    def by_lane(self, limit=50, window_days=30):
+        """Per origin/destination lane performance for the `limit` busiest lanes."""
+        if not self.loaded:
+            return self._not_loaded()
+        return self._memoized(
+            ("lane", limit, window_days),
+            lambda: _records(self._performance(self._frame(), ["origin", "destination"], window_days).head(limit)),
+        )
+
+    def daily(self, days=30, courier=None):
+        """Packages created and delivered per day (UTC) over the last `days`, with on-time rate."""
+        if not self.loaded:
+            return self._not_loaded()
+
+        def build():
+            frame = self._frame()
+            if courier:
+                frame = frame[frame["courier"] == courier]
+            first = _today() - days + 1
+            created = frame.loc[frame["created_day"] >= first].groupby("created_day").size().rename("created")
+            delivered = frame.loc[frame["delivered_day"] >= first].groupby("delivered_day").agg(
+                delivered=("timed", "size"), on_time=("on_time", "sum"))
+            daily = pd.DataFrame(index=pd.RangeIndex(first, first + days, name="day"))
+            daily = daily.join(created).join(delivered).fillna(0)
+            daily["on_time_rate"] = daily["on_time"] / daily["delivered"].where(daily["delivered"] > 0)
+            daily = daily.reset_index()
+            daily["day"] = pd.to_datetime(daily["day"], unit="D").dt.strftime("%Y-%m-%d")
+            return _records(daily.astype({"created": int, "delivered": int, "on_time": int}))
+
+        return self._memoized(("daily", days, courier), build)
@@ -0,0 +1,62 @@
+import codecs
+import csv
+import json
+
+BULK_FORMATS = ("csv", "ndjson")
+
+
+class BulkRowParser:
+    """Incrementally turn a byte stream of CSV or NDJSON into package rows.
+
+    Feed raw body chunks as they arrive; every complete line is parsed and
+    returned as a (row_number, row, error) tuple so callers can validate and
+    insert in chunks without holding the whole upload in memory. CSV input
+    must start with a header line naming the package columns.
+    """
+
+    def __init__(self, fmt):
+        if fmt not in BULK_FORMATS:
+            raise ValueError(f"Unsupported bulk format: {fmt}")
+        self.fmt = fmt
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._header = None
+        self._row_number = 0
+
+    def feed(self, chunk):
+        """Consume a chunk of the body and return the rows it completed."""
+        if isinstance(chunk, bytes):
+            chunk = self._decoder.decode(chunk)
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split("\n")
+        return [parsed for parsed in map(self._parse_line, lines) if parsed]
+
+    def close(self):
+        """Parse whatever is left after the last newline."""
+        remainder, self._buffer = self._buffer + self._decoder.decode(b"", final=True), ""
+        parsed = self._parse_line(remainder)
+        return [parsed] if parsed else []
+
+    def _parse_line(self, line):
+        line = line.strip("\r\ufeff")
+        if not line.strip():
+            return None
+
+        if self.fmt == "csv":
+            values = next(csv.reader([line]))
+            if self._header is None:
+                self._header = [name.strip() for name in values]
+                return None
+            self._row_number += 1
+            if len(values) != len(self._header):
+                return self._row_number, None, f"Expected {len(self._header)} columns, got {len(values)}"
+            return self._row_number, dict(zip(self._header, values)), None
+
+        self._row_number += 1
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            return self._row_number, None, f"Invalid JSON: {e}"
+        if not isinstance(row, dict):
+            return self._row_number, None, "Each line must be a JSON object"
+        return self._row_number, row, None
@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Bounded mapping with least-recently-used eviction and a per-entry TTL.
+
+    Safe to share between request threads. Entries may carry tags so that
+    everything tagged with one value can be dropped without scanning the
+    whole cache. Hit, miss and eviction counters are kept for monitoring.
+    """
+
+    def __init__(self, maxsize=1024, ttl=30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tagged = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Return the cached value, or `default` if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value, _ = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._drop(key)
+            self.misses += 1
+            return default
+
+    def set(self, key, value, tags=()):
+        """Store a value under `tags`, evicting the least recently used entry if full."""
+        tags = frozenset(tags)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+            for tag in tags:
+                self._tagged.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tagged.get(tag)
+            keys.discard(key)
+            if not keys:
+                del self._tagged[tag]
+
+    def invalidate(self, key):
+        """Drop a single entry if present."""
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+
+    def invalidate_tag(self, tag):
+        """Drop every entry stored with `tag`."""
+        with self._lock:
+            for key in list(self._tagged.get(tag, ())):
+                self._drop(key)
+
+    def invalidate_where(self, predicate, tag=None):
+        """Drop every entry (only those stored with `tag`, when given) for which predicate(key, value) is true."""
+        with self._lock:
+            keys = list(self._tagged.get(tag, ())) if tag is not None else list(self._entries)
+            for key in keys:
+                if predicate(key, self._entries[key][1]):
+                    self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tagged.clear()
+
+    def stats(self):
+        """Return size and hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
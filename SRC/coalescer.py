@@ -0,0 +1,131 @@
+import asyncio
+
+
+class WriteCoalescer:
+    """Group concurrent writes into micro-batches handled by one call each.
+
+    Callers `await submit(item)` and get back their own result. Items are
+    collected until the batch holds `max_batch` items or `max_wait` seconds
+    have passed; when no batch is in flight the wait is cut to a single
+    event-loop turn, so an idle service adds almost no latency and a busy
+    one sends fewer, larger statements.
+
+    `flush(items)` must return one entry per item, in order. An entry that
+    is an exception instance is raised to that caller only. If `flush`
+    itself raises, the batch is retried one item per call so only the
+    callers whose items fail get the error, unless the exception is one of
+    `shared_errors` (say, the backend is down), which every caller gets.
+    Callers still waiting when the batch task ends any other way are
+    cancelled rather than left hanging.
+    """
+
+    def __init__(self, flush, max_batch=100, max_wait=0.002, shared_errors=()):
+        self.flush = flush
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.shared_errors = shared_errors
+        self._pending = []
+        self._keys = set()
+        self._busy = {}
+        self._timer = None
+        self._in_flight = 0
+        self._tasks = set()
+        self.batches = 0
+        self.items = 0
+        self.splits = 0
+
+    async def submit(self, item, key=None):
+        """Queue one write and wait for its result.
+
+        An item whose `key` is already queued or being written waits for that
+        batch to finish first, so writes to the same row keep arrival order.
+        """
+        while key is not None and (key in self._keys or key in self._busy):
+            if key in self._keys:
+                self._send()
+            else:
+                await asyncio.shield(self._busy[key])
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if key is not None:
+            self._keys.add(key)
+
+        if len(self._pending) >= self.max_batch:
+            self._send()
+        elif self._timer is None:
+            loop = asyncio.get_running_loop()
+            if self._in_flight:
+                self._timer = loop.call_later(self.max_wait, self._send)
+            else:
+                self._timer = loop.call_soon(self._send)
+        return await future
+
+    def _send(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, keys = self._pending, self._keys
+        self._pending, self._keys = [], set()
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        for key in keys:
+            self._busy[key] = done
+        self._in_flight += 1
+        task = loop.create_task(self._run(batch, keys, done))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch, keys, done):
+        try:
+            items = [item for item, _ in batch]
+            try:
+                results = await self.flush(items)
+            except self.shared_errors as e:
+                results = [e] * len(batch)
+            except Exception:
+                if len(batch) == 1:
+                    raise
+                self.splits += 1
+                results = await asyncio.gather(*(self._flush_one(item) for item in items))
+            self.batches += 1
+            self.items += len(batch)
+
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            for _, future in batch:
+                if not future.done():
+                    future.cancel()
+            self._in_flight -= 1
+            for key in keys:
+                if self._busy.get(key) is done:
+                    del self._busy[key]
+            done.set_result(None)
+
+    async def _flush_one(self, item):
+        """Flush a single item of a failed batch; return its result or exception."""
+        try:
+            return (await self.flush([item]))[0]
+        except Exception as e:
+            return e
+
+    def stats(self):
+        """Return batch and item counts since startup."""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch": self.items / self.batches if self.batches else 0.0,
+            "splits": self.splits,
+            "pending": len(self._pending),
+        }
@@ -0,0 +1,141 @@
+import abc
+import asyncio
+import logging
+import os
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Courier status codes (as served by BENCH/fake_courier.py) mapped to ours
+DEFAULT_STATUS_MAP = {
+    "MP": "Pending",
+    "IT": "In Transit",
+    "OD": "Out for Delivery",
+    "DL": "Delivered",
+    "EX": "Delayed",
+    "RT": "Cancelled",
+}
+
+# rate (requests/s) / batch size / requests in flight; COURIER_LIMITS overrides per courier
+DEFAULT_LIMITS = "10/100/4"
+
+
+class RateLimited(Exception):
+    """The courier refused a request for exceeding its rate limit."""
+
+    def __init__(self, retry_after=1.0):
+        super().__init__(f"Rate limited, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class RateLimit:
+    """Spaces requests to one courier at most `rate` per second.
+
+    Each caller reserves the next free slot and sleeps until it comes up,
+    so concurrent workers share the budget without a lock. A courier's
+    429 pushes every later slot back by its Retry-After.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = 0.0
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def pause(self, seconds):
+        now = asyncio.get_running_loop().time()
+        self._next = max(self._next, now + seconds)
+
+
+class CourierAdapter(abc.ABC):
+    """Looks up current statuses for batches of tracking numbers at one courier.
+
+    Subclasses implement `fetch()`. `batch_size` numbers go in each request,
+    at most `rate` requests per second with `concurrency` in flight.
+    """
+
+    def __init__(self, name, rate=10.0, batch_size=100, concurrency=4):
+        self.name = name
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.limit = RateLimit(rate)
+
+    @abc.abstractmethod
+    async def fetch(self, tracking_numbers):
+        """Return {tracking_number: status} for the numbers the courier knows; raise RateLimited on 429."""
+
+    async def close(self):
+        pass
+
+
+class HttpCourierAdapter(CourierAdapter):
+    """Adapter for a JSON tracking API.
+
+    Sends POST {base_url}/track with {"tracking_numbers": [...]} and reads
+    {"results": [{"tracking_number": ..., "status": <code>}, ...]}; codes
+    missing from `status_map` are ignored.
+    """
+
+    def __init__(self, name, base_url, status_map=None, timeout=10.0, **limits):
+        super().__init__(name, **limits)
+        self.status_map = status_map or DEFAULT_STATUS_MAP
+        self._client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=self.concurrency),
+        )
+
+    async def fetch(self, tracking_numbers):
+        response = await self._client.post("/track", json={"tracking_numbers": list(tracking_numbers)})
+        if response.status_code == 429:
+            raise RateLimited(float(response.headers.get("retry-after", "1")))
+        if response.is_error:
+            raise httpx.HTTPStatusError(f"{response.status_code} from {response.url}",
+                                        request=response.request, response=response)
+        statuses = {}
+        for result in response.json()["results"]:
+            status = self.status_map.get(result.get("status"))
+            if status is not None:
+                statuses[result["tracking_number"]] = status
+        return statuses
+
+    async def close(self):
+        await self._client.aclose()
+
+
+def parse_couriers(spec):
+    """Parse "UPS=http://host/ups,FedEx=20/50/8" into {"UPS": "http://host/ups", "FedEx": "20/50/8"}."""
+    values = {}
+    for item in spec.split(","):
+        name, _, value = item.partition("=")
+        if name.strip():
+            values[name.strip()] = value.strip()
+    return values
+
+
+def parse_limits(spec):
+    """Parse "10/100/4" into {"rate": 10.0, "batch_size": 100, "concurrency": 4}."""
+    rate, batch_size, concurrency = spec.split("/")
+    return {"rate": float(rate), "batch_size": int(batch_size), "concurrency": int(concurrency)}
+
+
+def adapters_from_env():
+    """Build one HttpCourierAdapter per COURIER_ENDPOINTS entry, limited by COURIER_LIMITS."""
+    default = parse_limits(os.getenv("COURIER_DEFAULT_LIMITS", DEFAULT_LIMITS))
+    overrides = {name.lower(): parse_limits(spec)
+                 for name, spec in parse_couriers(os.getenv("COURIER_LIMITS", "")).items()}
+    timeout = float(os.getenv("COURIER_TIMEOUT_SECONDS", "10"))
+    adapters = []
+    for name, url in parse_couriers(os.getenv("COURIER_ENDPOINTS", "")).items():
+        limits = overrides.get(name.lower(), default)
+        adapters.append(HttpCourierAdapter(name, url, timeout=timeout, **limits))
+        logger.info("Polling %s at %s (%s)", name, url, limits)
+    return adapters
@@ -0,0 +1,39 @@
+import base64
+import json
+
+
+def encode_cursor(last_id, rank=None):
+    """Build an opaque pagination cursor from the last row id (and rank) of a page."""
+    position = {"id": last_id} if rank is None else {"id": last_id, "rank": rank}
+    payload = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def _decode_position(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded))
+        last_id = position["id"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(last_id, int) or not isinstance(position.get("rank", 0), int):
+        raise ValueError("Invalid cursor")
+    return position
+
+
+def decode_cursor(cursor):
+    """Return the row id stored in a cursor; raise ValueError if it is malformed."""
+    return _decode_position(cursor)["id"]
+
+
+def decode_ranked_cursor(cursor):
+    """Return the (rank, id) stored in a search cursor; rank is None for plain id cursors."""
+    position = _decode_position(cursor)
+    return position.get("rank"), position["id"]
+
+
+def next_cursor(rows, limit):
+    """Return the cursor for the page after `rows`, or None on the last page."""
+    if len(rows) < limit or not rows:
+        return None
+    return encode_cursor(rows[-1]["id"])
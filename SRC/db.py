@@ -1,134 +1,556 @@
-import os
-from supabase import create_client, Client
 from dotenv import load_dotenv
 from datetime import date
+import asyncio
 import logging
+import os
+
+from SRC.storage import get_storage, get_async_storage
+from SRC.cursors import next_cursor
+from SRC.coalescer import WriteCoalescer
+from SRC.metrics import Counter, Histogram, timed_methods
+from SRC.logging_config import configure_logging
+from SRC.resilience import BackendUnavailable, ResilientStorage
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+def _previous_statuses(rows, previous):
+    """Map each updated row's id to its status before the update (unchanged if status was not updated)."""
+    return {row["id"]: previous.get(row["id"], row["status"]) for row in rows}
+
+DB_CALL_SECONDS = Histogram("db_call_seconds", "DatabaseManager call latency in seconds.", ("method",))
+DB_CALL_ERRORS = Counter("db_call_errors_total", "DatabaseManager calls that failed with a backend error.", ("method",))
+
+# Only the calls that reach the backend; stats helpers and connect/close would skew the latencies
+DB_CALLS = (
+    "create_package", "create_packages", "find_existing_tracking_numbers", "tracking_number_exists",
+    "get_all_tracking_numbers", "get_packages", "get_package_by_id", "get_packages_by_ids", "scan_packages",
+    "search_packages", "update_package", "append_history", "get_package_history", "get_history_between",
+    "update_packages", "update_overdue_packages", "delete_package",
+)
+
+@timed_methods(DB_CALL_SECONDS, DB_CALL_ERRORS, DB_CALLS)
 class DatabaseManager:
-    """Manages all database operations with Supabase."""
+    """Manages all database operations through the configured storage backend."""
     
-    def __init__(self):
+    def __init__(self, storage=None):
         load_dotenv()
-        url = os.getenv("SUPABASE_URL")
-        key = os.getenv("SUPABASE_KEY")
-        
-        if not url or not key:
-            raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment variables")
-        
-        self.supabase: Client = create_client(url, key)
+        self.storage = storage or get_storage()
         logger.info("Database connection established")
 
-    def create_package(self, tracking_number, courier, status, expected_delivery, origin, destination, notes=None):
+    def create_package(self, tracking_number, courier, status, expected_delivery, origin, destination, notes=None, owner=None):
         """Create a new package in the database."""
         try:
             if isinstance(expected_delivery, date):
                 expected_delivery = expected_delivery.isoformat()
             
-            response = self.supabase.table("packages").insert({
+            rows = self.storage.insert({
                 "tracking_number": tracking_number,
                 "courier": courier,
                 "status": status,
                 "expected_delivery": expected_delivery,
                 "origin": origin,
                 "destination": destination,
-                "notes": notes
-            }).execute()
+                "notes": notes,
+                "owner": owner
+            })
+            
+            logger.info("Package created: %s", tracking_number)
+            return {"success": True, "data": rows[0]}
+        except Exception as e:
+            logger.error("Error creating package: %s", e)
+            return {"success": False, "error": str(e)}
+
+    def create_packages(self, rows):
+        """Create several packages with a single multi-row insert."""
+        try:
+            for row in rows:
+                if isinstance(row.get("expected_delivery"), date):
+                    row["expected_delivery"] = row["expected_delivery"].isoformat()
             
-            logger.info(f"Package created: {tracking_number}")
-            return {"success": True, "data": response.data[0]}
+            created = self.storage.insert(rows)
+            logger.info("Packages created: %s", len(created))
+            return {"success": True, "data": created}
+        except Exception as e:
+            logger.error("Error creating packages: %s", e)
+            return {"success": False, "error": str(e)}
+
+    def find_existing_tracking_numbers(self, tracking_numbers):
+        """Return which of the given tracking numbers already exist (exact match)."""
+        try:
+            existing = self.storage.existing_tracking_numbers(tracking_numbers)
+            return {"success": True, "data": existing}
+        except Exception as e:
+            logger.error("Error checking tracking numbers: %s", e)
+            return {"success": False, "error": str(e)}
+
+    def tracking_number_exists(self, tracking_number):
+        """Check whether a package with exactly this tracking number exists."""
+        result = self.find_existing_tracking_numbers([tracking_number])
+        if not result.get("success"):
+            return result
+        return {"success": True, "data": tracking_number in result["data"]}
+
+    def get_all_tracking_numbers(self):
+        """Retrieve every stored tracking number (used to warm in-memory indexes)."""
+        try:
+            return {"success": True, "data": self.storage.all_tracking_numbers()}
         except Exception as e:
-            logger.error(f"Error creating package: {str(e)}")
+            logger.error("Error fetching tracking numbers: %s", e)
             return {"success": False, "error": str(e)}
 
-    def get_packages(self, limit=100, offset=0):
-        """Retrieve all packages with optional pagination."""
+    def get_packages(self, limit=100, offset=0, after=None, owner=None):
+        """Retrieve all packages (or one owner's), newest first.
+
+        Pass the id of the last row seen as `after` for keyset pagination;
+        `offset` is still honoured for older clients.
+        """
         try:
-            response = (
-                self.supabase.table("packages")
-                .select("*")
-                .order("id", desc=True)
-                .limit(limit)
-                .offset(offset)
-                .execute()
-            )
-            return {"success": True, "data": response.data}
+            rows = self.storage.list(limit, offset, after, owner)
+            return {"success": True, "data": rows, "next_cursor": next_cursor(rows, limit)}
         except Exception as e:
-            logger.error(f"Error fetching packages: {str(e)}")
+            logger.error("Error fetching packages: %s", e)
             return {"success": False, "error": str(e)}
 
     def get_package_by_id(self, id):
         """Retrieve a single package by ID."""
         try:
-            response = (
-                self.supabase.table("packages")
-                .select("*")
-                .eq("id", id)
-                .execute()
-            )
-            if response.data:
-                return {"success": True, "data": response.data[0]}
+            row = self.storage.get(id)
+            if row:
+                return {"success": True, "data": row}
             return {"success": False, "error": "Package not found"}
         except Exception as e:
-            logger.error(f"Error fetching package {id}: {str(e)}")
+            logger.error("Error fetching package %s: %s", id, e)
+            return {"success": False, "error": str(e)}
+
+    def get_packages_by_ids(self, ids):
+        """Retrieve several packages in one query, in the order of `ids`."""
+        try:
+            rows = self.storage.get_many(ids)
+            return {"success": True, "data": rows}
+        except Exception as e:
+            logger.error("Error fetching packages by id: %s", e)
+            return {"success": False, "error": str(e)}
+
+    def scan_packages(self, after=0, limit=1000):
+        """Retrieve up to `limit` packages with id above `after`, oldest first."""
+        try:
+            rows = self.storage.scan(after, limit)
+            return {"success": True, "data": rows}
+        except Exception as e:
+            logger.error("Error scanning packages: %s", e)
+            return {"success": False, "error": str(e)}
+
+    def search_packages(self, tracking_number=None, courier=None, status=None, destination=None, limit=None, after=None, owner=None):
+        """Search packages by various criteria, newest first (keyset via `after`)."""
+        try:
+            rows = self.storage.search(tracking_number, courier, status, destination, limit, after, owner)
+            return {"success": True, "data": rows, "next_cursor": next_cursor(rows, limit) if limit else None}
+        except Exception as e:
+            logger.error("Error searching packages: %s", e)
             return {"success": False, "error": str(e)}
 
-    def search_packages(self, tracking_number=None, courier=None, status=None):
-        """Search packages by various criteria."""
+    def update_package(self, id, updates, owner=None):
+        """Update an existing package (only if it belongs to `owner`, when given).
+
+        The result's `previous_status` is the status stored before the update.
+        """
+        try:
+            if "expected_delivery" in updates and isinstance(updates["expected_delivery"], date):
+                updates["expected_delivery"] = updates["expected_delivery"].isoformat()
+            
+            previous = self.storage.statuses([id]) if "status" in updates else {}
+            row = self.storage.update(id, updates, owner)
+            
+            if row:
+                logger.info("Package %s updated", id)
+                return {"success": True, "data": row, "previous_status": previous.get(id, row["status"])}
+            return {"success": False, "error": "Package not found"}
+        except Exception as e:
+            logger.error("Error updating package %s: %s", id, e)
+            return {"success": False, "error": str(e)}
+
+    def append_history(self, events):
+        """Append a batch of status-change events to the history log."""
+        try:
+            self.storage.insert_history(events)
+            return {"success": True}
+        except Exception as e:
+            logger.error("Error writing package history: %s", e)
+            return {"success": False, "error": str(e)}
+
+    def get_package_history(self, package_id):
+        """Retrieve the status-change events of one package, oldest first."""
+        try:
+            return {"success": True, "data": self.storage.package_history(package_id)}
+        except Exception as e:
+            logger.error("Error fetching history for package %s: %s", package_id, e)
+            return {"success": False, "error": str(e)}
+
+    def get_history_between(self, since, until, limit=1000, owner=None):
+        """Retrieve status-change events (of all packages or one owner's) in [since, until) (epoch milliseconds)."""
+        try:
+            return {"success": True, "data": self.storage.history_between(since, until, limit, owner)}
+        except Exception as e:
+            logger.error("Error fetching package history: %s", e)
+            return {"success": False, "error": str(e)}
+
+    def update_packages(self, updates, ids=None, tracking_numbers=None, owner=None, expected_status=None):
+        """Apply one update to many packages (selected by id or tracking number) in a single statement.
+
+        With `expected_status`, only packages still in that status are updated.
+        The result's `previous_statuses` maps each updated id to its status before the update.
+        """
+        try:
+            if "expected_delivery" in updates and isinstance(updates["expected_delivery"], date):
+                updates["expected_delivery"] = updates["expected_delivery"].isoformat()
+            
+            if expected_status is not None:
+                # The filter already pins the previous status, so there is nothing to read
+                rows = self.storage.update_many(updates, ids, tracking_numbers, owner, expected_status)
+                previous = {row["id"]: expected_status for row in rows}
+            else:
+                previous = self.storage.statuses(ids, tracking_numbers) if "status" in updates else {}
+                rows = self.storage.update_many(updates, ids, tracking_numbers, owner)
+            logger.info("Packages updated: %s", len(rows))
+            return {"success": True, "data": rows, "previous_statuses": _previous_statuses(rows, previous)}
+        except Exception as e:
+            logger.error("Error updating packages: %s", e)
+            return {"success": False, "error": str(e)}
+
+    def update_overdue_packages(self, updates, ids, before, skip_statuses):
+        """Apply one update to the given packages that are still due before `before` and not in `skip_statuses`."""
+        try:
+            previous = self.storage.statuses(ids)
+            rows = self.storage.update_overdue(updates, ids, before, skip_statuses)
+            logger.info("Overdue packages updated: %s", len(rows))
+            return {"success": True, "data": rows, "previous_statuses": _previous_statuses(rows, previous)}
+        except Exception as e:
+            logger.error("Error updating overdue packages: %s", e)
+            return {"success": False, "error": str(e)}
+
+    def delete_package(self, id, owner=None):
+        """Delete a package by ID (only if it belongs to `owner`, when given)."""
+        try:
+            deleted = self.storage.delete(id, owner)
+            
+            if deleted:
+                logger.info("Package %s deleted", id)
+                return {"success": True, "data": deleted, "message": f"Package {id} deleted"}
+            return {"success": False, "error": "Package not found"}
+        except Exception as e:
+            logger.error("Error deleting package %s: %s", id, e)
+            return {"success": False, "error": str(e)}
+
+
+@timed_methods(DB_CALL_SECONDS, DB_CALL_ERRORS, DB_CALLS)
+class AsyncDatabaseManager:
+    """Non-blocking counterpart of DatabaseManager for use from async endpoints.
+
+    Same methods and result shapes as DatabaseManager, as coroutines. Call
+    `connect()` once before use (e.g. at application startup); the backend
+    client and its connection pool are shared by every request.
+    """
+
+    def __init__(self, storage=None):
+        load_dotenv()
+        self.storage = storage or get_async_storage()
+        if os.getenv("DB_RESILIENCE", "true").lower() == "true":
+            self.storage = ResilientStorage(self.storage)
+        self.creates = self.updates = None
+        if os.getenv("WRITE_COALESCE", "false").lower() == "true":
+            max_batch = int(os.getenv("WRITE_BATCH_SIZE", "100"))
+            max_wait = float(os.getenv("WRITE_MAX_WAIT_MS", "2")) / 1000
+            self.creates = WriteCoalescer(self._insert_batch, max_batch, max_wait, shared_errors=(BackendUnavailable,))
+            self.updates = WriteCoalescer(self._update_batch, max_batch, max_wait, shared_errors=(BackendUnavailable,))
+
+    async def _insert_batch(self, rows):
+        """Insert coalesced creates in one statement; report duplicates per row."""
+        inserted = {row["tracking_number"]: row for row in await self.storage.insert_new(rows)}
+        return [inserted.get(row["tracking_number"]) or ValueError("Tracking number already exists")
+                for row in rows]
+
+    async def _update_group(self, updates, ids, owner):
+        """Apply one coalesced update; return (rows, previous statuses by id)."""
+        previous = await self.storage.statuses(ids) if "status" in updates else {}
+        return await self.storage.update_many(updates, ids, owner=owner), previous
+
+    async def _update_batch(self, items):
+        """Apply coalesced (id, updates, owner) items with one statement per distinct update and owner.
+
+        Each item gets back (row or None, {id: previous status}).
+        """
+        groups = {}
+        for id, updates, owner in items:
+            groups.setdefault((tuple(sorted(updates.items())), owner), []).append(id)
+        results = await asyncio.gather(
+            *(self._update_group(dict(updates), ids, owner) for (updates, owner), ids in groups.items()),
+            return_exceptions=True
+        )
+
+        by_id = {}
+        for (_, ids), result in zip(groups.items(), results):
+            if isinstance(result, Exception):
+                by_id.update((id, result) for id in ids)
+            else:
+                rows, previous = result
+                by_id.update((row["id"], (row, previous)) for row in rows)
+        return [by_id.get(id, (None, {})) for id, _, _ in items]
+
+    def coalescing_stats(self):
+        """Return batch counts for the create and update coalescers (empty if disabled)."""
+        if self.creates is None:
+            return {}
+        return {"creates": self.creates.stats(), "updates": self.updates.stats()}
+
+    def resilience_stats(self):
+        """Return circuit breaker state and hedge delays (empty if DB_RESILIENCE is off)."""
+        if not isinstance(self.storage, ResilientStorage):
+            return {}
+        return self.storage.stats()
+
+    async def connect(self):
+        await self.storage.connect()
+        logger.info("Database connection established (async)")
+
+    async def close(self):
+        await self.storage.close()
+
+    async def create_package(self, tracking_number, courier, status, expected_delivery, origin, destination, notes=None, owner=None):
+        """Create a new package in the database."""
         try:
-            query = self.supabase.table("packages").select("*")
+            if isinstance(expected_delivery, date):
+                expected_delivery = expected_delivery.isoformat()
+            
+            row = {
+                "tracking_number": tracking_number,
+                "courier": courier,
+                "status": status,
+                "expected_delivery": expected_delivery,
+                "origin": origin,
+                "destination": destination,
+                "notes": notes,
+                "owner": owner
+            }
+            if self.creates:
+                created = await self.creates.submit(row, key=tracking_number)
+            else:
+                created = (await self.storage.insert(row))[0]
             
-            if tracking_number:
-                query = query.ilike("tracking_number", f"%{tracking_number}%")
-            if courier:
-                query = query.ilike("courier", f"%{courier}%")
-            if status:
-                query = query.eq("status", status)
+            logger.info("Package created: %s", tracking_number)
+            return {"success": True, "data": created}
+        except BackendUnavailable:
+            raise
+        except Exception as e:
+            logger.error("Error creating package: %s", e)
+            return {"success": False, "error": str(e)}
+
+    async def create_packages(self, rows):
+        """Create several packages with a single multi-row insert."""
+        try:
+            for row in rows:
+                if isinstance(row.get("expected_delivery"), date):
+                    row["expected_delivery"] = row["expected_delivery"].isoformat()
             
-            response = query.order("id", desc=True).execute()
-            return {"success": True, "data": response.data}
+            created = await self.storage.insert(rows)
+            logger.info("Packages created: %s", len(created))
+            return {"success": True, "data": created}
+        except BackendUnavailable:
+            raise
+        except Exception as e:
+            logger.error("Error creating packages: %s", e)
+            return {"success": False, "error": str(e)}
+
+    async def find_existing_tracking_numbers(self, tracking_numbers):
+        """Return which of the given tracking numbers already exist (exact match)."""
+        try:
+            existing = await self.storage.existing_tracking_numbers(tracking_numbers)
+            return {"success": True, "data": existing}
+        except BackendUnavailable:
+            raise
+        except Exception as e:
+            logger.error("Error checking tracking numbers: %s", e)
+            return {"success": False, "error": str(e)}
+
+    async def tracking_number_exists(self, tracking_number):
+        """Check whether a package with exactly this tracking number exists."""
+        result = await self.find_existing_tracking_numbers([tracking_number])
+        if not result.get("success"):
+            return result
+        return {"success": True, "data": tracking_number in result["data"]}
+
+    async def get_all_tracking_numbers(self):
+        """Retrieve every stored tracking number (used to warm in-memory indexes)."""
+        try:
+            return {"success": True, "data": await self.storage.all_tracking_numbers()}
+        except BackendUnavailable:
+            raise
+        except Exception as e:
+            logger.error("Error fetching tracking numbers: %s", e)
+            return {"success": False, "error": str(e)}
+
+    async def get_packages(self, limit=100, offset=0, after=None, owner=None):
+        """Retrieve all packages (or one owner's), newest first (keyset via `after`, or offset)."""
+        try:
+            rows = await self.storage.list(limit, offset, after, owner)
+            return {"success": True, "data": rows, "next_cursor": next_cursor(rows, limit)}
+        except BackendUnavailable:
+            raise
         except Exception as e:
-            logger.error(f"Error searching packages: {str(e)}")
+            logger.error("Error fetching packages: %s", e)
             return {"success": False, "error": str(e)}
 
-    def update_package(self, id, updates):
-        """Update an existing package."""
+    async def get_package_by_id(self, id):
+        """Retrieve a single package by ID."""
+        try:
+            row = await self.storage.get(id)
+            if row:
+                return {"success": True, "data": row}
+            return {"success": False, "error": "Package not found"}
+        except BackendUnavailable:
+            raise
+        except Exception as e:
+            logger.error("Error fetching package %s: %s", id, e)
+            return {"success": False, "error": str(e)}
+
+    async def get_packages_by_ids(self, ids):
+        """Retrieve several packages in one query, in the order of `ids`."""
+        try:
+            rows = await self.storage.get_many(ids)
+            return {"success": True, "data": rows}
+        except BackendUnavailable:
+            raise
+        except Exception as e:
+            logger.error("Error fetching packages by id: %s", e)
+            return {"success": False, "error": str(e)}
+
+    async def scan_packages(self, after=0, limit=1000):
+        """Retrieve up to `limit` packages with id above `after`, oldest first."""
+        try:
+            rows = await self.storage.scan(after, limit)
+            return {"success": True, "data": rows}
+        except BackendUnavailable:
+            raise
+        except Exception as e:
+            logger.error("Error scanning packages: %s", e)
+            return {"success": False, "error": str(e)}
+
+    async def search_packages(self, tracking_number=None, courier=None, status=None, destination=None, limit=None, after=None, owner=None):
+        """Search packages by various criteria, newest first (keyset via `after`)."""
+        try:
+            rows = await self.storage.search(tracking_number, courier, status, destination, limit, after, owner)
+            return {"success": True, "data": rows, "next_cursor": next_cursor(rows, limit) if limit else None}
+        except BackendUnavailable:
+            raise
+        except Exception as e:
+            logger.error("Error searching packages: %s", e)
+            return {"success": False, "error": str(e)}
+
+    async def update_package(self, id, updates, owner=None):
+        """Update an existing package (only if it belongs to `owner`, when given).
+
+        The result's `previous_status` is the status stored before the update.
+        """
         try:
             if "expected_delivery" in updates and isinstance(updates["expected_delivery"], date):
                 updates["expected_delivery"] = updates["expected_delivery"].isoformat()
             
-            response = (
-                self.supabase.table("packages")
-                .update(updates)
-                .eq("id", id)
-                .execute()
-            )
+            if self.updates:
+                row, previous = await self.updates.submit((id, updates, owner), key=id)
+            else:
+                previous = await self.storage.statuses([id]) if "status" in updates else {}
+                row = await self.storage.update(id, updates, owner)
             
-            if response.data:
-                logger.info(f"Package {id} updated")
-                return {"success": True, "data": response.data[0]}
+            if row:
+                logger.info("Package %s updated", id)
+                return {"success": True, "data": row, "previous_status": previous.get(id, row["status"])}
             return {"success": False, "error": "Package not found"}
+        except BackendUnavailable:
+            raise
+        except Exception as e:
+            logger.error("Error updating package %s: %s", id, e)
+            return {"success": False, "error": str(e)}
+
+    async def append_history(self, events):
+        """Append a batch of status-change events to the history log."""
+        try:
+            await self.storage.insert_history(events)
+            return {"success": True}
+        except BackendUnavailable:
+            raise
         except Exception as e:
-            logger.error(f"Error updating package {id}: {str(e)}")
+            logger.error("Error writing package history: %s", e)
             return {"success": False, "error": str(e)}
 
-    def delete_package(self, id):
-        """Delete a package by ID."""
+    async def get_package_history(self, package_id):
+        """Retrieve the status-change events of one package, oldest first."""
         try:
-            response = (
-                self.supabase.table("packages")
-                .delete()
-                .eq("id", id)
-                .execute()
-            )
+            return {"success": True, "data": await self.storage.package_history(package_id)}
+        except BackendUnavailable:
+            raise
+        except Exception as e:
+            logger.error("Error fetching history for package %s: %s", package_id, e)
+            return {"success": False, "error": str(e)}
+
+    async def get_history_between(self, since, until, limit=1000, owner=None):
+        """Retrieve status-change events (of all packages or one owner's) in [since, until) (epoch milliseconds)."""
+        try:
+            return {"success": True, "data": await self.storage.history_between(since, until, limit, owner)}
+        except BackendUnavailable:
+            raise
+        except Exception as e:
+            logger.error("Error fetching package history: %s", e)
+            return {"success": False, "error": str(e)}
+
+    async def update_packages(self, updates, ids=None, tracking_numbers=None, owner=None, expected_status=None):
+        """Apply one update to many packages (selected by id or tracking number) in a single statement.
+
+        With `expected_status`, only packages still in that status are updated.
+        The result's `previous_statuses` maps each updated id to its status before the update.
+        """
+        try:
+            if "expected_delivery" in updates and isinstance(updates["expected_delivery"], date):
+                updates["expected_delivery"] = updates["expected_delivery"].isoformat()
             
-            if response.data:
-                logger.info(f"Package {id} deleted")
-                return {"success": True, "message": f"Package {id} deleted"}
+            if expected_status is not None:
+                # The filter already pins the previous status, so there is nothing to read
+                rows = await self.storage.update_many(updates, ids, tracking_numbers, owner, expected_status)
+                previous = {row["id"]: expected_status for row in rows}
+            else:
+                previous = await self.storage.statuses(ids, tracking_numbers) if "status" in updates else {}
+                rows = await self.storage.update_many(updates, ids, tracking_numbers, owner)
+            logger.info("Packages updated: %s", len(rows))
+            return {"success": True, "data": rows, "previous_statuses": _previous_statuses(rows, previous)}
+        except BackendUnavailable:
+            raise
+        except Exception as e:
+            logger.error("Error updating packages: %s", e)
+            return {"success": False, "error": str(e)}
+
+    async def update_overdue_packages(self, updates, ids, before, skip_statuses):
+        """Apply one update to the given packages that are still due before `before` and not in `skip_statuses`."""
+        try:
+            previous = await self.storage.statuses(ids)
+            rows = await self.storage.update_overdue(updates, ids, before, skip_statuses)
+            logger.info("Overdue packages updated: %s", len(rows))
+            return {"success": True, "data": rows, "previous_statuses": _previous_statuses(rows, previous)}
+        except BackendUnavailable:
+            raise
+        except Exception as e:
+            logger.error("Error updating overdue packages: %s", e)
+            return {"success": False, "error": str(e)}
+
+    async def delete_package(self, id, owner=None):
+        """Delete a package by ID (only if it belongs to `owner`, when given)."""
+        try:
+            deleted = await self.storage.delete(id, owner)
+            
+            if deleted:
+                logger.info("Package %s deleted", id)
+                return {"success": True, "data": deleted, "message": f"Package {id} deleted"}
             return {"success": False, "error": "Package not found"}
+        except BackendUnavailable:
+            raise
         except Exception as e:
-            logger.error(f"Error deleting package {id}: {str(e)}")
-            return {"success": False, "error": str(e)}
\ No newline at end of file
+            logger.error("Error deleting package %s: %s", id, e)
+            return {"success": False, "error": str(e)}
@@ -0,0 +1,134 @@
+import asyncio
+import itertools
+import json
+import os
+import threading
+from collections import deque
+
+
+class Subscription:
+    """One change-feed listener with a bounded queue and optional filters."""
+
+    def __init__(self, feed, loop, status=None, courier=None, max_queue=1000, owner=None):
+        self.feed = feed
+        self.loop = loop
+        self.owner = owner
+        self.status = status
+        self.courier = courier.lower() if courier else None
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def wants(self, event):
+        package = event["package"]
+        if self.owner is not None and package.get("owner") != self.owner:
+            return False
+        if self.status and self.status not in (package.get("status"), event.get("previous_status")):
+            return False
+        if self.courier and (package.get("courier") or "").lower() != self.courier:
+            return False
+        return True
+
+    def _deliver(self, event):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up: end the stream rather than buffer without
+            # bound; the client reconnects and resumes from its last event id.
+            self.overflowed = True
+            self.feed.unsubscribe(self)
+
+    async def get(self):
+        """Return the next event, or None once the subscription has overflowed."""
+        if self.overflowed and self.queue.empty():
+            return None
+        return await self.queue.get()
+
+    def close(self):
+        self.feed.unsubscribe(self)
+
+
+class ChangeFeed:
+    """Fan-out of package create/update/delete events to change-feed subscribers.
+
+    Events carry an "<epoch>-<sequence>" id and the most recent ones are kept
+    in a ring buffer so reconnecting clients can resume after the last id
+    they saw. Sequences are per process, so the epoch (random per feed)
+    tells a restarted or different worker's ids apart from ours.
+    `publish` may be called from any thread; delivery always happens on the
+    subscriber's event loop.
+    """
+
+    def __init__(self, backlog=10_000, max_queue=1000):
+        self.max_queue = max_queue
+        self.epoch = os.urandom(4).hex()
+        self._recent = deque(maxlen=backlog)
+        self._ids = itertools.count(1)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def publish(self, type, package, previous_status=None):
+        with self._lock:
+            seq = next(self._ids)
+            event = {"id": f"{self.epoch}-{seq}", "type": type, "package": package}
+            if previous_status is not None:
+                event["previous_status"] = previous_status
+            self._recent.append((seq, event))
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            if not subscriber.wants(event):
+                continue
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is subscriber.loop:
+                subscriber._deliver(event)
+            else:
+                subscriber.loop.call_soon_threadsafe(subscriber._deliver, event)
+
+    def subscribe(self, status=None, courier=None, last_event_id=None, owner=None):
+        """Register a listener on the running loop; return (subscription, missed_events).
+
+        With `owner`, only events for that owner's packages are delivered.
+        `missed_events` holds buffered events after `last_event_id`, or is
+        None when that id is from another epoch or older than the buffer and
+        the client must reload from scratch.
+        """
+        subscription = Subscription(self, asyncio.get_running_loop(), status, courier, self.max_queue, owner)
+        with self._lock:
+            self._subscribers.add(subscription)
+            missed = []
+            if last_event_id is not None:
+                last = self._sequence(last_event_id)
+                newest = self._recent[-1][0] if self._recent else 0
+                oldest = self._recent[0][0] if self._recent else 1
+                if last is None or last > newest or oldest > last + 1:
+                    # Unknown id (e.g. from before a restart or another worker) or already evicted
+                    missed = None
+                else:
+                    missed = [event for seq, event in self._recent
+                              if seq > last and subscription.wants(event)]
+        return subscription, missed
+
+    def _sequence(self, event_id):
+        """Return the sequence number of one of this feed's event ids, or None."""
+        epoch, _, seq = str(event_id).partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+
+def format_sse(event):
+    """Render an event in Server-Sent Events wire format."""
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
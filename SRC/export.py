@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+
+from SRC.storage import PACKAGE_COLUMNS
+
+EXPORT_COLUMNS = ("id",) + PACKAGE_COLUMNS
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+class CsvEncoder:
+    """Encode row chunks as CSV with a header line."""
+
+    def start(self):
+        return self.encode_values([EXPORT_COLUMNS])
+
+    def encode(self, rows):
+        return self.encode_values([[row.get(column) for column in EXPORT_COLUMNS] for row in rows])
+
+    def encode_values(self, values):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(values)
+        return buffer.getvalue().encode()
+
+    def finish(self):
+        return b""
+
+
+class NdjsonEncoder:
+    """Encode row chunks as newline-delimited JSON."""
+
+    def start(self):
+        return b""
+
+    def encode(self, rows):
+        return "".join(json.dumps(row, default=str) + "\n" for row in rows).encode()
+
+    def finish(self):
+        return b""
+
+
+class ArrowEncoder:
+    """Encode row chunks as record batches of one Arrow IPC stream (needs pyarrow)."""
+
+    def __init__(self):
+        import pyarrow as pa
+
+        self.pa = pa
+        self.schema = pa.schema(
+            [("id", pa.int64())] + [(column, pa.string()) for column in PACKAGE_COLUMNS]
+        )
+        self._sink = io.BytesIO()
+        self._writer = pa.ipc.new_stream(self._sink, self.schema)
+
+    def _drain(self):
+        data = self._sink.getvalue()
+        self._sink.seek(0)
+        self._sink.truncate()
+        return data
+
+    def start(self):
+        return self._drain()
+
+    def encode(self, rows):
+        columns = {column: [row.get(column) for row in rows] for column in EXPORT_COLUMNS}
+        self._writer.write_batch(self.pa.RecordBatch.from_pydict(columns, schema=self.schema))
+        return self._drain()
+
+    def finish(self):
+        self._writer.close()
+        return self._drain()
+
+
+def get_encoder(fmt):
+    """Return an encoder for `fmt`; raise ValueError if it is unknown or unavailable."""
+    if fmt == "csv":
+        return CsvEncoder()
+    if fmt == "ndjson":
+        return NdjsonEncoder()
+    if fmt == "arrow":
+        try:
+            return ArrowEncoder()
+        except ImportError:
+            raise ValueError("Arrow export requires the pyarrow package")
+    raise ValueError(f"Unsupported export format: {fmt}")
@@ -0,0 +1,114 @@
+import threading
+import time
+import logging
+from collections import deque
+from datetime import datetime, timezone
+
+from SRC.statuses import STATUSES, STATUS_CODES
+
+logger = logging.getLogger(__name__)
+
+
+def now_ms():
+    """Current time as integer epoch milliseconds (the history timestamp format)."""
+    return time.time_ns() // 1_000_000
+
+
+def to_ms(moment):
+    """Convert a datetime (naive means UTC) to epoch milliseconds."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1000)
+
+
+def describe_event(event):
+    """Expand a stored event into the shape returned by the API."""
+    return {
+        "package_id": event["package_id"],
+        "status": STATUSES[event["status_code"]],
+        "changed_at": datetime.fromtimestamp(event["changed_at"] / 1000, tz=timezone.utc).isoformat(),
+    }
+
+
+class HistoryBuffer:
+    """Status-change events waiting to be appended to the history log.
+
+    Writes record events here and return immediately; a background flusher
+    drains them in batches so the update path never waits on a second
+    round-trip. Reads merge in still-buffered events for read-your-writes.
+    If the store stays unavailable, the oldest events beyond `max_pending`
+    are dropped (and counted) instead of growing memory without bound.
+    """
+
+    def __init__(self, max_pending=100_000):
+        self.max_pending = max_pending
+        self._pending = deque()
+        self._inflight = []
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def record(self, package_id, status, changed_at=None, owner=None):
+        code = STATUS_CODES.get(status)
+        if code is None:
+            # Legacy rows may hold statuses from before validation; the log only has codes for known ones
+            logger.warning("Not recording unknown status %r of package %s", status, package_id)
+            return
+        event = {
+            "package_id": package_id,
+            "status_code": code,
+            "changed_at": changed_at or now_ms(),
+            "owner": owner,
+        }
+        with self._lock:
+            self._pending.append(event)
+            while len(self._pending) > self.max_pending:
+                self._pending.popleft()
+                self.dropped += 1
+
+    def drain(self, max_items):
+        """Take up to `max_items` of the oldest events for writing.
+
+        They stay visible to reads until `done()` (written) or `requeue()`
+        (write failed) is called.
+        """
+        with self._lock:
+            count = min(max_items, len(self._pending))
+            self._inflight = [self._pending.popleft() for _ in range(count)]
+            return self._inflight
+
+    def done(self):
+        with self._lock:
+            self._inflight = []
+
+    def requeue(self):
+        """Put the events of a failed write back at the front, in order."""
+        with self._lock:
+            self._pending.extendleft(reversed(self._inflight))
+            self._inflight = []
+
+    def _unwritten(self):
+        return self._inflight + list(self._pending)
+
+    def pending_for(self, package_id):
+        with self._lock:
+            return [event for event in self._unwritten() if event["package_id"] == package_id]
+
+    def pending_between(self, since, until, owner=None):
+        with self._lock:
+            return [event for event in self._unwritten() if since <= event["changed_at"] < until
+                    and (owner is None or event["owner"] == owner)]
+
+    def __len__(self):
+        return len(self._pending) + len(self._inflight)
+
+
+def merge_events(stored, pending, limit=None):
+    """Combine stored and still-buffered events, oldest first, without duplicates."""
+    seen = set()
+    events = []
+    for event in sorted(stored + pending, key=lambda event: event["changed_at"]):
+        key = (event["package_id"], event["status_code"], event["changed_at"])
+        if key not in seen:
+            seen.add(key)
+            events.append(describe_event(event))
+    return events[:limit] if limit else events
@@ -0,0 +1,370 @@
+import bisect
+import heapq
+import threading
+from datetime import date
+
+
+class TrackingNumberIndex:
+    """In-process set of known tracking numbers used to short-circuit duplicate checks.
+
+    A miss means the number is not stored (as far as this process has seen),
+    so inserts can skip the remote lookup; the table's unique constraint still
+    catches rows written by other processes. A hit is only a hint and must be
+    confirmed against the store, which also drops stale entries.
+    """
+
+    def __init__(self):
+        self._numbers = set()
+        self.warmed = False
+
+    def warm(self, tracking_numbers):
+        """Replace the contents with every tracking number currently stored."""
+        self._numbers = set(tracking_numbers)
+        self.warmed = True
+
+    def add(self, tracking_number):
+        self._numbers.add(tracking_number)
+
+    def discard(self, tracking_number):
+        self._numbers.discard(tracking_number)
+
+    def __contains__(self, tracking_number):
+        return tracking_number in self._numbers
+
+    def __len__(self):
+        return len(self._numbers)
+
+
+class NgramIndex:
+    """In-process trigram index answering substring queries over a few text columns.
+
+    Each indexed value is lower-cased and split into overlapping n-grams; a
+    query intersects the posting sets of its own n-grams (smallest first) and
+    verifies the survivors, so the cost follows the number of candidates
+    rather than the table size. Queries shorter than `n` fall back to a scan
+    of the in-memory documents. Matches are ranked exact, then prefix, then
+    substring, newest first within a rank.
+    """
+
+    EXACT, PREFIX, SUBSTRING = 0, 1, 2
+
+    def __init__(self, fields, n=3):
+        self.fields = tuple(fields)
+        self.n = n
+        self._postings = {field: {} for field in self.fields}
+        self._docs = {}
+        self._lock = threading.Lock()
+        self.warmed = False
+
+    def _grams(self, text):
+        return {text[i:i + self.n] for i in range(len(text) - self.n + 1)}
+
+    def _add(self, row):
+        values = {field: (row.get(field) or "").lower() for field in self.fields}
+        self._docs[row["id"]] = (row.get("status"), values)
+        for field, value in values.items():
+            postings = self._postings[field]
+            for gram in self._grams(value):
+                postings.setdefault(gram, set()).add(row["id"])
+
+    def _remove(self, id):
+        doc = self._docs.pop(id, None)
+        if doc is None:
+            return
+        for field, value in doc[1].items():
+            postings = self._postings[field]
+            for gram in self._grams(value):
+                ids = postings.get(gram)
+                if ids is not None:
+                    ids.discard(id)
+                    if not ids:
+                        del postings[gram]
+
+    def warm(self, rows):
+        """Rebuild the index from an iterable of rows, then swap it in."""
+        fresh = NgramIndex(self.fields, self.n)
+        for row in rows:
+            fresh._add(row)
+        with self._lock:
+            self._postings = fresh._postings
+            self._docs = fresh._docs
+            self.warmed = True
+
+    def add(self, row):
+        """Index a new row, or re-index an updated one."""
+        with self._lock:
+            self._remove(row["id"])
+            self._add(row)
+
+    def remove(self, id):
+        with self._lock:
+            self._remove(id)
+
+    @property
+    def max_id(self):
+        return max(self._docs, default=0)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _candidates(self, terms):
+        """Return candidate ids for the indexable terms, or None if none are indexable."""
+        posting_sets = []
+        for field, term in terms.items():
+            for gram in self._grams(term):
+                posting_sets.append(self._postings[field].get(gram, set()))
+        if not posting_sets:
+            return None
+        posting_sets.sort(key=len)
+        candidates = set(posting_sets[0])
+        for ids in posting_sets[1:]:
+            candidates &= ids
+            if not candidates:
+                break
+        return candidates
+
+    def search(self, terms, status=None, limit=100, after=None):
+        """Return up to `limit` (rank, id) matches after the (rank, id) key `after`.
+
+        `terms` maps indexed field names to substrings. The second value
+        returned tells whether more matches exist past this page.
+        """
+        terms = {field: term.lower() for field, term in terms.items() if term}
+        with self._lock:
+            candidates = self._candidates(terms)
+            if candidates is None:
+                candidates = self._docs.keys()
+
+            matches = []
+            for id in candidates:
+                doc_status, values = self._docs[id]
+                if status and doc_status != status:
+                    continue
+                rank = 0
+                for field, term in terms.items():
+                    value = values[field]
+                    if value == term:
+                        continue
+                    if value.startswith(term):
+                        rank += self.PREFIX
+                    elif term in value:
+                        rank += self.SUBSTRING
+                    else:
+                        break
+                else:
+                    key = (rank, -id)
+                    if after is None or key > (after[0], -after[1]):
+                        matches.append(key)
+
+        page = heapq.nsmallest(limit + 1, matches)
+        return [(rank, -neg_id) for rank, neg_id in page[:limit]], len(page) > limit
+
+
+def day_ordinal(value):
+    """Return the date ordinal of an ISO `expected_delivery`, or None if it is missing or malformed."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value)[:10]).toordinal()
+    except ValueError:
+        return None
+
+
+class DeadlineIndex:
+    """In-process list of packages sorted by (expected_delivery, id).
+
+    Packages in `excluded_statuses` (and those without a valid date) are
+    left out, so range queries like "overdue" or "due tomorrow" bisect to
+    the first match and read only the k rows they return. Dates are kept
+    as day ordinals, which also serve as the cursor rank.
+    """
+
+    def __init__(self, excluded_statuses=()):
+        self.excluded_statuses = frozenset(excluded_statuses)
+        self._keys = []
+        self._days = {}
+        self._lock = threading.Lock()
+        self.warmed = False
+
+    def _day_of(self, row):
+        if row.get("status") in self.excluded_statuses:
+            return None
+        return day_ordinal(row.get("expected_delivery"))
+
+    def _remove(self, id):
+        day = self._days.pop(id, None)
+        if day is not None:
+            del self._keys[bisect.bisect_left(self._keys, (day, id))]
+
+    def warm(self, rows):
+        """Rebuild the index from an iterable of rows, then swap it in."""
+        days = {}
+        for row in rows:
+            day = self._day_of(row)
+            if day is not None:
+                days[row["id"]] = day
+        keys = sorted((day, id) for id, day in days.items())
+        with self._lock:
+            self._keys = keys
+            self._days = days
+            self.warmed = True
+
+    def add(self, row):
+        """Index a new row, or re-index (or drop) an updated one."""
+        day = self._day_of(row)
+        with self._lock:
+            if self._days.get(row["id"]) == day:
+                return
+            self._remove(row["id"])
+            if day is not None:
+                self._days[row["id"]] = day
+                bisect.insort(self._keys, (day, row["id"]))
+
+    def remove(self, id):
+        with self._lock:
+            self._remove(id)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def between(self, start=None, end=None, limit=100, after=None):
+        """Return up to `limit` (day, id) keys with start <= day < end, after the key `after`.
+
+        `start` and `end` are day ordinals (None for unbounded). The second
+        value returned tells whether more keys exist past this page.
+        """
+        with self._lock:
+            low = (start, 0) if start is not None else None
+            if after is not None and (low is None or tuple(after) > low):
+                i = bisect.bisect_right(self._keys, tuple(after))
+            else:
+                i = bisect.bisect_left(self._keys, low) if low is not None else 0
+            page = []
+            for key in self._keys[i:i + limit + 1]:
+                if end is not None and key[0] >= end:
+                    break
+                page.append(key)
+        return page[:limit], len(page) > limit
+
+
+class ShipmentIndex:
+    """In-process map of in-flight packages grouped by courier, for the tracking poller.
+
+    Packages in `excluded_statuses` (delivered, cancelled) never change
+    again, so they are left out and never polled.
+    """
+
+    def __init__(self, excluded_statuses=()):
+        self.excluded_statuses = frozenset(excluded_statuses)
+        self._by_courier = {}
+        self._couriers = {}
+        self._lock = threading.Lock()
+        self.warmed = False
+
+    def _entry(self, row):
+        if row.get("status") in self.excluded_statuses or not row.get("courier"):
+            return None
+        return row["courier"], (row["tracking_number"], row["status"])
+
+    def _remove(self, id):
+        courier = self._couriers.pop(id, None)
+        if courier is not None:
+            shipments = self._by_courier[courier]
+            del shipments[id]
+            if not shipments:
+                del self._by_courier[courier]
+
+    def warm(self, rows):
+        """Rebuild the index from an iterable of rows, then swap it in."""
+        by_courier, couriers = {}, {}
+        for row in rows:
+            entry = self._entry(row)
+            if entry is not None:
+                by_courier.setdefault(entry[0], {})[row["id"]] = entry[1]
+                couriers[row["id"]] = entry[0]
+        with self._lock:
+            self._by_courier = by_courier
+            self._couriers = couriers
+            self.warmed = True
+
+    def add(self, row):
+        """Index a new row, or re-index (or drop) an updated one."""
+        entry = self._entry(row)
+        with self._lock:
+            self._remove(row["id"])
+            if entry is not None:
+                self._by_courier.setdefault(entry[0], {})[row["id"]] = entry[1]
+                self._couriers[row["id"]] = entry[0]
+
+    def remove(self, id):
+        with self._lock:
+            self._remove(id)
+
+    def __len__(self):
+        return len(self._couriers)
+
+    def snapshot(self):
+        """Return {courier: [(id, tracking_number, status), ...]} for every in-flight package."""
+        with self._lock:
+            return {
+                courier: [(id, number, status) for id, (number, status) in shipments.items()]
+                for courier, shipments in self._by_courier.items()
+            }
+
+
+class Partitioned:
+    """One in-process index per owner, so a tenant's queries only touch that tenant's packages.
+
+    `factory` builds an empty index with warm/add/remove methods. Rows
+    without an owner are not partitioned. A partition is created on first
+    use; once the whole set has been warmed, new partitions count as warmed
+    too, since every later row reaches them through `add`.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._parts = {}
+        self._lock = threading.Lock()
+        self.warmed = False
+
+    def _new(self):
+        part = self.factory()
+        if self.warmed:
+            part.warm([])
+        return part
+
+    def get(self, owner):
+        """Return the partition of `owner`, creating an empty one if needed."""
+        part = self._parts.get(owner)
+        if part is None:
+            with self._lock:
+                part = self._parts.get(owner)
+                if part is None:
+                    part = self._parts[owner] = self._new()
+        return part
+
+    def warm(self, rows):
+        """Rebuild every partition from an iterable of rows, then swap them in."""
+        groups = {}
+        for row in rows:
+            if row.get("owner") is not None:
+                groups.setdefault(row["owner"], []).append(row)
+        parts = {}
+        for owner, group in groups.items():
+            parts[owner] = self.factory()
+            parts[owner].warm(group)
+        with self._lock:
+            self._parts = parts
+            self.warmed = True
+
+    def add(self, row):
+        if row.get("owner") is not None:
+            self.get(row["owner"]).add(row)
+
+    def remove(self, id, owner):
+        part = self._parts.get(owner)
+        if part is not None:
+            part.remove(id)
+
+    def __len__(self):
+        return len(self._parts)
@@ -0,0 +1,151 @@
+import atexit
+import contextvars
+import copy
+import logging
+import os
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# ASGI scope of the request being handled, set by the API middleware
+current_request = contextvars.ContextVar("current_request", default=None)
+
+# Attributes every LogRecord has; anything else was passed via `extra=`
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, message, extras and exc."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+def parse_sample_rates(spec):
+    """Parse "GET=0.1,POST /packages/=1" into {"GET": 0.1, "POST /packages/": 1.0}."""
+    rates = {}
+    for item in spec.split(","):
+        key, _, rate = item.rpartition("=")
+        if key.strip():
+            rates[key.strip()] = float(rate)
+    return rates
+
+
+class RouteSampler(logging.Filter):
+    """Keep a fraction of below-WARNING records logged while serving each route.
+
+    Rates are looked up by "METHOD /route/{template}", then by method, then
+    fall back to `default`. Warnings and errors, and records logged outside
+    a request, always pass. Kept records carry `route` (and `sample_rate`
+    when sampled) so counts can be scaled back up downstream.
+    """
+
+    def __init__(self, rates, default=1.0):
+        super().__init__()
+        self.rates = rates
+        self.default = default
+
+    def filter(self, record):
+        scope = current_request.get()
+        if scope is None:
+            return True
+        route = scope.get("route")
+        record.route = f"{scope['method']} {route.path if route else scope['path']}"
+        if record.levelno >= logging.WARNING:
+            return True
+
+        rate = self.rates.get(record.route, self.rates.get(scope["method"], self.default))
+        if rate >= 1:
+            return True
+        record.sample_rate = rate
+        return random.random() < rate
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Hands records to the listener thread and never blocks.
+
+    The message is rendered on the calling thread, while its arguments
+    still hold the values they were logged with; JSON encoding and writing
+    are left to the listener. Unlike the stock QueueHandler the record keeps
+    its exc_info and extras, as it stays in-process. If the queue is full
+    the record is dropped and counted instead.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler = None
+
+
+def configure_logging():
+    """Route all logging through a bounded queue to a background writer (idempotent).
+
+    LOG_LEVEL sets the root level, LOG_FORMAT is "json" (default) or "text",
+    LOG_QUEUE_SIZE bounds the queue, and LOG_SAMPLE_RATE / LOG_SAMPLE_ROUTES
+    set per-route sampling of below-WARNING records.
+    """
+    global _handler
+    if _handler is not None:
+        return _handler
+
+    stream = logging.StreamHandler()
+    if os.getenv("LOG_FORMAT", "json").lower() == "text":
+        stream.setFormatter(logging.Formatter(TEXT_FORMAT))
+    else:
+        stream.setFormatter(JsonFormatter())
+
+    handler = _DeferredQueueHandler(queue.Queue(int(os.getenv("LOG_QUEUE_SIZE", "10000"))))
+    handler.addFilter(RouteSampler(
+        parse_sample_rates(os.getenv("LOG_SAMPLE_ROUTES", "GET=0.1")),
+        default=float(os.getenv("LOG_SAMPLE_RATE", "1.0")),
+    ))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    listener = QueueListener(handler.queue, stream, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    _handler = handler
+    return handler
+
+
+def dropped_records():
+    """Return how many records were dropped because the log queue was full."""
+    return _handler.dropped if _handler is not None else 0
@@ -1,12 +1,412 @@
-from SRC.db import DatabaseManager
-from datetime import date
+from SRC.db import DatabaseManager, AsyncDatabaseManager
+from SRC.indexes import TrackingNumberIndex, NgramIndex, DeadlineIndex, ShipmentIndex, Partitioned, day_ordinal
+from SRC.cache import LRUCache
+from SRC.stats import PackageStats
+from SRC.statuses import STATUSES, CLOSED_STATUSES
+from SRC.cursors import encode_cursor
+from SRC.history import HistoryBuffer, merge_events
+from SRC.events import ChangeFeed
+from SRC.resilience import BackendUnavailable
+from datetime import date, datetime
+import asyncio
+import contextlib
+import logging
+import os
 import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+SEARCH_FIELDS = ("tracking_number", "courier", "destination")
+WARM_PAGE_SIZE = 5000
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "1000"))
+OVERDUE_STATUS = "Delayed"
+SWEEP_BATCH_SIZE = int(os.getenv("OVERDUE_SWEEP_BATCH", "500"))
+
+def owns(row, owner):
+    """True if `owner` may see `row`; None (no tenant) sees every package."""
+    return owner is None or row.get("owner") == owner
+
+
+def row_matches_search(row, tracking_number=None, courier=None, status=None, destination=None):
+    """Mirror the database search semantics (substring, case-insensitive) for one row."""
+    if tracking_number and tracking_number.lower() not in (row.get("tracking_number") or "").lower():
+        return False
+    if courier and courier.lower() not in (row.get("courier") or "").lower():
+        return False
+    if destination and destination.lower() not in (row.get("destination") or "").lower():
+        return False
+    if status and row.get("status") != status:
+        return False
+    return True
+
 
 class PackageManager:
     """Bridge between frontend and database with business logic validation."""
 
-    def __init__(self):
-        self.db = DatabaseManager()
+    def __init__(self, db=None):
+        self.db = db or DatabaseManager()
+        self._init_state()
+        self.warm_indexes()
+        self._history_stop = threading.Event()
+        self._history_flush_lock = threading.Lock()
+        threading.Thread(target=self._flush_history_loop, name="history-flusher", daemon=True).start()
+
+    def close(self):
+        """Stop the background history flusher and write what is still buffered."""
+        self._history_stop.set()
+        self.flush_history()
+
+    def _init_state(self):
+        """Set up the in-process indexes and caches shared by sync and async managers."""
+        self.tracking_numbers = TrackingNumberIndex()
+        self.search_index = NgramIndex(SEARCH_FIELDS)
+        self.deadlines = DeadlineIndex(CLOSED_STATUSES)
+        # Open packages the overdue sweeper has not marked yet
+        self.sweep_index = DeadlineIndex(CLOSED_STATUSES + (OVERDUE_STATUS,))
+        # In-flight packages by courier, for the tracking poller
+        self.shipments = ShipmentIndex(CLOSED_STATUSES)
+        self.stats = PackageStats()
+        # Per-owner copies, so a tenant's searches, deadlines and counts only touch its own packages
+        self.tenant_search = Partitioned(lambda: NgramIndex(SEARCH_FIELDS))
+        self.tenant_deadlines = Partitioned(lambda: DeadlineIndex(CLOSED_STATUSES))
+        self.tenant_stats = Partitioned(PackageStats)
+        # Writes seen while warm_indexes() scans the table, replayed onto the new snapshot
+        self._rebuild_writes = None
+        self._rebuild_lock = threading.Lock()
+        self.history = HistoryBuffer()
+        self.changes = ChangeFeed(
+            backlog=int(os.getenv("CHANGE_FEED_BACKLOG", "10000")),
+            max_queue=int(os.getenv("CHANGE_FEED_QUEUE", "1000")),
+        )
+        self.history_batch_size = int(os.getenv("HISTORY_BATCH_SIZE", "1000"))
+        self.history_flush_seconds = float(os.getenv("HISTORY_FLUSH_SECONDS", "0.5"))
+
+        maxsize = int(os.getenv("CACHE_MAXSIZE", "1024"))
+        ttl = float(os.getenv("CACHE_TTL_SECONDS", "30"))
+        self.package_cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.search_cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def warm_indexes(self):
+        """Load the in-process indexes and counters from one pass over the table.
+
+        Also used for periodic reconciliation, which picks up writes made by
+        other processes.
+        """
+        if not self._begin_rebuild():
+            return
+        try:
+            rows = self._scan()
+            if rows is None:
+                return self._warm_failed()
+            self._warm(rows)
+        finally:
+            self._end_rebuild()
+
+    def _scan(self):
+        """Read the index columns of every package, or None if the database failed."""
+        rows = []
+        after = 0
+        while True:
+            page = self.db.scan_packages(after=after, limit=WARM_PAGE_SIZE)
+            if not page.get("success"):
+                return None
+            rows.extend(map(self._index_fields, page["data"]))
+            if len(page["data"]) < WARM_PAGE_SIZE:
+                return rows
+            after = page["data"][-1]["id"]
+
+    def _index_fields(self, row):
+        """Keep only the columns the in-process indexes need."""
+        return {"id": row["id"], "status": row.get("status"), "expected_delivery": row.get("expected_delivery"),
+                "owner": row.get("owner"), **{field: row.get(field) for field in SEARCH_FIELDS}}
+
+    def _warm(self, rows):
+        self.tracking_numbers.warm(row["tracking_number"] for row in rows)
+        self.search_index.warm(rows)
+        self.deadlines.warm(rows)
+        self.sweep_index.warm(rows)
+        self.shipments.warm(rows)
+        self.stats.rebuild(rows)
+        self.tenant_search.warm(rows)
+        self.tenant_deadlines.warm(rows)
+        self.tenant_stats.warm(rows)
+        with self._rebuild_lock:
+            self._replay(self._rebuild_writes)
+            self._rebuild_writes = None
+        logger.info("Indexes warmed with %s packages", len(rows))
+
+    def _warm_failed(self):
+        logger.warning("Indexes not warmed; duplicate checks and searches will hit the database")
+
+    def _begin_rebuild(self):
+        """Start recording writes for replay after the table scan; False if a rebuild is already running."""
+        with self._rebuild_lock:
+            if self._rebuild_writes is not None:
+                logger.info("Index rebuild already running")
+                return False
+            self._rebuild_writes = []
+            return True
+
+    def _end_rebuild(self):
+        with self._rebuild_lock:
+            self._rebuild_writes = None
+
+    def _record_write(self, id, row, deleted=False):
+        """Remember a write made while a rebuild scan is running (call before applying it)."""
+        with self._rebuild_lock:
+            if self._rebuild_writes is not None:
+                self._rebuild_writes.append((id, row, deleted))
+
+    def _replay(self, writes):
+        """Re-apply writes made during the scan, which the snapshot may have missed or undone."""
+        for id, row, deleted in writes:
+            if deleted:
+                self._unindex(id, row)
+            else:
+                self._index(row)
+
+    def _duplicate_candidates(self, tracking_numbers):
+        """Return the tracking numbers that need confirming against the database."""
+        if self.tracking_numbers.warmed:
+            return {number for number in tracking_numbers if number in self.tracking_numbers}
+        return set(tracking_numbers)
+
+    def _forget_stale(self, candidates, result):
+        """Drop index entries the database says no longer exist."""
+        if result.get("success"):
+            for stale in candidates - result["data"]:
+                self.tracking_numbers.discard(stale)
+        return result
+
+    def _existing_tracking_numbers(self, tracking_numbers):
+        """Return which tracking numbers already exist, asking the database only about index hits."""
+        candidates = self._duplicate_candidates(tracking_numbers)
+        if not candidates:
+            return {"success": True, "data": set()}
+        return self._forget_stale(candidates, self.db.find_existing_tracking_numbers(candidates))
+
+    def _index(self, row):
+        """Add a created or updated package to every in-process index and counter."""
+        # On updates the old number stays in the index until a lookup proves it stale
+        self.tracking_numbers.add(row["tracking_number"])
+        fields = self._index_fields(row)
+        self.search_index.add(fields)
+        self.deadlines.add(fields)
+        self.sweep_index.add(fields)
+        self.shipments.add(fields)
+        self.stats.record(row)
+        self.tenant_search.add(fields)
+        self.tenant_deadlines.add(fields)
+        self.tenant_stats.add(row)
+
+    def _unindex(self, id, row):
+        """Drop a deleted package from every in-process index and counter."""
+        self.tracking_numbers.discard(row["tracking_number"])
+        self.search_index.remove(id)
+        self.deadlines.remove(id)
+        self.sweep_index.remove(id)
+        self.shipments.remove(id)
+        self.stats.remove(id)
+        for partition in (self.tenant_search, self.tenant_deadlines, self.tenant_stats):
+            partition.remove(id, row.get("owner"))
+
+    def _on_created(self, row):
+        """Keep in-process state current after a package is inserted."""
+        self._record_write(row["id"], row)
+        self._index(row)
+        self.history.record(row["id"], row["status"], owner=row.get("owner"))
+        self._invalidate_cached(row["id"], row)
+        self.changes.publish("created", row)
+
+    def _on_updated(self, id, row, previous_status):
+        """Keep in-process state current after a package is updated from `previous_status` (as stored)."""
+        self._record_write(id, row)
+        if previous_status != row["status"]:
+            self.history.record(id, row["status"], owner=row.get("owner"))
+        self._index(row)
+        self._invalidate_cached(id, row)
+        self.changes.publish("updated", row, previous_status)
+
+    def _on_synced(self, row, previous_status):
+        """Catch in-process state up with a package another process created or changed the status of."""
+        self._record_write(row["id"], row)
+        self._index(row)
+        self._invalidate_cached(row["id"], row)
+        self.changes.publish("created" if previous_status is None else "updated", row, previous_status)
+
+    def _synced(self, result):
+        """Run `_on_synced` for fetched rows whose status differs from the one last seen; return how many did."""
+        synced = 0
+        for row in result["data"]:
+            previous_status = self.stats.status_of(row["id"])
+            if previous_status != row["status"]:
+                self._on_synced(row, previous_status)
+                synced += 1
+        return synced
+
+    def _on_deleted(self, id, row):
+        """Keep in-process state current after a package is deleted."""
+        self._record_write(id, row, deleted=True)
+        self._unindex(id, row)
+        self._invalidate_cached(id)
+        self.changes.publish("deleted", row)
+
+    def _invalidate_cached(self, id, row=None):
+        """Drop cache entries a write to package `id` could have changed.
+
+        `row` is the package as it is after the write (None for deletes); any
+        cached search containing the package or matching its new values goes.
+        Searches are tagged with the ids they returned and their owner, so
+        only the searches that could see this package are looked at.
+        """
+        self.package_cache.invalidate(id)
+        self.search_cache.invalidate_tag(("id", id))
+        if row is None:
+            return
+        matches = lambda key, result: row_matches_search(row, *key[0])
+        self.search_cache.invalidate_where(matches, tag=("owner", None))
+        if row.get("owner") is not None:
+            self.search_cache.invalidate_where(matches, tag=("owner", row["owner"]))
+
+    def _cache_search(self, key, result):
+        """Cache a search result, tagged for `_invalidate_cached`."""
+        tags = [("id", row["id"]) for row in result["data"]]
+        tags.append(("owner", key[3]))
+        self.search_cache.set(key, result, tags)
+
+    def _flush_history_loop(self):
+        while not self._history_stop.wait(self.history_flush_seconds):
+            self.flush_history()
+
+    def flush_history(self):
+        """Append buffered status changes to the history log in batches; return how many were written."""
+        written = 0
+        with self._history_flush_lock:
+            while True:
+                events = self.history.drain(self.history_batch_size)
+                if not events:
+                    return written
+                if not self.db.append_history(events).get("success"):
+                    self.history.requeue()
+                    return written
+                self.history.done()
+                written += len(events)
+
+    def get_package_history(self, id, owner=None):
+        """Return the status timeline of one package, oldest first."""
+        if owner is not None:
+            found = self.get_package(id, owner)
+            if not found.get("success"):
+                return found
+        result = self.db.get_package_history(id)
+        if not result.get("success"):
+            return result
+        return {"success": True, "data": merge_events(result["data"], self.history.pending_for(id))}
+
+    def get_status_changes(self, since, until, limit=1000, owner=None):
+        """Return status changes of all packages (or one owner's) in [since, until) (epoch ms), oldest first."""
+        result = self.db.get_history_between(since, until, limit, owner)
+        if not result.get("success"):
+            return result
+        pending = self.history.pending_between(since, until, owner)
+        return {"success": True, "data": merge_events(result["data"], pending, limit)}
+
+    def package_stats(self, owner=None):
+        """Return package counts (of all packages or one owner's) by status and courier plus overdue counts, from memory."""
+        stats = self.stats if owner is None else self.tenant_stats.get(owner)
+        if not stats.warmed:
+            return {"success": False, "error": "Statistics are not available yet"}
+        return {"success": True, "data": stats.snapshot()}
+
+    def _overdue_window(self, today=None):
+        """Return the [start, end) day ordinals of open packages past their expected delivery."""
+        return None, (today or date.today()).toordinal()
+
+    def _due_window(self, within, now=None):
+        """Return the [start, end) day ordinals of packages due from today until `now + within`."""
+        now = now or datetime.now()
+        return now.date().toordinal(), (now + within).date().toordinal() + 1
+
+    def _deadline_page(self, start, end, limit, after, owner):
+        """Page through the deadline index; return (ids, next_cursor), or None if it is not warmed."""
+        deadlines = self.deadlines if owner is None else self.tenant_deadlines.get(owner)
+        if not deadlines.warmed:
+            return None
+        if after is not None and after[0] is None:
+            after = (0, after[1])
+        page, more = deadlines.between(start, end, limit, after)
+        next_cursor = encode_cursor(page[-1][1], rank=page[-1][0]) if more else None
+        return [id for _, id in page], next_cursor
+
+    def _deadline_result(self, start, end, rows_result, next_cursor):
+        """Drop fetched rows that were closed or rescheduled (by another process) since indexing."""
+        if not rows_result.get("success"):
+            return rows_result
+        rows = []
+        for row in rows_result["data"]:
+            day = day_ordinal(row.get("expected_delivery"))
+            if (row.get("status") not in CLOSED_STATUSES and day is not None
+                    and (start is None or day >= start) and day < end):
+                rows.append(row)
+        return {"success": True, "data": rows, "next_cursor": next_cursor}
+
+    def _deadline_query(self, start, end, limit, after, owner):
+        planned = self._deadline_page(start, end, limit, after, owner)
+        if planned is None:
+            return {"success": False, "error": "Deadline index is not available yet"}
+        ids, next_cursor = planned
+        return self._deadline_result(start, end, self.get_packages_batch(ids, owner), next_cursor)
+
+    def get_overdue_packages(self, limit=100, after=None, today=None, owner=None):
+        """Open packages past their expected delivery, earliest deadline first.
+
+        `after` is the (day, id) position decoded from the previous page's cursor.
+        """
+        return self._deadline_query(*self._overdue_window(today), limit, after, owner)
+
+    def get_due_packages(self, within, limit=100, after=None, now=None, owner=None):
+        """Open packages due between today and `now + within` (a timedelta), earliest first."""
+        return self._deadline_query(*self._due_window(within, now), limit, after, owner)
+
+    def _sweep_batch(self, today):
+        """Return the next ids the sweeper should mark, earliest deadline first."""
+        page, _ = self.sweep_index.between(end=today.toordinal(), limit=SWEEP_BATCH_SIZE)
+        return [id for _, id in page]
+
+    def _swept(self, ids, result):
+        """Run the write hooks for marked packages; return how many were marked, or None on failure."""
+        if not result.get("success"):
+            return None
+        marked = set()
+        for row in result["data"]:
+            self._on_updated(row["id"], row, result["previous_statuses"].get(row["id"]))
+            marked.add(row["id"])
+        # The rest were closed, rescheduled or marked elsewhere; reconciliation re-indexes them
+        for id in ids:
+            if id not in marked:
+                self.sweep_index.remove(id)
+        return len(marked)
+
+    def sweep_overdue(self, today=None):
+        """Mark open packages past their expected delivery as Delayed, in batches; return how many."""
+        today = today or date.today()
+        swept = 0
+        while ids := self._sweep_batch(today):
+            result = self.db.update_overdue_packages(
+                {"status": OVERDUE_STATUS}, ids, today.isoformat(), CLOSED_STATUSES + (OVERDUE_STATUS,)
+            )
+            marked = self._swept(ids, result)
+            if marked is None:
+                break
+            swept += marked
+        if swept:
+            logger.info("Marked %s overdue packages as %s", swept, OVERDUE_STATUS)
+        return swept
+
+    def cache_stats(self):
+        """Return hit/miss/eviction counters for the read caches."""
+        return {"packages": self.package_cache.stats(), "searches": self.search_cache.stats()}
 
     def _validate_tracking_number(self, tracking_number):
         """Validate tracking number format."""
@@ -24,74 +424,662 @@ class PackageManager:
             return False, "Courier name too long (max 100 characters)"
         return True, None
 
-    def add_package(self, tracking_number, courier, status, expected_delivery, origin, destination, notes=None):
-        """Add a new package with validation."""
-        # Validate inputs
+    def _validate_status(self, status):
+        """Validate status against the known delivery states."""
+        if status not in STATUSES:
+            return False, f"Unknown status '{status}' (expected one of: {', '.join(STATUSES)})"
+        return True, None
+
+    def _prepare_package(self, tracking_number, courier, status, expected_delivery, origin, destination, notes, owner=None):
+        """Validate a single new package; return (row, error)."""
         is_valid, error = self._validate_tracking_number(tracking_number)
         if not is_valid:
-            return {"success": False, "error": error}
+            return None, error
         
         is_valid, error = self._validate_courier(courier)
         if not is_valid:
-            return {"success": False, "error": error}
+            return None, error
+
+        is_valid, error = self._validate_status(status)
+        if not is_valid:
+            return None, error
 
         # Convert date if needed
         if isinstance(expected_delivery, date):
             expected_delivery = expected_delivery.isoformat()
 
-        # Check for duplicate tracking numbers
-        existing = self.db.search_packages(tracking_number=tracking_number)
+        return {
+            "tracking_number": tracking_number.strip(),
+            "courier": courier.strip(),
+            "status": status,
+            "expected_delivery": expected_delivery,
+            "origin": origin,
+            "destination": destination,
+            "notes": notes,
+            "owner": owner,
+        }, None
+
+    def add_package(self, tracking_number, courier, status, expected_delivery, origin, destination, notes=None, owner=None):
+        """Add a new package (owned by `owner`) with validation."""
+        row, error = self._prepare_package(tracking_number, courier, status, expected_delivery, origin, destination, notes, owner)
+        if error:
+            return {"success": False, "error": error}
+
+        # Check for duplicate tracking numbers (exact match)
+        existing = self._existing_tracking_numbers([row["tracking_number"]])
         if existing.get("success") and existing.get("data"):
             return {"success": False, "error": "Tracking number already exists"}
 
-        result = self.db.create_package(
-            tracking_number.strip(),
-            courier.strip(),
-            status,
-            expected_delivery,
-            origin,
-            destination,
-            notes
-        )
+        result = self.db.create_package(**row)
+        if result.get("success"):
+            self._on_created(result["data"])
         return result
 
-    def get_all_packages(self, limit=100, offset=0):
-        """Retrieve all packages with pagination."""
-        return self.db.get_packages(limit=limit, offset=offset)
+    def _text_field(self, row, field):
+        """Return a bulk row's value for a text column as a string; (None, error) for other types."""
+        value = row.get(field)
+        if value is None or isinstance(value, str):
+            return value or "", None
+        # NDJSON numbers are fine as text (e.g. numeric tracking numbers); objects and booleans are not
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value), None
+        return None, f"{field} must be a string"
+
+    def _validate_package_row(self, row):
+        """Validate and normalise one row of a bulk import."""
+        fields = {}
+        for field in ("tracking_number", "courier", "status", "origin", "destination", "notes"):
+            fields[field], error = self._text_field(row, field)
+            if error:
+                return None, error
+
+        tracking_number = fields["tracking_number"].strip()
+        is_valid, error = self._validate_tracking_number(tracking_number)
+        if not is_valid:
+            return None, error
+
+        courier = fields["courier"].strip()
+        is_valid, error = self._validate_courier(courier)
+        if not is_valid:
+            return None, error
+
+        status = fields["status"] or "Pending"
+        is_valid, error = self._validate_status(status)
+        if not is_valid:
+            return None, error
+
+        for field in ("origin", "destination"):
+            if not fields[field].strip():
+                return None, f"{field} cannot be empty"
+
+        expected_delivery = row.get("expected_delivery")
+        if isinstance(expected_delivery, date):
+            expected_delivery = expected_delivery.isoformat()
+        try:
+            date.fromisoformat(expected_delivery or "")
+        except (TypeError, ValueError):
+            return None, "expected_delivery must be a YYYY-MM-DD date"
+
+        return {
+            "tracking_number": tracking_number,
+            "courier": courier,
+            "status": status,
+            "expected_delivery": expected_delivery,
+            "origin": fields["origin"].strip(),
+            "destination": fields["destination"].strip(),
+            "notes": fields["notes"] or None,
+        }, None
+
+    def _split_chunk(self, rows, owner=None):
+        """Validate a bulk chunk for `owner`; return (failed results, valid (row_number, row) pairs)."""
+        results = []
+        pending = []
+        seen = set()
+
+        for row_number, row in rows:
+            clean, error = self._validate_package_row(row)
+            if clean and clean["tracking_number"] in seen:
+                error = "Duplicate tracking number in upload"
+            if error:
+                results.append({"row": row_number, "success": False, "error": error})
+                continue
+            seen.add(clean["tracking_number"])
+            clean["owner"] = owner
+            pending.append((row_number, clean))
+        return results, pending
+
+    def _drop_existing(self, results, pending, existing):
+        """Report rows whose tracking number already exists; return the rest."""
+        if not existing.get("success"):
+            results.extend(
+                {"row": row_number, "success": False, "error": existing.get("error")}
+                for row_number, _ in pending
+            )
+            return []
+
+        duplicates = existing["data"]
+        for row_number, clean in pending:
+            if clean["tracking_number"] in duplicates:
+                results.append({"row": row_number, "success": False,
+                                "error": "Tracking number already exists"})
+        return [(n, c) for n, c in pending if c["tracking_number"] not in duplicates]
+
+    def _record_created(self, results, row_number, created):
+        """Add one insert outcome to a bulk report."""
+        if created.get("success"):
+            self._on_created(created["data"])
+            results.append({"row": row_number, "success": True, "id": created["data"]["id"]})
+        else:
+            results.append({"row": row_number, "success": False, "error": created.get("error")})
+
+    def add_packages(self, rows, owner=None):
+        """Validate and insert a chunk of (row_number, row) pairs; return a per-row report.
+
+        Duplicates are checked for the whole chunk with one lookup and the
+        valid rows are written with one multi-row insert.
+        """
+        results, pending = self._split_chunk(rows, owner)
 
-    def get_package(self, id):
-        """Get a single package by ID."""
-        return self.db.get_package_by_id(id)
+        if pending:
+            existing = self._existing_tracking_numbers([clean["tracking_number"] for _, clean in pending])
+            pending = self._drop_existing(results, pending, existing)
 
-    def search_packages(self, tracking_number=None, courier=None, status=None):
-        """Search packages by criteria."""
-        return self.db.search_packages(tracking_number, courier, status)
+        if pending:
+            created = self.db.create_packages([clean for _, clean in pending])
+            if created.get("success"):
+                for (row_number, _), stored in zip(pending, created["data"]):
+                    self._record_created(results, row_number, {"success": True, "data": stored})
+            else:
+                # The batch was rejected as a whole (e.g. a concurrent insert);
+                # retry row by row so the report points at the offending rows.
+                for row_number, clean in pending:
+                    self._record_created(results, row_number, self.db.create_package(**clean))
 
-    def update_package(self, id, updates: dict):
-        """Update package with validation."""
+        results.sort(key=lambda result: result["row"])
+        return results
+
+    def get_all_packages(self, limit=100, offset=0, after=None, owner=None):
+        """Retrieve all packages (or one owner's) with pagination (keyset via `after`, or offset)."""
+        return self.db.get_packages(limit=limit, offset=offset, after=after, owner=owner)
+
+    def get_package(self, id, owner=None):
+        """Get a single package by ID (read-through cache); other owners' packages are not found."""
+        cached = self.package_cache.get(id)
+        if cached is not None:
+            return self._owned_result(cached, owner)
+
+        result = self.db.get_package_by_id(id)
+        if result.get("success"):
+            self.package_cache.set(id, result["data"])
+            return self._owned_result(result["data"], owner)
+        return result
+
+    def _owned_result(self, row, owner):
+        # The cache is shared by every owner, so check on each read
+        if not owns(row, owner):
+            return {"success": False, "error": "Package not found"}
+        return {"success": True, "data": row}
+
+    def _split_cached(self, ids, owner=None):
+        """Serve what we can of a multi-get from the cache; return (cached rows by id, ids to fetch)."""
+        cached, missing = {}, []
+        for id in dict.fromkeys(ids):
+            row = self.package_cache.get(id)
+            if row is None:
+                missing.append(id)
+            elif owns(row, owner):
+                cached[id] = row
+        return cached, missing
+
+    def _batch_result(self, ids, cached, fetched, owner=None):
+        """Merge cached and fetched rows into a multi-get result in the order of `ids`."""
+        if not fetched.get("success"):
+            return fetched
+        for row in fetched["data"]:
+            self.package_cache.set(row["id"], row)
+            if owns(row, owner):
+                cached[row["id"]] = row
+        found = [cached[id] for id in dict.fromkeys(ids) if id in cached]
+        missing = [id for id in dict.fromkeys(ids) if id not in cached]
+        return {"success": True, "data": found, "missing": missing}
+
+    def get_packages_batch(self, ids, owner=None):
+        """Get several packages (of all or one owner's) by ID with at most one database query."""
+        cached, missing = self._split_cached(ids, owner)
+        fetched = self.db.get_packages_by_ids(missing) if missing else {"success": True, "data": []}
+        return self._batch_result(ids, cached, fetched, owner)
+
+    def _index_search(self, terms, status, limit, after, owner=None):
+        """Page through the search index; return (ids, next_cursor), or None if it cannot serve the query."""
+        index = self.search_index if owner is None else self.tenant_search.get(owner)
+        if not index.warmed or not any(terms.values()):
+            return None
+        if after is not None and after[0] is None:
+            after = (0, after[1])
+        page, more = index.search(terms, status=status, limit=limit or len(index) + 1, after=after)
+        next_cursor = encode_cursor(page[-1][1], rank=page[-1][0]) if more else None
+        return [id for _, id in page], next_cursor
+
+    def _index_search_result(self, terms, status, rows_result, next_cursor):
+        """Drop fetched rows that no longer match (changed by another process since indexing)."""
+        if not rows_result.get("success"):
+            return rows_result
+        rows = [row for row in rows_result["data"] if row_matches_search(row, status=status, **terms)]
+        return {"success": True, "data": rows, "next_cursor": next_cursor}
+
+    def search_packages(self, tracking_number=None, courier=None, status=None, destination=None, limit=None, after=None, owner=None):
+        """Search packages by criteria (read-through cache).
+
+        Substring filters are answered from the in-process n-gram index, with
+        exact and prefix matches ranked first; `after` is the (rank, id)
+        position decoded from the previous page's cursor. With `owner`, only
+        that owner's packages are searched and cached results are kept apart.
+        """
+        key = ((tracking_number, courier, status, destination), limit, after, owner)
+        cached = self.search_cache.get(key)
+        if cached is not None:
+            return cached
+
+        terms = {"tracking_number": tracking_number, "courier": courier, "destination": destination}
+        planned = self._index_search(terms, status, limit, after, owner)
+        if planned:
+            ids, next_cursor = planned
+            result = self._index_search_result(terms, status, self.db.get_packages_by_ids(ids), next_cursor)
+        else:
+            after_id = after[1] if after else None
+            result = self.db.search_packages(tracking_number, courier, status, destination, limit, after_id, owner)
+
+        if result.get("success"):
+            self._cache_search(key, result)
+        return result
+
+    def iter_packages(self, tracking_number=None, courier=None, status=None, destination=None, chunk_size=1000, owner=None):
+        """Yield search results over the whole table in id-keyset chunks, newest first.
+
+        Each item is a result dict; iteration stops after the last chunk or
+        the first failure. Bypasses the caches so exports do not evict them.
+        """
+        after = None
+        while True:
+            result = self.db.search_packages(tracking_number, courier, status, destination, chunk_size, after, owner)
+            yield result
+            if not result.get("success") or len(result["data"]) < chunk_size:
+                return
+            after = result["data"][-1]["id"]
+
+    def _prepare_updates(self, updates):
+        """Validate and normalise an update; return (updates, error)."""
         if not updates:
-            return {"success": False, "error": "No updates provided"}
+            return None, "No updates provided"
+        if "owner" in updates:
+            return None, "Owner cannot be changed"
 
         # Validate tracking number if being updated
         if "tracking_number" in updates:
             is_valid, error = self._validate_tracking_number(updates["tracking_number"])
             if not is_valid:
-                return {"success": False, "error": error}
+                return None, error
             updates["tracking_number"] = updates["tracking_number"].strip()
 
         # Validate courier if being updated
         if "courier" in updates:
             is_valid, error = self._validate_courier(updates["courier"])
             if not is_valid:
-                return {"success": False, "error": error}
+                return None, error
             updates["courier"] = updates["courier"].strip()
 
+        # Validate status if being updated
+        if "status" in updates:
+            is_valid, error = self._validate_status(updates["status"])
+            if not is_valid:
+                return None, error
+
         # Convert date if needed
         if "expected_delivery" in updates and isinstance(updates["expected_delivery"], date):
             updates["expected_delivery"] = updates["expected_delivery"].isoformat()
 
-        return self.db.update_package(id, updates)
+        return updates, None
+
+    def update_package(self, id, updates: dict, owner=None):
+        """Update package (if `owner` owns it) with validation."""
+        updates, error = self._prepare_updates(updates)
+        if error:
+            return {"success": False, "error": error}
+
+        result = self.db.update_package(id, updates, owner)
+        if result.get("success"):
+            self._on_updated(id, result["data"], result["previous_status"])
+        return result
+
+    def _prepare_bulk_update(self, updates, ids, tracking_numbers):
+        """Validate a bulk update and its targets; return ((updates, key, keys), error)."""
+        if (ids is None) == (tracking_numbers is None):
+            return None, "Provide either ids or tracking_numbers"
+        key, keys = ("id", ids) if ids is not None else ("tracking_number", [n.strip() for n in tracking_numbers])
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return None, f"No {key}s provided"
+        if len(keys) > BULK_MAX_ITEMS:
+            return None, f"At most {BULK_MAX_ITEMS} packages can be updated at once"
+        # Every target would end up with the same number
+        if updates and "tracking_number" in updates:
+            return None, "Tracking number cannot be changed in a bulk update"
+
+        updates, error = self._prepare_updates(updates)
+        if error:
+            return None, error
+        return (updates, key, keys), None
+
+    def _bulk_update_result(self, key, keys, result):
+        """Run the write hooks for a bulk update and report the outcome per requested id or number."""
+        if not result.get("success"):
+            return result
+
+        updated = {}
+        for row in result["data"]:
+            self._on_updated(row["id"], row, result["previous_statuses"][row["id"]])
+            updated[row[key]] = row
+        results = [
+            {key: k, "success": True, "data": updated[k]} if k in updated
+            else {key: k, "success": False, "error": "Package not found"}
+            for k in keys
+        ]
+        return {"success": True, "data": results, "updated": len(updated)}
+
+    def update_packages(self, updates: dict, ids=None, tracking_numbers=None, owner=None, expected_status=None):
+        """Apply one validated update to many packages (only those still in `expected_status`, when given) in a single statement."""
+        prepared, error = self._prepare_bulk_update(updates, ids, tracking_numbers)
+        if error:
+            return {"success": False, "error": error}
+
+        updates, key, keys = prepared
+        result = self.db.update_packages(updates, **{f"{key}s": keys}, owner=owner, expected_status=expected_status)
+        return self._bulk_update_result(key, keys, result)
+
+    def delete_package(self, id, owner=None):
+        """Delete a package by ID (if `owner` owns it)."""
+        result = self.db.delete_package(id, owner)
+        if result.get("success"):
+            self._on_deleted(id, result["data"])
+        return result
+
+
+class AsyncPackageManager(PackageManager):
+    """PackageManager whose database calls are coroutines.
+
+    Validation, indexes and caches are shared with PackageManager; only the
+    I/O-bound methods are overridden. Await `start()` once before serving.
+    """
+
+    def __init__(self, db=None):
+        self.db = db or AsyncDatabaseManager()
+        self._init_state()
+
+    async def start(self):
+        """Connect to the database, warm in-process indexes and start the history flusher."""
+        await self.db.connect()
+        await self.warm_indexes()
+        self._history_task = asyncio.create_task(self._flush_history_loop())
+
+    async def close(self):
+        """Stop background work, write buffered history and release the database client."""
+        self._history_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._history_task
+        await self.flush_history()
+        await self.db.close()
+
+    async def _flush_history_loop(self):
+        while True:
+            await asyncio.sleep(self.history_flush_seconds)
+            await self.flush_history()
+
+    async def flush_history(self):
+        """Append buffered status changes to the history log in batches; return how many were written."""
+        written = 0
+        while True:
+            events = self.history.drain(self.history_batch_size)
+            if not events:
+                return written
+            try:
+                result = await self.db.append_history(events)
+            except asyncio.CancelledError:
+                self.history.requeue()
+                raise
+            except BackendUnavailable:
+                self.history.requeue()
+                return written
+            if not result.get("success"):
+                self.history.requeue()
+                return written
+            self.history.done()
+            written += len(events)
 
-    def delete_package(self, id):
-        """Delete a package by ID."""
-        return self.db.delete_package(id)
\ No newline at end of file
+    async def get_package_history(self, id, owner=None):
+        """Return the status timeline of one package, oldest first."""
+        if owner is not None:
+            found = await self.get_package(id, owner)
+            if not found.get("success"):
+                return found
+        result = await self.db.get_package_history(id)
+        if not result.get("success"):
+            return result
+        return {"success": True, "data": merge_events(result["data"], self.history.pending_for(id))}
+
+    async def get_status_changes(self, since, until, limit=1000, owner=None):
+        """Return status changes of all packages (or one owner's) in [since, until) (epoch ms), oldest first."""
+        result = await self.db.get_history_between(since, until, limit, owner)
+        if not result.get("success"):
+            return result
+        pending = self.history.pending_between(since, until, owner)
+        return {"success": True, "data": merge_events(result["data"], pending, limit)}
+
+    async def follow_history(self, since, until, limit=WARM_PAGE_SIZE):
+        """Pick up status changes other processes logged in [since, until) (epoch ms); return the next `since`.
+
+        The tracking poller and the other workers write to the same store, so
+        packages named in the history log are re-read and, where their status
+        differs from the one this process last saw, run through the write
+        hooks: caches, counters, indexes and the change feed catch up. This
+        process's own changes already match and are skipped. Other edits and
+        deletes wait for the periodic `warm_indexes`.
+        """
+        try:
+            events = await self.db.get_history_between(since, until, limit)
+            if not events.get("success"):
+                return since
+            ids = list(dict.fromkeys(event["package_id"] for event in events["data"]))
+            fetched = await self.db.get_packages_by_ids(ids) if ids else {"success": True, "data": []}
+        except BackendUnavailable:
+            return since
+        if not fetched.get("success"):
+            return since
+        synced = self._synced(fetched)
+        if synced:
+            logger.info("Picked up %s status changes made by other processes", synced)
+        # A full page may end mid-millisecond; re-reading that millisecond is harmless
+        return max(events["data"][-1]["changed_at"], since + 1) if len(events["data"]) >= limit else until
+
+    async def _deadline_query(self, start, end, limit, after, owner):
+        planned = self._deadline_page(start, end, limit, after, owner)
+        if planned is None:
+            return {"success": False, "error": "Deadline index is not available yet"}
+        ids, next_cursor = planned
+        return self._deadline_result(start, end, await self.get_packages_batch(ids, owner), next_cursor)
+
+    async def get_overdue_packages(self, limit=100, after=None, today=None, owner=None):
+        """Open packages past their expected delivery, earliest deadline first."""
+        return await self._deadline_query(*self._overdue_window(today), limit, after, owner)
+
+    async def get_due_packages(self, within, limit=100, after=None, now=None, owner=None):
+        """Open packages due between today and `now + within` (a timedelta), earliest first."""
+        return await self._deadline_query(*self._due_window(within, now), limit, after, owner)
+
+    async def sweep_overdue(self, today=None):
+        """Mark open packages past their expected delivery as Delayed, in batches; return how many."""
+        today = today or date.today()
+        swept = 0
+        while ids := self._sweep_batch(today):
+            try:
+                result = await self.db.update_overdue_packages(
+                    {"status": OVERDUE_STATUS}, ids, today.isoformat(), CLOSED_STATUSES + (OVERDUE_STATUS,)
+                )
+            except BackendUnavailable:
+                break
+            marked = self._swept(ids, result)
+            if marked is None:
+                break
+            swept += marked
+        if swept:
+            logger.info("Marked %s overdue packages as %s", swept, OVERDUE_STATUS)
+        return swept
+
+    async def warm_indexes(self):
+        """Load the tracking-number and search indexes from one pass over the table."""
+        if not self._begin_rebuild():
+            return
+        try:
+            rows = await self._scan()
+            if rows is None:
+                return self._warm_failed()
+            self._warm(rows)
+        finally:
+            self._end_rebuild()
+
+    async def _scan(self):
+        """Read the index columns of every package, or None if the database failed."""
+        rows = []
+        after = 0
+        while True:
+            try:
+                page = await self.db.scan_packages(after=after, limit=WARM_PAGE_SIZE)
+            except BackendUnavailable:
+                return None
+            if not page.get("success"):
+                return None
+            rows.extend(map(self._index_fields, page["data"]))
+            if len(page["data"]) < WARM_PAGE_SIZE:
+                return rows
+            after = page["data"][-1]["id"]
+
+    async def _existing_tracking_numbers(self, tracking_numbers):
+        """Return which tracking numbers already exist, asking the database only about index hits."""
+        candidates = self._duplicate_candidates(tracking_numbers)
+        if not candidates:
+            return {"success": True, "data": set()}
+        return self._forget_stale(candidates, await self.db.find_existing_tracking_numbers(candidates))
+
+    async def add_package(self, tracking_number, courier, status, expected_delivery, origin, destination, notes=None, owner=None):
+        """Add a new package (owned by `owner`) with validation."""
+        row, error = self._prepare_package(tracking_number, courier, status, expected_delivery, origin, destination, notes, owner)
+        if error:
+            return {"success": False, "error": error}
+
+        existing = await self._existing_tracking_numbers([row["tracking_number"]])
+        if existing.get("success") and existing.get("data"):
+            return {"success": False, "error": "Tracking number already exists"}
+
+        result = await self.db.create_package(**row)
+        if result.get("success"):
+            self._on_created(result["data"])
+        return result
+
+    async def add_packages(self, rows, owner=None):
+        """Validate and insert a chunk of (row_number, row) pairs; return a per-row report."""
+        results, pending = self._split_chunk(rows, owner)
+
+        if pending:
+            existing = await self._existing_tracking_numbers([clean["tracking_number"] for _, clean in pending])
+            pending = self._drop_existing(results, pending, existing)
+
+        if pending:
+            created = await self.db.create_packages([clean for _, clean in pending])
+            if created.get("success"):
+                for (row_number, _), stored in zip(pending, created["data"]):
+                    self._record_created(results, row_number, {"success": True, "data": stored})
+            else:
+                for row_number, clean in pending:
+                    self._record_created(results, row_number, await self.db.create_package(**clean))
+
+        results.sort(key=lambda result: result["row"])
+        return results
+
+    async def get_all_packages(self, limit=100, offset=0, after=None, owner=None):
+        """Retrieve all packages (or one owner's) with pagination (keyset via `after`, or offset)."""
+        return await self.db.get_packages(limit=limit, offset=offset, after=after, owner=owner)
+
+    async def get_package(self, id, owner=None):
+        """Get a single package by ID (read-through cache); other owners' packages are not found."""
+        cached = self.package_cache.get(id)
+        if cached is not None:
+            return self._owned_result(cached, owner)
+
+        result = await self.db.get_package_by_id(id)
+        if result.get("success"):
+            self.package_cache.set(id, result["data"])
+            return self._owned_result(result["data"], owner)
+        return result
+
+    async def get_packages_batch(self, ids, owner=None):
+        """Get several packages (of all or one owner's) by ID with at most one database query."""
+        cached, missing = self._split_cached(ids, owner)
+        fetched = await self.db.get_packages_by_ids(missing) if missing else {"success": True, "data": []}
+        return self._batch_result(ids, cached, fetched, owner)
+
+    async def search_packages(self, tracking_number=None, courier=None, status=None, destination=None, limit=None, after=None, owner=None):
+        """Search packages (of all or one owner's) by criteria (read-through cache, n-gram index)."""
+        key = ((tracking_number, courier, status, destination), limit, after, owner)
+        cached = self.search_cache.get(key)
+        if cached is not None:
+            return cached
+
+        terms = {"tracking_number": tracking_number, "courier": courier, "destination": destination}
+        planned = self._index_search(terms, status, limit, after, owner)
+        if planned:
+            ids, next_cursor = planned
+            result = self._index_search_result(terms, status, await self.db.get_packages_by_ids(ids), next_cursor)
+        else:
+            after_id = after[1] if after else None
+            result = await self.db.search_packages(tracking_number, courier, status, destination, limit, after_id, owner)
+
+        if result.get("success"):
+            self._cache_search(key, result)
+        return result
+
+    async def iter_packages(self, tracking_number=None, courier=None, status=None, destination=None, chunk_size=1000, owner=None):
+        """Yield search results over the whole table in id-keyset chunks, newest first."""
+        after = None
+        while True:
+            result = await self.db.search_packages(tracking_number, courier, status, destination, chunk_size, after, owner)
+            yield result
+            if not result.get("success") or len(result["data"]) < chunk_size:
+                return
+            after = result["data"][-1]["id"]
+
+    async def update_package(self, id, updates: dict, owner=None):
+        """Update package (if `owner` owns it) with validation."""
+        updates, error = self._prepare_updates(updates)
+        if error:
+            return {"success": False, "error": error}
+
+        result = await self.db.update_package(id, updates, owner)
+        if result.get("success"):
+            self._on_updated(id, result["data"], result["previous_status"])
+        return result
+
+    async def update_packages(self, updates: dict, ids=None, tracking_numbers=None, owner=None, expected_status=None):
+        """Apply one validated update to many packages (only those still in `expected_status`, when given) in a single statement."""
+        prepared, error = self._prepare_bulk_update(updates, ids, tracking_numbers)
+        if error:
+            return {"success": False, "error": error}
+
+        updates, key, keys = prepared
+        result = await self.db.update_packages(updates, **{f"{key}s": keys}, owner=owner, expected_status=expected_status)
+        return self._bulk_update_result(key, keys, result)
+
+    async def delete_package(self, id, owner=None):
+        """Delete a package by ID (if `owner` owns it)."""
+        result = await self.db.delete_package(id, owner)
+        if result.get("success"):
+            self._on_deleted(id, result["data"])
+        return result
@@ -0,0 +1,199 @@
+import functools
+import inspect
+import math
+import time
+from bisect import bisect_left
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = tuple(64 * 4 ** i for i in range(10))  # 64 B .. 16 MiB
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Registry:
+    """Collection of metrics rendered together in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """Return every registered metric in the text exposition format."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.lines())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        registry.register(self)
+
+
+class Counter(_Metric):
+    """Monotonic count per label set.
+
+    Recording takes no lock: under the GIL a concurrent increment can very
+    occasionally be lost, which is an acceptable price for the hot path.
+    """
+
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        children = self._children
+        children[labels] = children.get(labels, 0) + amount
+
+    def lines(self):
+        for labels, value in list(self._children.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down."""
+
+    kind = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value, *labels):
+        self._children[labels] = value
+
+
+class _HistogramChild:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.sum = 0.0
+
+
+class Histogram(_Metric):
+    """Bucketed distribution per label set, with buckets allocated up front."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS, registry=REGISTRY):
+        super().__init__(name, help, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        child = self._children.get(labels)
+        if child is None:
+            child = self._children.setdefault(labels, _HistogramChild(len(self.buckets) + 1))
+        child.counts[bisect_left(self.buckets, value)] += 1
+        child.sum += value
+
+    def lines(self):
+        bounds = self.buckets + (math.inf,)
+        for labels, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, child.counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, ('le', _number(float(bound))))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(child.sum)}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Collected(_Metric):
+    """Metric whose samples are read from `collect()` at scrape time.
+
+    `collect` returns an iterable of (label values, value) pairs; use it
+    to expose counters that already live elsewhere, such as cache stats.
+    """
+
+    def __init__(self, name, help, kind, collect, labelnames=(), registry=REGISTRY):
+        self.kind = kind
+        self.collect = collect
+        super().__init__(name, help, labelnames, registry)
+
+    def lines(self):
+        for labels, value in self.collect():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+def _outcome(result):
+    if isinstance(result, dict) and result.get("success") is False:
+        return "not_found" if result.get("error") == "Package not found" else "error"
+    return "ok"
+
+
+def timed_methods(histogram, errors, methods):
+    """Class decorator timing the named `methods` into `histogram`, labelled by method name.
+
+    Raised exceptions and results of {"success": False} with anything but a
+    not-found error count towards `errors`. Coroutine methods are timed
+    until they complete, fail or are cancelled.
+    """
+    def wrap(name, method):
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    result = await method(*args, **kwargs)
+                except Exception:
+                    errors.inc(name)
+                    raise
+                finally:
+                    histogram.observe(time.perf_counter() - start, name)
+                if _outcome(result) == "error":
+                    errors.inc(name)
+                return result
+        else:
+            @functools.wraps(method)
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    result = method(*args, **kwargs)
+                except Exception:
+                    errors.inc(name)
+                    raise
+                finally:
+                    histogram.observe(time.perf_counter() - start, name)
+                if _outcome(result) == "error":
+                    errors.inc(name)
+                return result
+        return timed
+
+    def decorate(cls):
+        for name in methods:
+            setattr(cls, name, wrap(name, vars(cls)[name]))
+        return cls
+
+    return decorate
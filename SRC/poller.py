@@ -0,0 +1,212 @@
+"""Keep in-flight packages in step with their couriers.
+
+    COURIER_ENDPOINTS="UPS=http://127.0.0.1:9100/ups" python -m SRC.poller
+
+Runs as its own single process against the configured backend, next to
+the API workers rather than inside them, so each package is polled once.
+"""
+import asyncio
+import logging
+import os
+import time
+
+from SRC.couriers import RateLimited, adapters_from_env
+from SRC.logic import AsyncPackageManager, BULK_MAX_ITEMS, OVERDUE_STATUS
+from SRC.metrics import CONTENT_TYPE, REGISTRY, Counter
+from SRC.resilience import BackendUnavailable
+from SRC.statuses import STATUSES, CLOSED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_SECONDS = float(os.getenv("POLL_INTERVAL_SECONDS", "120"))
+POLLER_METRICS_PORT = int(os.getenv("POLLER_METRICS_PORT", "0"))
+RATE_LIMIT_RETRIES = 3
+
+POLL_REQUESTS = Counter("courier_poll_requests_total", "Tracking requests sent to couriers.", ("courier", "outcome"))
+POLLED = Counter("courier_polled_packages_total", "Packages whose status was looked up at their courier.", ("courier",))
+STATUS_CHANGES = Counter("courier_status_changes_total", "Status changes picked up from couriers and written.", ("courier",))
+
+
+def is_change(current, reported):
+    """True if a courier-reported status should replace the stored one."""
+    if reported == current or reported not in STATUSES:
+        return False
+    # The overdue sweeper would mark it Delayed again straight away
+    if current == OVERDUE_STATUS:
+        return reported in CLOSED_STATUSES
+    return True
+
+
+class TrackingPoller:
+    """Polls every in-flight package at its courier and writes the statuses that changed.
+
+    Packages come from the manager's in-process shipment index, grouped by
+    courier; delivered and cancelled ones are never polled. Couriers are
+    polled concurrently, each within its adapter's rate, batch size and
+    concurrency. Changes are written with `update_packages` in batches of up
+    to BULK_MAX_ITEMS per (seen, reported) status pair, conditional on the
+    stored status still being the one seen, so packages whose status moved
+    since the poll started are left alone. With `reconcile`, the manager's indexes are
+    reloaded before each cycle so writes by other processes are picked up.
+    """
+
+    def __init__(self, manager, adapters, interval=POLL_INTERVAL_SECONDS, write_batch=BULK_MAX_ITEMS, reconcile=False):
+        self.manager = manager
+        self.reconcile = reconcile
+        self.adapters = {adapter.name.lower(): adapter for adapter in adapters}
+        self.interval = interval
+        self.write_batch = min(write_batch, BULK_MAX_ITEMS)
+        self.last_cycle = None
+
+    async def close(self):
+        for adapter in self.adapters.values():
+            await adapter.close()
+
+    async def poll_once(self):
+        """Poll every in-flight package once; return counts for the cycle."""
+        start = time.monotonic()
+        groups = {}
+        unpolled = 0
+        for courier, shipments in self.manager.shipments.snapshot().items():
+            adapter = self.adapters.get(courier.strip().lower())
+            if adapter is None:
+                unpolled += len(shipments)
+            else:
+                groups.setdefault(adapter.name, []).extend(shipments)
+
+        pending = {}
+        counts = await asyncio.gather(*(
+            self._poll_courier(self.adapters[name.lower()], shipments, pending) for name, shipments in groups.items()
+        ))
+        written = sum(counts) + await self._flush(pending, final=True)
+
+        self.last_cycle = {
+            "packages": sum(len(shipments) for shipments in groups.values()),
+            "unpolled": unpolled,
+            "changed": written,
+            "seconds": round(time.monotonic() - start, 3),
+        }
+        logger.info("Polled %s packages in %.1fs, %s status changes", self.last_cycle["packages"],
+                    self.last_cycle["seconds"], written)
+        return self.last_cycle
+
+    async def run(self):
+        """Poll forever, starting a cycle every `interval` seconds (or right away if one ran long)."""
+        while True:
+            start = time.monotonic()
+            try:
+                if self.reconcile:
+                    await self.manager.warm_indexes()
+                await self.poll_once()
+            except Exception:
+                logger.exception("Tracking poll failed")
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - start)))
+
+    async def _poll_courier(self, adapter, shipments, pending):
+        """Poll one courier's packages with `adapter.concurrency` workers; return how many changes were written."""
+        size = adapter.batch_size
+        batches = iter([shipments[i:i + size] for i in range(0, len(shipments), size)])
+        written = 0
+        errors = []
+
+        async def worker():
+            nonlocal written
+            for batch in batches:
+                try:
+                    statuses = await self._fetch(adapter, [number for _, number, _ in batch])
+                except Exception as e:
+                    # The packages are polled again next cycle
+                    POLL_REQUESTS.inc(adapter.name, "error")
+                    errors.append(e)
+                    continue
+                if statuses is None:
+                    continue
+                POLLED.inc(adapter.name, amount=len(batch))
+                for id, number, status in batch:
+                    reported = statuses.get(number)
+                    if is_change(status, reported):
+                        pending.setdefault((status, reported), []).append((id, adapter.name))
+                written += await self._flush(pending)
+
+        await asyncio.gather(*(worker() for _ in range(adapter.concurrency)))
+        if errors:
+            logger.warning("Polling %s: %s requests failed, last error: %s", adapter.name, len(errors), errors[-1])
+        return written
+
+    async def _fetch(self, adapter, tracking_numbers):
+        """Look up one batch, waiting out the courier's rate limit; None if it stayed rate limited."""
+        for _ in range(RATE_LIMIT_RETRIES + 1):
+            await adapter.limit.acquire()
+            try:
+                statuses = await adapter.fetch(tracking_numbers)
+            except RateLimited as e:
+                POLL_REQUESTS.inc(adapter.name, "rate_limited")
+                adapter.limit.pause(e.retry_after)
+                continue
+            POLL_REQUESTS.inc(adapter.name, "ok")
+            return statuses
+        return None
+
+    async def _flush(self, pending, final=False):
+        """Write every full batch of pending changes (and partial ones if `final`); return how many were written."""
+        written = 0
+        for (seen, status), changes in list(pending.items()):
+            while len(changes) >= self.write_batch or (final and changes):
+                batch = changes[:self.write_batch]
+                del changes[:self.write_batch]
+                written += await self._write(seen, status, batch)
+        return written
+
+    async def _write(self, seen, status, changes):
+        # The database skips packages someone else moved off `seen` since the snapshot
+        try:
+            result = await self.manager.update_packages({"status": status}, ids=[id for id, _ in changes],
+                                                        expected_status=seen)
+        except BackendUnavailable as e:
+            logger.warning("Dropped %s status changes, backend unavailable: %s", len(changes), e)
+            return 0
+        if not result.get("success"):
+            logger.error("Writing %s status changes failed: %s", len(changes), result.get("error"))
+            return 0
+        updated = {item["id"] for item in result["data"] if item["success"]}
+        for id, courier in changes:
+            if id in updated:
+                STATUS_CHANGES.inc(courier)
+        return len(updated)
+
+
+async def _serve_metrics(reader, writer):
+    """Answer any HTTP request with the Prometheus metrics of this process."""
+    try:
+        await reader.readuntil(b"\r\n\r\n")
+        body = REGISTRY.render().encode()
+        writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: {CONTENT_TYPE}\r\nContent-Length: {len(body)}\r\n"
+                     "Connection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def main():
+    manager = AsyncPackageManager()
+    await manager.start()
+    poller = TrackingPoller(manager, adapters_from_env(), reconcile=True)
+    if not poller.adapters:
+        logger.error("No couriers configured; set COURIER_ENDPOINTS")
+    server = None
+    if POLLER_METRICS_PORT:
+        server = await asyncio.start_server(_serve_metrics, os.getenv("API_HOST", "0.0.0.0"), POLLER_METRICS_PORT)
+        logger.info("Serving poller metrics on port %s", POLLER_METRICS_PORT)
+    try:
+        await poller.run()
+    finally:
+        if server is not None:
+            server.close()
+        await poller.close()
+        await manager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# (phase, path fragment, function name prefix); the innermost match wins
+PHASES = (
+    ("serialization", os.path.join("API", "responses.py"), ""),
+    ("serialization", os.path.join("SRC", "export.py"), ""),
+    ("validation", os.path.join("SRC", "logic.py"), "_validate"),
+    ("validation", os.path.join("SRC", "logic.py"), "_prepare"),
+    ("validation", "pydantic", ""),
+    ("backend", os.path.join("SRC", "storage.py"), ""),
+    ("backend", "sqlite3", ""),
+    ("backend", "postgrest", ""),
+    ("backend", "httpx", ""),
+)
+
+# Innermost frames of threads that are parked rather than working
+IDLE = (
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    (os.path.join("concurrent", "futures", "thread.py"), "_worker"),
+)
+
+
+def _label(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _phase(code):
+    for phase, fragment, prefix in PHASES:
+        if fragment in code.co_filename and code.co_name.startswith(prefix):
+            return phase
+    return None
+
+
+class SamplingProfiler:
+    """Statistical profiler that samples every thread's stack on a timer.
+
+    Off by default and cheap to leave loaded; `start()` and `stop()` can be
+    called at runtime. Each sample is attributed to the innermost
+    serialization, validation or backend frame on the stack (or "other"),
+    which is usually enough to tell which of the three a slowdown lives in.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def reset(self):
+        """Discard collected samples."""
+        with self._lock:
+            self.samples = 0
+            self.self_counts = Counter()
+            self.total_counts = Counter()
+            self.phase_counts = Counter()
+            self.started_at = None
+
+    def start(self):
+        """Begin sampling in a background thread (no-op if already running)."""
+        if self.running:
+            return
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling; collected samples are kept until `reset()`."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self._sample(frame)
+
+    def _sample(self, frame):
+        code = frame.f_code
+        if any(code.co_filename.endswith(path) and code.co_name == name for path, name in IDLE):
+            return
+
+        seen = set()
+        phase = None
+        leaf = _label(code)
+        while frame is not None:
+            code = frame.f_code
+            seen.add(_label(code))
+            if phase is None:
+                phase = _phase(code)
+            frame = frame.f_back
+
+        with self._lock:
+            self.samples += 1
+            self.self_counts[leaf] += 1
+            self.total_counts.update(seen)
+            self.phase_counts[phase or "other"] += 1
+
+    def report(self, limit=25):
+        """Return sample counts by phase and the hottest functions."""
+        with self._lock:
+            return {
+                "running": self.running,
+                "started_at": self.started_at,
+                "interval": self.interval,
+                "samples": self.samples,
+                "phases": dict(self.phase_counts),
+                "self": self.self_counts.most_common(limit),
+                "total": self.total_counts.most_common(limit),
+            }
+
+
+profiler = SamplingProfiler(float(os.getenv("PROFILER_INTERVAL", "0.005")))
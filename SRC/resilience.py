@@ -0,0 +1,266 @@
+import asyncio
+import logging
+import math
+import os
+import random
+import sqlite3
+import time
+from collections import deque
+
+from SRC.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+RETRIES = Counter("db_retries_total", "Backend read attempts retried after a transient failure.", ("operation",))
+HEDGES = Counter("db_hedged_requests_total", "Duplicate backend reads sent because the first was slow.", ("operation",))
+DEADLINES = Counter("db_deadline_exceeded_total", "Backend calls that ran out of time.", ("operation",))
+REJECTED = Counter("db_breaker_rejections_total", "Backend calls refused while the circuit breaker was open.", ("operation",))
+
+
+class BackendUnavailable(Exception):
+    """The backend is failing or was not called because the circuit breaker is open."""
+
+    status_code = 503
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(BackendUnavailable):
+    """A backend call did not finish within its deadline."""
+
+    status_code = 504
+
+
+def is_transient(exc):
+    """True for failures worth retrying and counting against backend health."""
+    if isinstance(exc, (TimeoutError, ConnectionError, OSError)):
+        return True
+    if isinstance(exc, sqlite3.OperationalError):
+        return "locked" in str(exc) or "busy" in str(exc)
+    # httpx transport errors (connect/read timeouts, dropped connections) under supabase
+    return type(exc).__module__.startswith(("httpx", "httpcore"))
+
+
+class Policy:
+    """Deadline, per-attempt timeout, retry and hedging settings for one operation.
+
+    A `deadline` of None means the call is not idempotent: it runs to
+    completion exactly once, bounded only by the backend client's own
+    timeouts, because abandoning it would not stop the write landing.
+    """
+
+    def __init__(self, deadline, attempt_timeout=None, retries=0, hedge=False):
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout or deadline
+        self.retries = retries if deadline is not None else 0
+        self.hedge = hedge
+
+
+def default_policies():
+    """Build per-operation policies from DB_* environment variables."""
+    read = float(os.getenv("DB_READ_DEADLINE_MS", "3000")) / 1000
+    attempt = float(os.getenv("DB_READ_ATTEMPT_MS", "1000")) / 1000
+    bulk = float(os.getenv("DB_BULK_DEADLINE_MS", "30000")) / 1000
+    retries = int(os.getenv("DB_READ_RETRIES", "2"))
+    hedge = os.getenv("DB_HEDGE_READS", "true").lower() == "true"
+
+    policies = {
+        name: Policy(read, attempt, retries)
+        for name in ("get_many", "search", "statuses", "existing_tracking_numbers", "package_history", "history_between")
+    }
+    policies["get"] = Policy(read, attempt, retries, hedge)
+    policies["list"] = Policy(read, attempt, retries, hedge)
+    # Whole-table walks (index warm-up, export) page in large chunks
+    policies["scan"] = Policy(bulk, bulk / 3, retries)
+    policies["all_tracking_numbers"] = Policy(bulk, bulk, retries)
+    # Cancelling a write does not stop it committing, so writes get no client-side timeout
+    for name in ("insert", "insert_new", "update", "update_many", "update_overdue", "delete", "insert_history"):
+        policies[name] = Policy(None)
+    return policies
+
+
+class LatencyWindow:
+    """Recent successful latencies of one operation, for picking a hedge delay."""
+
+    def __init__(self, size=256, min_samples=20):
+        self._samples = deque(maxlen=size)
+        self.min_samples = min_samples
+        self._p95 = None
+        self._stale = 0
+
+    def record(self, seconds):
+        self._samples.append(seconds)
+        self._stale += 1
+
+    def p95(self):
+        """Return the 95th percentile, recomputed every 32 samples; None until warmed."""
+        if len(self._samples) < self.min_samples:
+            return None
+        if self._p95 is None or self._stale >= 32:
+            ordered = sorted(self._samples)
+            self._p95 = ordered[int(len(ordered) * 0.95) - 1]
+            self._stale = 0
+        return self._p95
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive transient failures and fails fast for `reset_after` seconds.
+
+    After that a single trial call is let through (half-open): success closes
+    the breaker, failure opens it again.
+    """
+
+    def __init__(self, threshold=5, reset_after=10.0):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def retry_after(self):
+        return max(1, round(self.reset_after - (time.monotonic() - self.opened_at)))
+
+    def allow(self):
+        """Return True if a call may go to the backend now."""
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_after:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        if self.state != "closed":
+            logger.warning("Circuit breaker closed; backend recovered")
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == "half_open" or (self.state == "closed" and self.failures >= self.threshold):
+            if self.state == "closed":
+                logger.error("Circuit breaker opened after %s consecutive backend failures", self.failures)
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """End a trial call that finished without an outcome (e.g. it was cancelled)."""
+        self._probing = False
+
+
+class ResilientStorage:
+    """Wraps an async storage backend with deadlines, retries, hedged reads and a circuit breaker.
+
+    Operations without a policy (connect, close) pass straight through.
+    Failures surface as BackendUnavailable / DeadlineExceeded; errors the
+    backend reports about the request itself (e.g. a unique violation) are
+    raised unchanged and do not count against the breaker.
+    """
+
+    def __init__(self, storage, policies=None, breaker=None, hedge_min=None):
+        self._storage = storage
+        self.policies = policies or default_policies()
+        self.breaker = breaker or CircuitBreaker(
+            threshold=int(os.getenv("DB_BREAKER_FAILURES", "5")),
+            reset_after=float(os.getenv("DB_BREAKER_RESET_SECONDS", "10")),
+        )
+        self.hedge_min = hedge_min if hedge_min is not None else float(os.getenv("DB_HEDGE_MIN_MS", "5")) / 1000
+        self.latency = {name: LatencyWindow() for name, policy in self.policies.items() if policy.hedge}
+
+    def __getattr__(self, name):
+        method = getattr(self._storage, name)
+        policy = self.policies.get(name)
+        if policy is None:
+            return method
+
+        async def call(*args, **kwargs):
+            return await self._call(name, policy, method, args, kwargs)
+
+        self.__dict__[name] = call
+        return call
+
+    async def _call(self, name, policy, method, args, kwargs):
+        if not self.breaker.allow():
+            REJECTED.inc(name)
+            raise BackendUnavailable("Database temporarily unavailable", self.breaker.retry_after())
+
+        probe = self.breaker.state == "half_open"
+        try:
+            return await self._attempts(name, policy, method, args, kwargs)
+        finally:
+            # A cancelled trial call records neither outcome; let the next call probe instead
+            if probe and self.breaker.state == "half_open":
+                self.breaker.release()
+
+    async def _attempts(self, name, policy, method, args, kwargs):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + policy.deadline if policy.deadline is not None else math.inf
+        attempt = 0
+        while True:
+            start = loop.time()
+            timeout = min(policy.attempt_timeout, deadline - start) if policy.deadline is not None else None
+            try:
+                if policy.hedge:
+                    result = await asyncio.wait_for(self._hedged(name, method, args, kwargs), timeout)
+                else:
+                    result = await asyncio.wait_for(method(*args, **kwargs), timeout)
+            except Exception as e:
+                if not is_transient(e):
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                attempt += 1
+                backoff = random.uniform(0, min(1.0, 0.05 * 2 ** attempt))
+                if attempt > policy.retries or loop.time() + backoff >= deadline or not self.breaker.allow():
+                    if isinstance(e, TimeoutError):
+                        DEADLINES.inc(name)
+                        raise DeadlineExceeded(f"Database did not respond in time ({name})") from e
+                    raise BackendUnavailable(f"Database unavailable ({name}): {e}", self.breaker.retry_after()) from e
+                RETRIES.inc(name)
+                await asyncio.sleep(backoff)
+                continue
+
+            self.breaker.record_success()
+            if policy.hedge:
+                self.latency[name].record(loop.time() - start)
+            return result
+
+    async def _hedged(self, name, method, args, kwargs):
+        """Run a read; if it outlasts the recent p95, race a duplicate and keep the first success."""
+        delay = self.latency[name].p95()
+        first = asyncio.ensure_future(method(*args, **kwargs))
+        if delay is None:
+            return await first
+
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=max(delay, self.hedge_min))
+            if not done:
+                HEDGES.inc(name)
+                tasks.add(asyncio.ensure_future(method(*args, **kwargs)))
+            while True:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                succeeded = [task for task in done if task.exception() is None]
+                if succeeded:
+                    return succeeded[0].result()
+                if not tasks:
+                    return done.pop().result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self):
+        """Return breaker state and current hedge delays."""
+        return {
+            "breaker": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "hedge_delay_ms": {name: round(window.p95() * 1000, 2) if window.p95() is not None else None
+                               for name, window in self.latency.items()},
+        }
@@ -0,0 +1,90 @@
+import threading
+from collections import Counter
+from datetime import date
+
+from SRC.statuses import CLOSED_STATUSES
+
+
+class PackageStats:
+    """Package counts by status and courier, maintained incrementally.
+
+    Every create/update/delete adjusts the counters from the package's
+    previous and new (status, courier, expected_delivery), so reading them
+    never touches the database. Overdue counts are derived from open
+    packages grouped by delivery date, which stays small however many
+    packages there are. `rebuild()` reconciles against a full table scan.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._packages = {}
+        self._by_status = Counter()
+        self._by_courier = Counter()
+        self._open_by_due = Counter()
+        self.warmed = False
+
+    def _key(self, row):
+        return row.get("status"), row.get("courier"), row.get("expected_delivery")
+
+    def _apply(self, key, delta):
+        status, courier, expected_delivery = key
+        self._by_status[status] += delta
+        self._by_courier[courier] += delta
+        if status not in CLOSED_STATUSES and expected_delivery:
+            self._open_by_due[(expected_delivery, courier)] += delta
+
+    def rebuild(self, rows):
+        """Replace all counters with those computed from `rows`."""
+        packages = {row["id"]: self._key(row) for row in rows}
+        with self._lock:
+            self._packages = packages
+            self._by_status = Counter()
+            self._by_courier = Counter()
+            self._open_by_due = Counter()
+            for key in packages.values():
+                self._apply(key, 1)
+            self.warmed = True
+
+    def record(self, row):
+        """Count a created or updated package."""
+        key = self._key(row)
+        with self._lock:
+            previous = self._packages.get(row["id"])
+            if previous == key:
+                return
+            if previous is not None:
+                self._apply(previous, -1)
+            self._packages[row["id"]] = key
+            self._apply(key, 1)
+
+    def remove(self, id):
+        """Stop counting a deleted package."""
+        with self._lock:
+            previous = self._packages.pop(id, None)
+            if previous is not None:
+                self._apply(previous, -1)
+
+    # Same interface as the in-process indexes, so counters can be partitioned per owner
+    warm = rebuild
+    add = record
+
+    def status_of(self, id):
+        """Return the last status counted for a package, or None if unknown."""
+        key = self._packages.get(id)
+        return key[0] if key else None
+
+    def snapshot(self, today=None):
+        """Return total, per-status, per-courier and overdue counts."""
+        today = (today or date.today()).isoformat()
+        with self._lock:
+            overdue_by_courier = Counter()
+            for (expected_delivery, courier), count in self._open_by_due.items():
+                if expected_delivery < today:
+                    overdue_by_courier[courier] += count
+            return {
+                "total": len(self._packages),
+                "by_status": {status: count for status, count in self._by_status.items() if count},
+                "by_courier": {courier: count for courier, count in self._by_courier.items() if count},
+                "overdue": sum(overdue_by_courier.values()),
+                "overdue_by_courier": {courier: count for courier, count in overdue_by_courier.items() if count},
+            }
@@ -0,0 +1,7 @@
+STATUSES = ("Pending", "In Transit", "Out for Delivery", "Delivered", "Delayed", "Cancelled")
+
+# Packages in these states never change again
+CLOSED_STATUSES = ("Delivered", "Cancelled")
+
+# Compact integer codes used by the status history log
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
@@ -0,0 +1,712 @@
+import asyncio
+import functools
+import os
+import sqlite3
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_COLUMNS = (
+    "tracking_number",
+    "courier",
+    "status",
+    "expected_delivery",
+    "origin",
+    "destination",
+    "notes",
+)
+
+# Set once on insert; updates never change a package's owner
+INSERT_COLUMNS = PACKAGE_COLUMNS + ("owner",)
+
+
+class _SupabaseQueries:
+    """PostgREST query builders shared by the sync and async Supabase backends."""
+
+    page_size = 1000
+
+    def _table(self):
+        return self.client.table("packages")
+
+    def _insert_query(self, rows):
+        return self._table().insert(rows)
+
+    def _insert_new_query(self, rows):
+        return self._table().upsert(rows, on_conflict="tracking_number", ignore_duplicates=True)
+
+    def _statuses_query(self, ids, tracking_numbers):
+        key, keys = ("id", ids) if ids is not None else ("tracking_number", tracking_numbers)
+        return self._table().select("id,status").in_(key, list(keys))
+
+    def _existing_query(self, tracking_numbers):
+        return self._table().select("tracking_number").in_("tracking_number", list(tracking_numbers))
+
+    def _tracking_numbers_page_query(self, last_id):
+        return (
+            self._table()
+            .select("id, tracking_number")
+            .gt("id", last_id)
+            .order("id")
+            .limit(self.page_size)
+        )
+
+    def _owned(self, query, owner):
+        return query.eq("owner", owner) if owner is not None else query
+
+    def _list_query(self, limit, offset, after, owner):
+        query = self._owned(self._table().select("*"), owner)
+        if after is not None:
+            query = query.lt("id", after)
+        query = query.order("id", desc=True).limit(limit)
+        if offset:
+            query = query.offset(offset)
+        return query
+
+    def _get_query(self, id):
+        return self._table().select("*").eq("id", id)
+
+    def _get_many_query(self, ids):
+        return self._table().select("*").in_("id", list(ids))
+
+    def _scan_query(self, after, limit):
+        return self._table().select("*").gt("id", after).order("id").limit(limit)
+
+    def _search_query(self, tracking_number, courier, status, destination, limit, after, owner):
+        query = self._owned(self._table().select("*"), owner)
+        if tracking_number:
+            query = query.ilike("tracking_number", f"%{tracking_number}%")
+        if courier:
+            query = query.ilike("courier", f"%{courier}%")
+        if destination:
+            query = query.ilike("destination", f"%{destination}%")
+        if status:
+            query = query.eq("status", status)
+        if after is not None:
+            query = query.lt("id", after)
+        query = query.order("id", desc=True)
+        if limit:
+            query = query.limit(limit)
+        return query
+
+    def _update_query(self, id, updates, owner):
+        return self._owned(self._table().update(updates).eq("id", id), owner)
+
+    def _update_many_query(self, updates, ids, tracking_numbers, owner, expected_status=None):
+        query = self._owned(self._table().update(updates), owner)
+        if expected_status is not None:
+            query = query.eq("status", expected_status)
+        if ids is not None:
+            return query.in_("id", list(ids))
+        return query.in_("tracking_number", list(tracking_numbers))
+
+    def _update_overdue_query(self, updates, ids, before, skip_statuses):
+        return (
+            self._table()
+            .update(updates)
+            .in_("id", list(ids))
+            .lt("expected_delivery", before)
+            .not_.in_("status", list(skip_statuses))
+        )
+
+    def _delete_query(self, id, owner):
+        return self._owned(self._table().delete().eq("id", id), owner)
+
+    def _history_table(self):
+        return self.client.table("package_history")
+
+    def _history_insert_query(self, events):
+        return self._history_table().insert(events)
+
+    def _package_history_query(self, package_id):
+        return (
+            self._history_table()
+            .select("*")
+            .eq("package_id", package_id)
+            .order("changed_at")
+            .order("id")
+        )
+
+    def _history_between_query(self, since, until, limit, owner):
+        return (
+            self._owned(self._history_table().select("*"), owner)
+            .gte("changed_at", since)
+            .lt("changed_at", until)
+            .order("changed_at")
+            .order("id")
+            .limit(limit)
+        )
+
+
+class SupabaseStorage(_SupabaseQueries):
+    """Remote storage backed by the Supabase `packages` table."""
+
+    def __init__(self, url, key):
+        from supabase import create_client
+
+        self.client = create_client(url, key)
+
+    def insert(self, rows):
+        """Insert one or more rows and return them as stored."""
+        return self._insert_query(rows).execute().data
+
+    def insert_new(self, rows):
+        """Insert rows in one statement, skipping tracking numbers that already exist; return those inserted."""
+        return self._insert_new_query(rows).execute().data
+
+    def statuses(self, ids=None, tracking_numbers=None):
+        """Return {id: status} of the rows selected by id or tracking number."""
+        return {row["id"]: row["status"] for row in self._statuses_query(ids, tracking_numbers).execute().data}
+
+    def existing_tracking_numbers(self, tracking_numbers):
+        """Return the subset of tracking numbers that are already stored."""
+        if not tracking_numbers:
+            return set()
+        response = self._existing_query(tracking_numbers).execute()
+        return {row["tracking_number"] for row in response.data}
+
+    def iter_tracking_numbers(self):
+        """Yield every stored tracking number, paging through the table by id."""
+        last_id = 0
+        while True:
+            rows = self._tracking_numbers_page_query(last_id).execute().data
+            for row in rows:
+                yield row["tracking_number"]
+            if len(rows) < self.page_size:
+                return
+            last_id = rows[-1]["id"]
+
+    def all_tracking_numbers(self):
+        """Return every stored tracking number."""
+        return list(self.iter_tracking_numbers())
+
+    def list(self, limit, offset, after=None, owner=None):
+        """Return rows newest first, optionally only those with id below `after` or of one owner."""
+        return self._list_query(limit, offset, after, owner).execute().data
+
+    def get(self, id):
+        """Return a single row or None."""
+        rows = self._get_query(id).execute().data
+        return rows[0] if rows else None
+
+    def get_many(self, ids):
+        """Return the rows with the given ids, in the order the ids were given."""
+        if not ids:
+            return []
+        by_id = {row["id"]: row for row in self._get_many_query(ids).execute().data}
+        return [by_id[id] for id in ids if id in by_id]
+
+    def scan(self, after=0, limit=1000):
+        """Return up to `limit` rows with id above `after`, oldest first."""
+        return self._scan_query(after, limit).execute().data
+
+    def search(self, tracking_number=None, courier=None, status=None, destination=None, limit=None, after=None, owner=None):
+        """Return rows matching the given filters, newest first."""
+        return self._search_query(tracking_number, courier, status, destination, limit, after, owner).execute().data
+
+    def update(self, id, updates, owner=None):
+        """Apply updates to a row and return it, or None if it does not exist (or has another owner)."""
+        rows = self._update_query(id, updates, owner).execute().data
+        return rows[0] if rows else None
+
+    def update_many(self, updates, ids=None, tracking_numbers=None, owner=None, expected_status=None):
+        """Apply the same updates to every row selected by id or tracking number (and still in `expected_status`, when given); return them."""
+        return self._update_many_query(updates, ids, tracking_numbers, owner, expected_status).execute().data
+
+    def update_overdue(self, updates, ids, before, skip_statuses):
+        """Update the given rows still due before `before` and not in `skip_statuses`; return them."""
+        return self._update_overdue_query(updates, ids, before, skip_statuses).execute().data
+
+    def delete(self, id, owner=None):
+        """Delete a row and return it, or None if it did not exist (or has another owner)."""
+        rows = self._delete_query(id, owner).execute().data
+        return rows[0] if rows else None
+
+    def insert_history(self, events):
+        """Append status-change events in one multi-row insert."""
+        self._history_insert_query(events).execute()
+
+    def package_history(self, package_id):
+        """Return a package's status-change events, oldest first."""
+        return self._package_history_query(package_id).execute().data
+
+    def history_between(self, since, until, limit, owner=None):
+        """Return events (of all packages or one owner's) with since <= changed_at < until (epoch ms), oldest first."""
+        return self._history_between_query(since, until, limit, owner).execute().data
+
+
+class AsyncSupabaseStorage(_SupabaseQueries):
+    """Non-blocking Supabase backend; one shared HTTP connection pool per process."""
+
+    def __init__(self, url, key):
+        self.url = url
+        self.key = key
+        self.client = None
+
+    async def connect(self):
+        """Create the async client (and its connection pool) once."""
+        if self.client is None:
+            from supabase import acreate_client
+
+            self.client = await acreate_client(self.url, self.key)
+
+    async def close(self):
+        """Nothing to release beyond the client itself."""
+        self.client = None
+
+    async def insert(self, rows):
+        """Insert one or more rows and return them as stored."""
+        return (await self._insert_query(rows).execute()).data
+
+    async def insert_new(self, rows):
+        """Insert rows in one statement, skipping tracking numbers that already exist; return those inserted."""
+        return (await self._insert_new_query(rows).execute()).data
+
+    async def statuses(self, ids=None, tracking_numbers=None):
+        """Return {id: status} of the rows selected by id or tracking number."""
+        response = await self._statuses_query(ids, tracking_numbers).execute()
+        return {row["id"]: row["status"] for row in response.data}
+
+    async def existing_tracking_numbers(self, tracking_numbers):
+        """Return the subset of tracking numbers that are already stored."""
+        if not tracking_numbers:
+            return set()
+        response = await self._existing_query(tracking_numbers).execute()
+        return {row["tracking_number"] for row in response.data}
+
+    async def all_tracking_numbers(self):
+        """Return every stored tracking number, paging through the table by id."""
+        numbers = []
+        last_id = 0
+        while True:
+            rows = (await self._tracking_numbers_page_query(last_id).execute()).data
+            numbers.extend(row["tracking_number"] for row in rows)
+            if len(rows) < self.page_size:
+                return numbers
+            last_id = rows[-1]["id"]
+
+    async def list(self, limit, offset, after=None, owner=None):
+        """Return rows newest first, optionally only those with id below `after` or of one owner."""
+        return (await self._list_query(limit, offset, after, owner).execute()).data
+
+    async def get(self, id):
+        """Return a single row or None."""
+        rows = (await self._get_query(id).execute()).data
+        return rows[0] if rows else None
+
+    async def get_many(self, ids):
+        """Return the rows with the given ids, in the order the ids were given."""
+        if not ids:
+            return []
+        by_id = {row["id"]: row for row in (await self._get_many_query(ids).execute()).data}
+        return [by_id[id] for id in ids if id in by_id]
+
+    async def scan(self, after=0, limit=1000):
+        """Return up to `limit` rows with id above `after`, oldest first."""
+        return (await self._scan_query(after, limit).execute()).data
+
+    async def search(self, tracking_number=None, courier=None, status=None, destination=None, limit=None, after=None, owner=None):
+        """Return rows matching the given filters, newest first."""
+        return (await self._search_query(tracking_number, courier, status, destination, limit, after, owner).execute()).data
+
+    async def update(self, id, updates, owner=None):
+        """Apply updates to a row and return it, or None if it does not exist (or has another owner)."""
+        rows = (await self._update_query(id, updates, owner).execute()).data
+        return rows[0] if rows else None
+
+    async def update_many(self, updates, ids=None, tracking_numbers=None, owner=None, expected_status=None):
+        """Apply the same updates to every row selected by id or tracking number (and still in `expected_status`, when given); return them."""
+        return (await self._update_many_query(updates, ids, tracking_numbers, owner, expected_status).execute()).data
+
+    async def update_overdue(self, updates, ids, before, skip_statuses):
+        """Update the given rows still due before `before` and not in `skip_statuses`; return them."""
+        return (await self._update_overdue_query(updates, ids, before, skip_statuses).execute()).data
+
+    async def delete(self, id, owner=None):
+        """Delete a row and return it, or None if it did not exist (or has another owner)."""
+        rows = (await self._delete_query(id, owner).execute()).data
+        return rows[0] if rows else None
+
+    async def insert_history(self, events):
+        """Append status-change events in one multi-row insert."""
+        await self._history_insert_query(events).execute()
+
+    async def package_history(self, package_id):
+        """Return a package's status-change events, oldest first."""
+        return (await self._package_history_query(package_id).execute()).data
+
+    async def history_between(self, since, until, limit, owner=None):
+        """Return events (of all packages or one owner's) with since <= changed_at < until (epoch ms), oldest first."""
+        return (await self._history_between_query(since, until, limit, owner).execute()).data
+
+
+def _owned(clauses, params, owner):
+    """Add an owner filter to SQL WHERE clauses unless `owner` is None."""
+    if owner is not None:
+        clauses.insert(0, "owner = ?")
+        params.insert(0, owner)
+    return clauses, params
+
+
+class SQLiteStorage:
+    """Embedded storage in a local SQLite file (WAL mode, indexed)."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS packages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tracking_number TEXT UNIQUE NOT NULL,
+            courier TEXT NOT NULL,
+            status TEXT DEFAULT 'Pending',
+            expected_delivery TEXT,
+            origin TEXT,
+            destination TEXT,
+            notes TEXT,
+            owner TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_packages_status ON packages (status, id);
+        CREATE INDEX IF NOT EXISTS idx_packages_courier ON packages (courier, id);
+        CREATE INDEX IF NOT EXISTS idx_packages_due ON packages (expected_delivery, id)
+            WHERE status NOT IN ('Delivered', 'Cancelled');
+        CREATE TABLE IF NOT EXISTS package_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            package_id INTEGER NOT NULL,
+            status_code INTEGER NOT NULL,
+            changed_at INTEGER NOT NULL,
+            owner TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_history_package ON package_history (package_id, changed_at);
+        CREATE INDEX IF NOT EXISTS idx_history_changed_at ON package_history (changed_at);
+    """
+
+    # Lead with owner so a tenant's lists and searches only read that tenant's rows
+    OWNER_INDEXES = """
+        CREATE INDEX IF NOT EXISTS idx_packages_owner ON packages (owner, id);
+        CREATE INDEX IF NOT EXISTS idx_packages_owner_status ON packages (owner, status, id);
+        CREATE INDEX IF NOT EXISTS idx_packages_owner_courier ON packages (owner, courier, id);
+        CREATE INDEX IF NOT EXISTS idx_history_owner ON package_history (owner, changed_at);
+    """
+
+    def __init__(self, path="packages.db"):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        # Files created before packages had owners
+        for table in ("packages", "package_history"):
+            if "owner" not in {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN owner TEXT")
+        conn.executescript(self.OWNER_INDEXES)
+
+    def _conn(self):
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def insert(self, rows):
+        """Insert one or more rows and return them as stored."""
+        if isinstance(rows, dict):
+            rows = [rows]
+        conn = self._conn()
+        placeholders = ", ".join("?" for _ in INSERT_COLUMNS)
+        sql = (
+            f"INSERT INTO packages ({', '.join(INSERT_COLUMNS)}) "
+            f"VALUES ({placeholders}) RETURNING *"
+        )
+        inserted = []
+        conn.execute("BEGIN")
+        try:
+            for row in rows:
+                values = [row.get(column) for column in INSERT_COLUMNS]
+                if values[2] is None:
+                    values[2] = "Pending"
+                inserted.append(dict(conn.execute(sql, values).fetchone()))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return inserted
+
+    def insert_new(self, rows):
+        """Insert rows in one transaction, skipping tracking numbers that already exist; return those inserted."""
+        placeholders = ", ".join("?" for _ in INSERT_COLUMNS)
+        sql = (
+            f"INSERT INTO packages ({', '.join(INSERT_COLUMNS)}) VALUES ({placeholders}) "
+            "ON CONFLICT (tracking_number) DO NOTHING RETURNING *"
+        )
+        conn = self._conn()
+        inserted = []
+        conn.execute("BEGIN")
+        try:
+            for row in rows:
+                values = [row.get(column) for column in INSERT_COLUMNS]
+                if values[2] is None:
+                    values[2] = "Pending"
+                stored = conn.execute(sql, values).fetchone()
+                if stored is not None:
+                    inserted.append(dict(stored))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return inserted
+
+    def existing_tracking_numbers(self, tracking_numbers):
+        """Return the subset of tracking numbers that are already stored."""
+        tracking_numbers = list(tracking_numbers)
+        found = set()
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(tracking_numbers), 900):
+            batch = tracking_numbers[start:start + 900]
+            placeholders = ", ".join("?" for _ in batch)
+            cursor = self._conn().execute(
+                f"SELECT tracking_number FROM packages WHERE tracking_number IN ({placeholders})",
+                batch,
+            )
+            found.update(row[0] for row in cursor)
+        return found
+
+    def statuses(self, ids=None, tracking_numbers=None):
+        """Return {id: status} of the rows selected by id or tracking number."""
+        key, keys = ("id", list(ids)) if ids is not None else ("tracking_number", list(tracking_numbers))
+        found = {}
+        for start in range(0, len(keys), 900):
+            batch = keys[start:start + 900]
+            cursor = self._conn().execute(
+                f"SELECT id, status FROM packages WHERE {key} IN ({', '.join('?' for _ in batch)})", batch
+            )
+            found.update((row["id"], row["status"]) for row in cursor)
+        return found
+
+    def iter_tracking_numbers(self):
+        """Yield every stored tracking number."""
+        cursor = self._conn().execute("SELECT tracking_number FROM packages")
+        for row in cursor:
+            yield row[0]
+
+    def all_tracking_numbers(self):
+        """Return every stored tracking number."""
+        return list(self.iter_tracking_numbers())
+
+    def list(self, limit, offset, after=None, owner=None):
+        """Return rows newest first, optionally only those with id below `after` or of one owner."""
+        clauses, params = _owned([], [], owner)
+        if after is not None:
+            clauses.append("id < ?")
+            params.append(after)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        cursor = self._conn().execute(
+            f"SELECT * FROM packages{where} ORDER BY id DESC LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        )
+        return [dict(row) for row in cursor]
+
+    def get(self, id):
+        """Return a single row or None."""
+        row = self._conn().execute("SELECT * FROM packages WHERE id = ?", (id,)).fetchone()
+        return dict(row) if row else None
+
+    def get_many(self, ids):
+        """Return the rows with the given ids, in the order the ids were given."""
+        ids = list(ids)
+        by_id = {}
+        for start in range(0, len(ids), 900):
+            batch = ids[start:start + 900]
+            placeholders = ", ".join("?" for _ in batch)
+            cursor = self._conn().execute(f"SELECT * FROM packages WHERE id IN ({placeholders})", batch)
+            by_id.update((row["id"], dict(row)) for row in cursor)
+        return [by_id[id] for id in ids if id in by_id]
+
+    def scan(self, after=0, limit=1000):
+        """Return up to `limit` rows with id above `after`, oldest first."""
+        cursor = self._conn().execute(
+            "SELECT * FROM packages WHERE id > ? ORDER BY id LIMIT ?", (after, limit)
+        )
+        return [dict(row) for row in cursor]
+
+    def search(self, tracking_number=None, courier=None, status=None, destination=None, limit=None, after=None, owner=None):
+        """Return rows matching the given filters, newest first."""
+        clauses, params = _owned([], [], owner)
+        if tracking_number:
+            clauses.append("tracking_number LIKE ?")
+            params.append(f"%{tracking_number}%")
+        if courier:
+            clauses.append("courier LIKE ?")
+            params.append(f"%{courier}%")
+        if destination:
+            clauses.append("destination LIKE ?")
+            params.append(f"%{destination}%")
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if after is not None:
+            clauses.append("id < ?")
+            params.append(after)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT * FROM packages{where} ORDER BY id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        cursor = self._conn().execute(sql, params)
+        return [dict(row) for row in cursor]
+
+    def update(self, id, updates, owner=None):
+        """Apply updates to a row and return it, or None if it does not exist (or has another owner)."""
+        columns = [column for column in updates if column in PACKAGE_COLUMNS]
+        if not columns:
+            row = self.get(id)
+            return row if row and owner in (None, row["owner"]) else None
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        clauses, params = _owned(["id = ?"], [id], owner)
+        row = self._conn().execute(
+            f"UPDATE packages SET {assignments} WHERE {' AND '.join(clauses)} RETURNING *",
+            [updates[column] for column in columns] + params,
+        ).fetchone()
+        return dict(row) if row else None
+
+    def update_many(self, updates, ids=None, tracking_numbers=None, owner=None, expected_status=None):
+        """Apply the same updates to every row selected by id or tracking number (and still in `expected_status`, when given); return them."""
+        columns = [column for column in updates if column in PACKAGE_COLUMNS]
+        key, keys = ("id", list(ids)) if ids is not None else ("tracking_number", list(tracking_numbers))
+        if not columns or not keys:
+            return []
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        placeholders = ", ".join("?" for _ in keys)
+        clauses, params = _owned([f"{key} IN ({placeholders})"], keys, owner)
+        if expected_status is not None:
+            clauses.append("status = ?")
+            params.append(expected_status)
+        cursor = self._conn().execute(
+            f"UPDATE packages SET {assignments} WHERE {' AND '.join(clauses)} RETURNING *",
+            [updates[column] for column in columns] + params,
+        )
+        return [dict(row) for row in cursor]
+
+    def update_overdue(self, updates, ids, before, skip_statuses):
+        """Update the given rows still due before `before` and not in `skip_statuses`; return them."""
+        columns = [column for column in updates if column in PACKAGE_COLUMNS]
+        ids, skip_statuses = list(ids), list(skip_statuses)
+        if not columns or not ids:
+            return []
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        cursor = self._conn().execute(
+            f"UPDATE packages SET {assignments} WHERE id IN ({', '.join('?' for _ in ids)}) "
+            f"AND expected_delivery < ? AND status NOT IN ({', '.join('?' for _ in skip_statuses)}) RETURNING *",
+            [updates[column] for column in columns] + ids + [before] + skip_statuses,
+        )
+        return [dict(row) for row in cursor]
+
+    def delete(self, id, owner=None):
+        """Delete a row and return it, or None if it did not exist (or has another owner)."""
+        clauses, params = _owned(["id = ?"], [id], owner)
+        row = self._conn().execute(f"DELETE FROM packages WHERE {' AND '.join(clauses)} RETURNING *", params).fetchone()
+        return dict(row) if row else None
+
+    def insert_history(self, events):
+        """Append status-change events in one transaction."""
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT INTO package_history (package_id, status_code, changed_at, owner) VALUES (?, ?, ?, ?)",
+                [(event["package_id"], event["status_code"], event["changed_at"], event.get("owner"))
+                 for event in events],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def package_history(self, package_id):
+        """Return a package's status-change events, oldest first."""
+        cursor = self._conn().execute(
+            "SELECT * FROM package_history WHERE package_id = ? ORDER BY changed_at, id",
+            (package_id,),
+        )
+        return [dict(row) for row in cursor]
+
+    def history_between(self, since, until, limit, owner=None):
+        """Return events (of all packages or one owner's) with since <= changed_at < until (epoch ms), oldest first."""
+        clauses, params = _owned(["changed_at >= ?", "changed_at < ?"], [since, until], owner)
+        cursor = self._conn().execute(
+            f"SELECT * FROM package_history WHERE {' AND '.join(clauses)} ORDER BY changed_at, id LIMIT ?",
+            params + [limit],
+        )
+        return [dict(row) for row in cursor]
+
+
+class AsyncSQLiteStorage:
+    """Async facade over SQLiteStorage.
+
+    Calls run on a dedicated thread pool; each worker thread keeps its own
+    connection, so the pool doubles as a connection pool. Every public
+    SQLiteStorage method is available as a coroutine.
+    """
+
+    def __init__(self, path="packages.db", pool_size=8):
+        self._storage = SQLiteStorage(path)
+        self._pool_size = pool_size
+        self._executor = None
+
+    async def connect(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._pool_size, thread_name_prefix="sqlite")
+
+    async def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __getattr__(self, name):
+        method = getattr(self._storage, name)
+
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(method, *args, **kwargs))
+
+        return call
+
+
+def _supabase_credentials():
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_KEY")
+    if not url or not key:
+        raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment variables")
+    return url, key
+
+
+def get_storage():
+    """Build the storage backend selected by DATABASE_BACKEND (supabase or sqlite)."""
+    backend = os.getenv("DATABASE_BACKEND", "supabase").lower()
+
+    if backend == "sqlite":
+        path = os.getenv("SQLITE_PATH", "packages.db")
+        logger.info("Using embedded SQLite storage at %s", path)
+        return SQLiteStorage(path)
+
+    if backend == "supabase":
+        return SupabaseStorage(*_supabase_credentials())
+
+    raise ValueError(f"Unknown DATABASE_BACKEND: {backend}")
+
+
+def get_async_storage():
+    """Build the async counterpart of the backend selected by DATABASE_BACKEND."""
+    backend = os.getenv("DATABASE_BACKEND", "supabase").lower()
+
+    if backend == "sqlite":
+        path = os.getenv("SQLITE_PATH", "packages.db")
+        pool_size = int(os.getenv("SQLITE_POOL_SIZE", "8"))
+        logger.info("Using embedded SQLite storage at %s (async, %s connections)", path, pool_size)
+        return AsyncSQLiteStorage(path, pool_size)
+
+    if backend == "supabase":
+        return AsyncSupabaseStorage(*_supabase_credentials())
+
+    raise ValueError(f"Unknown DATABASE_BACKEND: {backend}")
@@ -0,0 +1,59 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SRC.storage import SQLiteStorage
+
+
+def package_row(n, **fields):
+    """A valid package row numbered `n`; keyword arguments override columns."""
+    row = {
+        "tracking_number": f"TN{n:06d}",
+        "courier": "UPS",
+        "status": "Pending",
+        "expected_delivery": "2030-01-01",
+        "origin": "New York, NY",
+        "destination": "Los Angeles, CA",
+        "notes": None,
+    }
+    row.update(fields)
+    return row
+
+
+@pytest.fixture
+def make_row():
+    return package_row
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return SQLiteStorage(str(tmp_path / "packages.db"))
+
+
+@pytest.fixture
+def manager(storage):
+    from SRC.db import DatabaseManager
+    from SRC.logic import PackageManager
+
+    manager = PackageManager(DatabaseManager(storage))
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """The API served in-process against a fresh SQLite file, background jobs off."""
+    from fastapi.testclient import TestClient
+
+    import API.main
+
+    monkeypatch.setenv("DATABASE_BACKEND", "sqlite")
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "api.db"))
+    monkeypatch.setattr(API.main, "ANALYTICS_ENABLED", False)
+    monkeypatch.setattr(API.main, "SWEEP_SECONDS", 0)
+    monkeypatch.setattr(API.main, "CHANGE_SYNC_SECONDS", 0)
+    with TestClient(API.main.app) as client:
+        yield client
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from API.admission import (AdmissionControl, AdmissionMiddleware, ConcurrencyLimiter, RateLimiter, Rejected,
+                           TokenBucket, client_id)
+
+
+def scope(path="/packages", method="GET", peer="10.0.0.9", headers=()):
+    return {"type": "http", "method": method, "path": path, "client": (peer, 5000),
+            "headers": [(name.encode(), value.encode()) for name, value in headers]}
+
+
+def call(middleware, request):
+    """Run one request through `middleware`; return the response status and headers."""
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        await middleware(request, receive, send)
+
+    asyncio.run(run())
+    return sent[0]["status"], dict(sent[0]["headers"])
+
+
+async def ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def test_token_bucket_refills_at_its_rate():
+    bucket = TokenBucket(rate=2, burst=2, now=0)
+
+    assert bucket.take(0) == 0
+    assert bucket.take(0) == 0
+    assert bucket.take(0) == pytest.approx(0.5)
+    assert bucket.take(0.5) == 0
+
+
+def test_rate_limiter_applies_per_client_overrides():
+    limiter = RateLimiter(rate=1, burst=1, overrides={"etl": (1, 3)})
+
+    assert limiter.check("alice") == 0
+    assert limiter.check("alice") > 0
+    assert [limiter.check("etl") for _ in range(3)] == [0, 0, 0]
+    assert limiter.stats()["limited"] == 1
+
+
+def test_full_queue_is_refused_and_waiters_time_out():
+    limiter = ConcurrencyLimiter(limit=1, queue=1, max_wait=0.01)
+
+    async def run():
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(Rejected) as full:
+            await limiter.acquire()
+        with pytest.raises(Rejected) as timeout:
+            await waiter
+        return full.value.reason, timeout.value.reason
+
+    assert asyncio.run(run()) == ("queue_full", "queue_timeout")
+    assert limiter.stats()["queued"] == 0
+
+
+def test_released_slot_goes_to_the_oldest_waiter():
+    limiter = ConcurrencyLimiter(limit=1, queue=2, max_wait=1)
+
+    async def run():
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.release()
+        await waiter
+        return limiter.stats()
+
+    assert asyncio.run(run())["active"] == 1
+
+
+def test_client_id_ignores_the_header_from_untrusted_callers():
+    spoofed = scope(headers=[("x-client-id", "streamlit")])
+
+    assert client_id(spoofed) == "10.0.0.9"
+    assert client_id(spoofed, user="alice") == "alice"
+    assert client_id(spoofed, trusted={"10.0.0.9"}) == "streamlit"
+    assert client_id(spoofed, user="gateway", trusted={"gateway"}) == "streamlit"
+
+
+def test_middleware_answers_429_over_the_rate():
+    control = AdmissionControl(limits={}, rate_limiter=RateLimiter(rate=1, burst=1, overrides={"streamlit": (100, 100)}))
+    middleware = AdmissionMiddleware(ok, control, trusted=set())
+    request = scope(headers=[("x-client-id", "streamlit")])
+
+    assert call(middleware, request)[0] == 200
+    status, headers = call(middleware, request)
+
+    assert status == 429
+    assert headers[b"retry-after"] == b"1"
+
+
+def test_middleware_keys_on_the_identified_user():
+    async def identify(scope):
+        return dict(scope["headers"]).get(b"authorization", b"").decode() or None
+
+    control = AdmissionControl(limits={}, rate_limiter=RateLimiter(rate=1, burst=1))
+    middleware = AdmissionMiddleware(ok, control, identify=identify, trusted=set())
+
+    assert call(middleware, scope(headers=[("authorization", "alice")]))[0] == 200
+    assert call(middleware, scope(headers=[("authorization", "bob")]))[0] == 200
+    assert call(middleware, scope(headers=[("authorization", "alice")]))[0] == 429
+
+
+def test_middleware_answers_503_when_the_class_is_full():
+    control = AdmissionControl(limits={"writes": (0, 0, 0)}, rate_limiter=RateLimiter(rate=0, burst=0))
+    middleware = AdmissionMiddleware(ok, control, trusted=set())
+
+    status, headers = call(middleware, scope(method="POST"))
+
+    assert status == 503
+    assert b"retry-after" in headers
+    assert call(middleware, scope(path="/health/live"))[0] == 200
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from SRC.analytics import DeliveryAnalytics
+from SRC.resilience import BackendUnavailable
+from SRC.statuses import STATUS_CODES
+
+
+def test_reports_are_memoized_per_version():
+    analytics = DeliveryAnalytics()
+    builds = []
+
+    def report():
+        builds.append(analytics.version)
+        return analytics.version
+
+    assert analytics._memoized(("summary", 30), report)["data"] == 0
+    assert analytics._memoized(("summary", 30), report)["data"] == 0
+    analytics.version += 1
+    assert analytics._memoized(("summary", 30), report)["data"] == 1
+    assert builds == [0, 1]
+
+
+def test_memo_is_bounded():
+    analytics = DeliveryAnalytics(max_reports=4)
+
+    for days in range(100):
+        analytics._memoized(("daily", days, None), lambda: [])
+
+    assert len(analytics._reports._entries) == 4
+
+
+class FlakyDatabase:
+    """One package, a queue of status events, and a package scan that can be made to fail."""
+
+    def __init__(self):
+        self.events = []
+        self.scan_fails = False
+
+    def get_history_between(self, since, until, limit):
+        return {"success": True, "data": [event for event in self.events if event["changed_at"] >= since][:limit]}
+
+    def scan_packages(self, after, limit):
+        if self.scan_fails:
+            return {"success": False, "error": "database unavailable"}
+        row = {"id": 1, "courier": "UPS", "origin": "Oslo", "destination": "Bergen", "status": "Pending",
+               "expected_delivery": "2026-01-02"}
+        return {"success": True, "data": [row] if after < 1 else []}
+
+
+class FlakyAsyncDatabase(FlakyDatabase):
+    async def get_history_between(self, since, until, limit):
+        return super().get_history_between(since, until, limit)
+
+    async def scan_packages(self, after, limit):
+        if self.scan_fails:
+            raise BackendUnavailable("database unavailable")
+        return super().scan_packages(after, limit)
+
+
+def delivered(db):
+    db.events.append({"id": 1, "package_id": 1, "status_code": STATUS_CODES["Delivered"], "changed_at": 1000})
+
+
+def test_events_survive_a_failed_package_scan():
+    analytics, db = DeliveryAnalytics(), FlakyDatabase()
+    assert analytics.refresh(db)
+
+    delivered(db)
+    db.scan_fails = True
+    assert not analytics.refresh(db)
+    db.scan_fails = False
+    assert analytics.refresh(db)
+
+    assert analytics._columns["status"][0] == STATUS_CODES["Delivered"]
+    assert analytics._columns["delivered_ms"][0] == 1000
+
+
+def test_events_survive_an_unavailable_backend():
+    analytics, db = DeliveryAnalytics(), FlakyAsyncDatabase()
+    asyncio.run(analytics.refresh_async(db))
+
+    delivered(db)
+    db.scan_fails = True
+    with pytest.raises(BackendUnavailable):
+        asyncio.run(analytics.refresh_async(db))
+    db.scan_fails = False
+    assert asyncio.run(analytics.refresh_async(db))
+
+    assert analytics._columns["status"][0] == STATUS_CODES["Delivered"]
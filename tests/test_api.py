@@ -0,0 +1,24 @@
+def test_update_with_invalid_status_is_a_bad_request(client, make_row):
+    id = client.post("/packages/", json=make_row(1)).json()["data"]["id"]
+
+    response = client.put(f"/packages/{id}", json={"status": "Bogus"})
+
+    assert response.status_code == 400
+    assert "Unknown status" in response.json()["detail"]
+    assert client.get(f"/packages/{id}").json()["data"]["status"] == "Pending"
+
+
+def test_update_of_missing_package_is_not_found(client):
+    response = client.put("/packages/999", json={"status": "Delivered"})
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Package not found"
+
+
+def test_update_returns_the_package_and_its_previous_status(client, make_row):
+    id = client.post("/packages/", json=make_row(1)).json()["data"]["id"]
+
+    body = client.put(f"/packages/{id}", json={"status": "Delivered"}).json()
+
+    assert body["data"]["status"] == "Delivered"
+    assert body["previous_status"] == "Pending"
@@ -0,0 +1,58 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from API.auth import CachedVerifier, InvalidToken, StaticTokens, SupabaseTokens
+
+
+def supabase_answering(response):
+    tokens = SupabaseTokens("https://auth.example", "anon")
+    tokens._client = httpx.AsyncClient(base_url="https://auth.example",
+                                       transport=httpx.MockTransport(lambda request: response))
+    return tokens
+
+
+def verify(tokens, token="t0ken"):
+    async def run():
+        try:
+            return await tokens.verify(token)
+        finally:
+            await tokens.close()
+
+    return asyncio.run(run())
+
+
+def test_supabase_user_id_is_returned():
+    assert verify(supabase_answering(httpx.Response(200, json={"id": "alice"}))) == "alice"
+
+
+@pytest.mark.parametrize("response", [
+    httpx.Response(200, json={"email": "alice@example.com"}),
+    httpx.Response(200, json=["alice"]),
+    httpx.Response(200, text="<html>maintenance</html>"),
+    httpx.Response(401, json={"msg": "expired"}),
+])
+def test_supabase_answers_without_a_user_are_invalid_tokens(response):
+    with pytest.raises(InvalidToken):
+        verify(supabase_answering(response))
+
+
+@pytest.fixture
+def api():
+    from API.main import app, authenticate
+
+    saved = authenticate.mode, authenticate.verifier, authenticate.admins
+    authenticate.mode = "tokens"
+    authenticate.verifier = CachedVerifier(StaticTokens({"root": "alice", "user": "bob"}))
+    authenticate.admins = {"alice"}
+    yield TestClient(app)
+    authenticate.mode, authenticate.verifier, authenticate.admins = saved
+
+
+@pytest.mark.parametrize("path", ["/debug/admission", "/debug/profile"])
+def test_debug_routes_require_an_admin(api, path):
+    assert api.get(path).status_code == 401
+    assert api.get(path, headers={"Authorization": "Bearer user"}).status_code == 403
+    assert api.get(path, headers={"Authorization": "Bearer root"}).status_code != 403
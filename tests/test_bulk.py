@@ -0,0 +1,56 @@
+from SRC.bulk import BulkRowParser
+
+
+def test_parser_splits_chunks_on_line_boundaries():
+    parser = BulkRowParser("ndjson")
+
+    rows = parser.feed(b'{"tracking_number": "A"}\n{"tracking_nu')
+    rows += parser.feed(b'mber": "B"}\nnot json\n[1]')
+    rows += parser.close()
+
+    assert [(number, row) for number, row, _ in rows[:2]] == [(1, {"tracking_number": "A"}), (2, {"tracking_number": "B"})]
+    assert rows[2][2].startswith("Invalid JSON")
+    assert rows[3][2] == "Each line must be a JSON object"
+
+
+def test_parser_reads_csv_with_header():
+    parser = BulkRowParser("csv")
+
+    rows = parser.feed("tracking_number,courier\nA,UPS\nB\n") + parser.close()
+
+    assert rows[0] == (1, {"tracking_number": "A", "courier": "UPS"}, None)
+    assert rows[1][2] == "Expected 2 columns, got 1"
+
+
+def test_add_packages_reports_each_row(manager, make_row):
+    manager.add_package(**make_row(1))
+
+    results = manager.add_packages([
+        (1, make_row(2)),
+        (2, make_row(1)),
+        (3, make_row(2)),
+        (4, make_row(3, status="Lost")),
+        (5, make_row(4, expected_delivery="soon")),
+    ])
+
+    assert [result["success"] for result in results] == [True, False, False, False, False]
+    assert results[1]["error"] == "Tracking number already exists"
+    assert results[2]["error"] == "Duplicate tracking number in upload"
+    assert results[3]["error"].startswith("Unknown status")
+    assert results[4]["error"] == "expected_delivery must be a YYYY-MM-DD date"
+
+
+def test_add_packages_rejects_non_text_values_per_row(manager, make_row):
+    results = manager.add_packages([
+        (1, make_row(1, tracking_number=12345)),
+        (2, make_row(2, courier=None)),
+        (3, make_row(3, origin={"city": "Boston"})),
+        (4, make_row(4, destination=["Boston"])),
+        (5, make_row(5, notes=True)),
+    ])
+
+    assert results[0]["success"] and manager.get_package(results[0]["id"])["data"]["tracking_number"] == "12345"
+    assert results[1]["error"] == "Courier name cannot be empty"
+    assert results[2]["error"] == "origin must be a string"
+    assert results[3]["error"] == "destination must be a string"
+    assert results[4]["error"] == "notes must be a string"
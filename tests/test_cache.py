@@ -0,0 +1,73 @@
+from SRC.cache import LRUCache
+
+
+def test_lru_eviction_and_ttl():
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+    expired = LRUCache(ttl=0)
+    expired.set("a", 1)
+    assert expired.get("a") is None
+
+
+def test_tags_drop_only_their_entries():
+    cache = LRUCache()
+    cache.set("first", 1, tags=[("id", 1), ("owner", None)])
+    cache.set("second", 2, tags=[("id", 2), ("owner", None)])
+    cache.set("bob", 3, tags=[("owner", "bob")])
+
+    cache.invalidate_tag(("id", 1))
+    assert cache.get("first") is None
+    assert cache.get("second") == 2
+
+    seen = []
+    cache.invalidate_where(lambda key, value: seen.append(key) or True, tag=("owner", "bob"))
+    assert seen == ["bob"]
+    assert cache.get("bob") is None
+    assert cache.get("second") == 2
+
+
+def test_evicted_entries_leave_no_tags_behind():
+    cache = LRUCache(maxsize=1)
+    cache.set("a", 1, tags=["x"])
+    cache.set("b", 2, tags=["y"])
+
+    assert cache._tagged == {"y": {"b"}}
+
+
+def test_writes_invalidate_cached_packages(manager, make_row):
+    id = manager.add_package(**make_row(1))["data"]["id"]
+    assert manager.get_package(id)["data"]["status"] == "Pending"
+
+    manager.update_package(id, {"status": "In Transit"})
+    assert manager.get_package(id)["data"]["status"] == "In Transit"
+
+    manager.delete_package(id)
+    assert not manager.get_package(id)["success"]
+
+
+def test_writes_invalidate_cached_searches(manager, make_row):
+    spring = manager.add_package(**make_row(1, destination="Springfield, IL"))["data"]["id"]
+    manager.add_package(**make_row(2, destination="Boston, MA"))
+    other = manager.search_packages(destination="boston")
+
+    def springfield():
+        return sorted(row["tracking_number"] for row in manager.search_packages(destination="spring")["data"])
+
+    assert springfield() == ["TN000001"]
+    # A new match, an edit of a cached result and a delete each drop the cached search
+    manager.add_package(**make_row(3, destination="Springfield, MO"))
+    assert springfield() == ["TN000001", "TN000003"]
+    manager.update_package(spring, {"destination": "Chicago, IL"})
+    assert springfield() == ["TN000003"]
+    manager.delete_package(manager.search_packages(destination="spring")["data"][0]["id"])
+    assert springfield() == []
+    # Searches the writes could not affect stay cached
+    assert manager.search_packages(destination="boston") is other
@@ -0,0 +1,24 @@
+import pytest
+
+pytest.importorskip("requests")
+
+from FRONTEND.client import ApiClient  # noqa: E402
+
+
+def test_response_cache_is_bounded():
+    client = ApiClient("http://api.example", cache_size=2)
+    for n in range(5):
+        client._store(client._key("/packages/search/", {"destination": f"city {n}"}), {"n": n}, None)
+
+    assert len(client._cache) == 2
+    assert client._cached(client._key("/packages/search/", {"destination": "city 4"}))["data"] == {"n": 4}
+    assert client._cached(client._key("/packages/search/", {"destination": "city 0"})) is None
+
+
+def test_unconfirmed_responses_are_forgotten():
+    client = ApiClient("http://api.example", cache_ttl=0, cache_keep=0)
+    key = client._key("/packages/", None)
+    client._store(key, {"data": []}, '"etag"')
+
+    assert client._cached(key) is None
+    assert not client._cache
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from SRC.coalescer import WriteCoalescer
+from SRC.resilience import BackendUnavailable
+
+
+def run_batch(coalescer, items):
+    """Submit `items` concurrently; return each caller's result or exception."""
+    async def run():
+        return await asyncio.gather(*(coalescer.submit(item) for item in items), return_exceptions=True)
+
+    return asyncio.run(run())
+
+
+def test_items_share_one_flush():
+    calls = []
+
+    async def flush(items):
+        calls.append(list(items))
+        return [item * 10 for item in items]
+
+    coalescer = WriteCoalescer(flush)
+
+    assert run_batch(coalescer, [1, 2, 3]) == [10, 20, 30]
+    assert calls == [[1, 2, 3]]
+
+
+def test_failed_batch_is_retried_one_by_one():
+    async def flush(items):
+        if "bad" in items:
+            raise ValueError("bad row")
+        return [item.upper() for item in items]
+
+    coalescer = WriteCoalescer(flush)
+
+    first, bad, last = run_batch(coalescer, ["a", "bad", "c"])
+
+    assert (first, last) == ("A", "C")
+    assert isinstance(bad, ValueError)
+    assert coalescer.stats()["splits"] == 1
+
+
+def test_shared_errors_fail_the_whole_batch():
+    calls = []
+
+    async def flush(items):
+        calls.append(list(items))
+        raise BackendUnavailable("down")
+
+    coalescer = WriteCoalescer(flush, shared_errors=(BackendUnavailable,))
+
+    results = run_batch(coalescer, [1, 2])
+
+    assert all(isinstance(result, BackendUnavailable) for result in results)
+    assert calls == [[1, 2]]
+
+
+def test_callers_are_cancelled_when_the_batch_task_is():
+    started = None
+
+    async def flush(items):
+        started.set()
+        await asyncio.sleep(10)
+
+    coalescer = WriteCoalescer(flush)
+
+    async def run():
+        nonlocal started
+        started = asyncio.Event()
+        caller = asyncio.ensure_future(coalescer.submit(1, key="a"))
+        await started.wait()
+        for task in list(coalescer._tasks):
+            task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(caller, timeout=1)
+        # The key is released, so the next write to it is not stuck behind the cancelled batch
+        assert not coalescer._busy
+
+    asyncio.run(run())
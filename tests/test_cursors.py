@@ -0,0 +1,50 @@
+import pytest
+
+from SRC.cursors import decode_cursor, decode_ranked_cursor, encode_cursor, next_cursor
+from SRC.db import DatabaseManager
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(42)) == 42
+    assert decode_ranked_cursor(encode_cursor(42, rank=1)) == (1, 42)
+    assert decode_ranked_cursor(encode_cursor(42)) == (None, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", encode_cursor("42"), "eyJyYW5rIjoxfQ"])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_next_cursor_only_on_full_pages():
+    rows = [{"id": 5}, {"id": 4}]
+
+    assert decode_cursor(next_cursor(rows, 2)) == 4
+    assert next_cursor(rows, 3) is None
+    assert next_cursor([], 0) is None
+
+
+def test_keyset_pages_cover_every_row_once(storage, make_row):
+    storage.insert([make_row(n) for n in range(1, 12)])
+    db = DatabaseManager(storage)
+
+    seen, after = [], None
+    while True:
+        page = db.get_packages(limit=4, after=after)
+        seen.extend(row["id"] for row in page["data"])
+        if page["next_cursor"] is None:
+            break
+        after = decode_cursor(page["next_cursor"])
+
+    assert seen == list(range(11, 0, -1))
+
+
+def test_keyset_page_is_stable_under_inserts(storage, make_row):
+    storage.insert([make_row(n) for n in range(1, 6)])
+    db = DatabaseManager(storage)
+    first = db.get_packages(limit=2)
+
+    storage.insert(make_row(6))
+    second = db.get_packages(limit=2, after=decode_cursor(first["next_cursor"]))
+
+    assert [row["id"] for row in second["data"]] == [3, 2]
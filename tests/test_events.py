@@ -0,0 +1,47 @@
+import asyncio
+
+from SRC.events import ChangeFeed
+
+
+def package(id, status="Pending"):
+    return {"id": id, "status": status, "courier": "UPS"}
+
+
+def subscribe(feed, last_event_id):
+    async def run():
+        subscription, missed = feed.subscribe(last_event_id=last_event_id)
+        subscription.close()
+        return missed
+
+    return asyncio.run(run())
+
+
+def test_resume_after_last_seen_event():
+    feed = ChangeFeed()
+    feed.publish("created", package(1))
+    feed.publish("created", package(2))
+    first = f"{feed.epoch}-1"
+
+    missed = subscribe(feed, first)
+
+    assert [event["package"]["id"] for event in missed] == [2]
+    assert missed[0]["id"] == f"{feed.epoch}-2"
+
+
+def test_id_from_another_epoch_resets():
+    old, feed = ChangeFeed(), ChangeFeed()
+    old.publish("created", package(1))
+    feed.publish("created", package(1))
+    feed.publish("created", package(2))
+
+    assert subscribe(feed, f"{old.epoch}-1") is None
+    assert subscribe(feed, "1") is None
+
+
+def test_evicted_id_resets():
+    feed = ChangeFeed(backlog=2)
+    for id in range(1, 5):
+        feed.publish("created", package(id))
+
+    assert subscribe(feed, f"{feed.epoch}-1") is None
+    assert [event["package"]["id"] for event in subscribe(feed, f"{feed.epoch}-2")] == [3, 4]
@@ -0,0 +1,51 @@
+import csv
+import io
+import json
+import sys
+
+import pytest
+
+from SRC.export import EXPORT_COLUMNS, get_encoder
+
+
+def create(client, make_row, count):
+    for n in range(1, count + 1):
+        assert client.post("/packages/", json=make_row(n, destination=f"City {n}, ST")).status_code == 200
+
+
+def test_ndjson_export_streams_every_chunk(client, make_row):
+    create(client, make_row, 5)
+
+    response = client.get("/packages/export", params={"format": "ndjson", "chunk_size": 2})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(row["tracking_number"] for row in rows) == [f"TN{n:06d}" for n in range(1, 6)]
+
+
+def test_csv_export_has_one_header_and_filters(client, make_row):
+    create(client, make_row, 3)
+
+    response = client.get("/packages/export", params={"format": "csv", "destination": "city 2", "chunk_size": 1})
+
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == "attachment; filename=packages.csv"
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert tuple(header) == EXPORT_COLUMNS
+    assert [row[1] for row in rows] == ["TN000002"]
+
+
+def test_unknown_format_is_rejected(client):
+    assert client.get("/packages/export", params={"format": "xml"}).status_code == 422
+    with pytest.raises(ValueError, match="Unsupported export format"):
+        get_encoder("xml")
+
+
+def test_arrow_without_pyarrow_is_a_client_error(client, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+
+    response = client.get("/packages/export", params={"format": "arrow"})
+
+    assert response.status_code == 400
+    assert "pyarrow" in response.json()["detail"]
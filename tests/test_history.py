@@ -0,0 +1,47 @@
+from SRC.history import HistoryBuffer
+from SRC.statuses import STATUSES
+
+
+def statuses(manager, id):
+    return [event["status"] for event in manager.get_package_history(id)["data"]]
+
+
+def test_status_changes_are_recorded_once(manager, make_row):
+    id = manager.add_package(**make_row(1))["data"]["id"]
+
+    manager.update_package(id, {"status": "In Transit"})
+    manager.update_package(id, {"notes": "Left at depot"})
+    manager.update_package(id, {"status": "In Transit"})
+
+    assert statuses(manager, id) == ["Pending", "In Transit"]
+
+
+def test_previous_status_comes_from_the_database(manager, make_row):
+    row = manager.add_package(**make_row(1))["data"]
+    # Another worker's update made this process's counters think it was already delivered
+    manager.stats.record({**row, "status": "Delivered"})
+
+    result = manager.update_package(row["id"], {"status": "Delivered"})
+
+    assert result["previous_status"] == "Pending"
+    assert statuses(manager, row["id"]) == ["Pending", "Delivered"]
+
+
+def test_bulk_update_records_only_real_transitions(manager, make_row):
+    moving = manager.add_package(**make_row(1))["data"]["id"]
+    arrived = manager.add_package(**make_row(2, status="Delivered"))["data"]["id"]
+
+    result = manager.update_packages({"status": "Delivered"}, ids=[moving, arrived])
+
+    assert result["updated"] == 2
+    assert statuses(manager, moving) == ["Pending", "Delivered"]
+    assert statuses(manager, arrived) == ["Delivered"]
+
+
+def test_unknown_status_is_skipped():
+    history = HistoryBuffer()
+
+    history.record(1, "Lost in space")
+    history.record(1, "Delivered")
+
+    assert [STATUSES[event["status_code"]] for event in history.pending_for(1)] == ["Delivered"]
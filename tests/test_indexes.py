@@ -0,0 +1,63 @@
+def write_during_scan(manager, write):
+    """Make the next warm_indexes() call `write()` right after reading its first page."""
+    scan_packages = manager.db.scan_packages
+
+    def scan(after=0, limit=1000):
+        page = scan_packages(after=after, limit=limit)
+        if after == 0:
+            write()
+        return page
+
+    manager.db.scan_packages = scan
+
+
+def test_search_and_duplicate_check_from_index(manager, make_row):
+    manager.add_package(**make_row(1, destination="Springfield, IL"))
+    manager.add_package(**make_row(2, destination="Boston, MA"))
+
+    assert [row["id"] for row in manager.search_packages(destination="spring")["data"]] == [1]
+    assert manager.add_package(**make_row(1))["error"] == "Tracking number already exists"
+
+
+def test_writes_during_rebuild_survive_the_swap(manager, make_row):
+    doomed = manager.add_package(**make_row(1, destination="Springfield, IL"))["data"]
+
+    def write():
+        manager.add_package(**make_row(2, destination="Springfield, MO"))
+        manager.delete_package(doomed["id"])
+
+    write_during_scan(manager, write)
+    manager.warm_indexes()
+
+    assert "TN000001" not in manager.tracking_numbers
+    assert "TN000002" in manager.tracking_numbers
+    assert [row["tracking_number"] for row in manager.search_packages(destination="spring")["data"]] == ["TN000002"]
+
+
+def test_failed_rebuild_does_not_block_the_next_one(manager, make_row):
+    manager.db.scan_packages = lambda after=0, limit=1000: {"success": False, "error": "down"}
+    manager.warm_indexes()
+    del manager.db.scan_packages
+    manager.add_package(**make_row(1))
+
+    manager.warm_indexes()
+
+    assert manager._rebuild_writes is None
+    assert len(manager.search_index) == 1
+
+
+def test_counters_and_deadlines_keep_writes_made_during_rebuild(manager, make_row):
+    first = manager.add_package(**make_row(1, expected_delivery="2020-01-01"))["data"]
+
+    def write():
+        manager.update_package(first["id"], {"status": "Delivered"})
+        manager.add_package(**make_row(2, expected_delivery="2020-01-02"))
+
+    write_during_scan(manager, write)
+    manager.warm_indexes()
+
+    stats = manager.package_stats()["data"]
+    assert stats["by_status"] == {"Delivered": 1, "Pending": 1}
+    assert stats["overdue"] == 1
+    assert [row["tracking_number"] for row in manager.get_overdue_packages()["data"]] == ["TN000002"]
+    assert [id for id, _, _ in manager.shipments.snapshot()["UPS"]] == [2]
@@ -0,0 +1,84 @@
+import json
+import logging
+import queue
+import sys
+
+import pytest
+
+from SRC import logging_config
+from SRC.logging_config import JsonFormatter, RouteSampler, _DeferredQueueHandler, current_request, parse_sample_rates
+
+
+class Route:
+    path = "/packages/{id}"
+
+
+def record(level=logging.INFO, msg="hello %s", args=("world",), **extra):
+    return logging.makeLogRecord({"name": "test", "levelno": level, "levelname": logging.getLevelName(level),
+                                  "msg": msg, "args": args, **extra})
+
+
+@pytest.fixture
+def serving():
+    token = current_request.set({"method": "GET", "path": "/packages/7", "route": Route()})
+    yield
+    current_request.reset(token)
+
+
+def test_json_lines_carry_message_extras_and_exception():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        entry = record(logging.ERROR, exc_info=sys.exc_info(), request_id="abc")
+
+    line = json.loads(JsonFormatter().format(entry))
+
+    assert {key: line[key] for key in ("level", "logger", "message", "request_id")} == {
+        "level": "ERROR", "logger": "test", "message": "hello world", "request_id": "abc"}
+    assert line["ts"].endswith("+00:00")
+    assert "ValueError: boom" in line["exc"]
+
+
+def test_sample_rates_by_route_then_method_then_default(serving, monkeypatch):
+    monkeypatch.setattr(logging_config.random, "random", lambda: 0.5)
+    rates = parse_sample_rates("GET=0.9, GET /packages/{id}=0.1")
+
+    kept = record()
+    assert not RouteSampler(rates).filter(kept)
+    assert kept.route == "GET /packages/{id}" and kept.sample_rate == 0.1
+
+    assert RouteSampler({"GET": 0.9}).filter(record())
+    assert not RouteSampler({}, default=0.2).filter(record())
+    assert RouteSampler({}, default=1.0).filter(record())
+
+
+def test_warnings_and_records_outside_requests_always_pass(serving, monkeypatch):
+    monkeypatch.setattr(logging_config.random, "random", lambda: 0.99)
+    sampler = RouteSampler({}, default=0.0)
+
+    assert sampler.filter(record(logging.WARNING))
+    token = current_request.set(None)
+    try:
+        assert sampler.filter(record())
+    finally:
+        current_request.reset(token)
+
+
+def test_message_is_rendered_when_logged():
+    handler = _DeferredQueueHandler(queue.Queue())
+    items = ["first"]
+
+    handler.emit(record(msg="items: %s", args=(items,)))
+    items.append("second")
+
+    queued = handler.queue.get_nowait()
+    assert queued.getMessage() == "items: ['first']"
+
+
+def test_full_queue_drops_and_counts():
+    handler = _DeferredQueueHandler(queue.Queue(maxsize=1))
+
+    handler.emit(record())
+    handler.emit(record())
+
+    assert handler.dropped == 1
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from SRC.metrics import Counter, Histogram, Registry, timed_methods
+
+
+def instrumented():
+    registry = Registry()
+    seconds = Histogram("calls_seconds", "Call latency.", ("method",), registry=registry)
+    errors = Counter("call_errors_total", "Failed calls.", ("method",), registry=registry)
+
+    @timed_methods(seconds, errors, ("ok", "fail", "slow"))
+    class Calls:
+        def ok(self):
+            return {"success": True}
+
+        def stats(self):
+            return {}
+
+        def fail(self):
+            raise RuntimeError("backend down")
+
+        async def slow(self):
+            await asyncio.sleep(10)
+
+    return Calls(), seconds, errors
+
+
+def observed(histogram, method):
+    child = histogram._children.get((method,))
+    return sum(child.counts) if child else 0
+
+
+def test_successful_calls_are_timed_only():
+    calls, seconds, errors = instrumented()
+
+    calls.ok()
+
+    assert observed(seconds, "ok") == 1
+    assert errors._children.get(("ok",)) is None
+
+
+def test_raised_errors_are_timed_and_counted():
+    calls, seconds, errors = instrumented()
+
+    with pytest.raises(RuntimeError):
+        calls.fail()
+
+    assert observed(seconds, "fail") == 1
+    assert errors._children[("fail",)] == 1
+
+
+def test_cancelled_coroutines_are_timed():
+    calls, seconds, errors = instrumented()
+
+    async def run():
+        task = asyncio.ensure_future(calls.slow())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+
+    assert observed(seconds, "slow") == 1
+    assert errors._children.get(("slow",)) is None
+
+
+def test_only_listed_methods_are_timed():
+    calls, seconds, errors = instrumented()
+
+    calls.stats()
+
+    assert observed(seconds, "stats") == 0
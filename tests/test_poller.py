@@ -0,0 +1,62 @@
+import asyncio
+
+from SRC.db import AsyncDatabaseManager
+from SRC.history import now_ms
+from SRC.logic import AsyncPackageManager
+from SRC.poller import TrackingPoller
+from SRC.storage import AsyncSQLiteStorage
+
+
+def test_status_changes_only_overwrite_the_status_seen_by_the_poll(tmp_path, make_row):
+    async def run():
+        manager = AsyncPackageManager(AsyncDatabaseManager(AsyncSQLiteStorage(str(tmp_path / "packages.db"))))
+        await manager.start()
+        try:
+            polled = (await manager.add_package(**make_row(1)))["data"]["id"]
+            edited = (await manager.add_package(**make_row(2)))["data"]["id"]
+            # Updated by someone else after the poll read it as Pending
+            await manager.db.storage.update(edited, {"status": "Cancelled"})
+
+            written = await TrackingPoller(manager, [])._write("Pending", "Delivered", [(polled, "UPS"), (edited, "UPS")])
+
+            statuses = [(await manager.get_package(id))["data"]["status"] for id in (polled, edited)]
+            return written, statuses
+        finally:
+            await manager.close()
+
+    assert asyncio.run(run()) == (1, ["Delivered", "Cancelled"])
+
+
+
+
+def test_workers_pick_up_status_changes_the_poller_logged(tmp_path, make_row):
+    def manager():
+        return AsyncPackageManager(AsyncDatabaseManager(AsyncSQLiteStorage(str(tmp_path / "packages.db"))))
+
+    async def run():
+        api, poller = manager(), manager()
+        await api.start()
+        await poller.start()
+        try:
+            id = (await api.add_package(**make_row(1)))["data"]["id"]
+            await api.get_package(id)
+            await api.flush_history()
+            await poller.warm_indexes()
+            subscription, _ = api.changes.subscribe()
+
+            await TrackingPoller(poller, [])._write("Pending", "Delivered", [(id, "UPS")])
+            await poller.flush_history()
+            until = now_ms() + 1
+            assert await api.follow_history(0, until) == until
+            # Already caught up: nothing is published twice
+            await api.follow_history(0, until)
+
+            events = [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+            subscription.close()
+            cached = (await api.get_package(id))["data"]["status"]
+            return [(event["type"], event["previous_status"]) for event in events], api.stats.status_of(id), cached
+        finally:
+            await poller.close()
+            await api.close()
+
+    assert asyncio.run(run()) == ([("updated", "Pending")], "Delivered", "Delivered")
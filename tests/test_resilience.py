@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from SRC.resilience import BackendUnavailable, CircuitBreaker, Policy, ResilientStorage, default_policies
+
+
+class SlowStorage:
+    """Backend whose `update` blocks until released."""
+
+    def __init__(self):
+        self.release = None
+
+    async def update(self, id, updates, owner=None):
+        await self.release.wait()
+        return {"id": id, **updates}
+
+
+def half_open_breaker():
+    breaker = CircuitBreaker(threshold=1, reset_after=0)
+    breaker.record_failure()
+    return breaker
+
+
+def test_breaker_lets_one_trial_call_through():
+    breaker = half_open_breaker()
+
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_failed_trial_call_reopens_the_breaker():
+    breaker = half_open_breaker()
+    breaker.reset_after = 60
+
+    breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_cancelled_trial_call_does_not_wedge_the_breaker():
+    backend = SlowStorage()
+    storage = ResilientStorage(backend, policies={"update": Policy(deadline=5)}, breaker=half_open_breaker())
+
+    async def run():
+        backend.release = asyncio.Event()
+        probe = asyncio.ensure_future(storage.update(1, {"status": "Delivered"}))
+        await asyncio.sleep(0)
+        assert storage.breaker._probing
+        with pytest.raises(BackendUnavailable):
+            await storage.update(2, {"status": "Delivered"})
+
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        backend.release.set()
+        return await storage.update(3, {"status": "Delivered"})
+
+    assert asyncio.run(run()) == {"id": 3, "status": "Delivered"}
+    assert storage.breaker.state == "closed"
+
+
+def test_writes_are_neither_timed_out_nor_retried():
+    backend = SlowStorage()
+    storage = ResilientStorage(backend, policies={"update": Policy(None, retries=3)})
+
+    async def run():
+        backend.release = asyncio.Event()
+        asyncio.get_running_loop().call_later(0.05, backend.release.set)
+        return await storage.update(1, {"status": "Delivered"})
+
+    assert asyncio.run(run()) == {"id": 1, "status": "Delivered"}
+    assert storage.policies["update"].retries == 0
+
+
+def test_default_write_policies_have_no_deadline():
+    policies = default_policies()
+
+    assert all(policies[name].deadline is None for name in ("insert", "insert_new", "update", "update_many", "delete"))
+    assert policies["get"].deadline is not None
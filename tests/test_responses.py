@@ -0,0 +1,72 @@
+import gzip
+
+import orjson
+from starlette.requests import Request
+
+from API import responses
+from API.responses import json_response
+
+
+def request(method="GET", **headers):
+    return Request({
+        "type": "http",
+        "method": method,
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+def big_result():
+    return {"success": True, "data": [{"id": n, "notes": "x" * 50} for n in range(100)]}
+
+
+def test_matching_etag_gets_304():
+    result = {"success": True, "data": {"id": 1}}
+    etag = json_response(request(), result).headers["etag"]
+
+    assert json_response(request(if_none_match=etag), result).status_code == 304
+    assert json_response(request(if_none_match='"other"'), result).status_code == 200
+    assert json_response(request("POST", if_none_match=etag), result).status_code == 200
+
+
+def test_same_content_gets_same_etag_whatever_the_object():
+    assert json_response(request(), {"a": 1}).headers["etag"] == json_response(request(), {"a": 1}).headers["etag"]
+    assert json_response(request(), {"a": 1}).headers["etag"] != json_response(request(), {"a": 2}).headers["etag"]
+
+
+def test_compressed_variant_etag_still_matches():
+    result = big_result()
+    response = json_response(request(accept_encoding="gzip"), result)
+
+    assert json_response(request(if_none_match=response.headers["etag"]), result).status_code == 304
+
+
+def test_gzip_is_chosen_when_accepted(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+    result = big_result()
+
+    response = json_response(request(accept_encoding="br, gzip"), result)
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"].endswith('-gzip"')
+    assert orjson.loads(gzip.decompress(response.body)) == result
+    assert "content-encoding" not in json_response(request(accept_encoding="identity"), result).headers
+
+
+def test_small_bodies_are_not_compressed(monkeypatch):
+    monkeypatch.setattr(responses, "COMPRESS_MIN_BYTES", 1024)
+
+    response = json_response(request(accept_encoding="gzip"), {"success": True, "data": {"id": 1}})
+
+    assert "content-encoding" not in response.headers
+    assert orjson.loads(response.body) == {"success": True, "data": {"id": 1}}
+
+
+def test_compression_is_reused_for_identical_bodies():
+    result = {"success": True, "data": [{"id": n, "notes": "reused"} for n in range(200)]}
+    before = responses.encoded_cache_stats()
+
+    json_response(request(accept_encoding="gzip"), result)
+    json_response(request(accept_encoding="gzip"), dict(result))
+
+    after = responses.encoded_cache_stats()
+    assert (after["misses"] - before["misses"], after["hits"] - before["hits"]) == (1, 1)
@@ -0,0 +1,80 @@
+import sqlite3
+
+import pytest
+
+
+def test_insert_returns_stored_rows(storage, make_row):
+    rows = storage.insert([make_row(1), make_row(2, status=None)])
+
+    assert [row["id"] for row in rows] == [1, 2]
+    assert rows[1]["status"] == "Pending"
+    assert storage.get(1)["tracking_number"] == "TN000001"
+
+
+def test_insert_is_all_or_nothing(storage, make_row):
+    storage.insert(make_row(1))
+
+    with pytest.raises(sqlite3.IntegrityError):
+        storage.insert([make_row(2), make_row(1)])
+    assert storage.get(2) is None
+
+
+def test_insert_new_skips_existing_tracking_numbers(storage, make_row):
+    storage.insert(make_row(1))
+
+    inserted = storage.insert_new([make_row(1), make_row(2)])
+
+    assert [row["tracking_number"] for row in inserted] == ["TN000002"]
+
+
+def test_existing_tracking_numbers(storage, make_row):
+    storage.insert([make_row(1), make_row(2)])
+
+    assert storage.existing_tracking_numbers(["TN000001", "TN000003"]) == {"TN000001"}
+
+
+def test_search_filters_are_substring_and_newest_first(storage, make_row):
+    storage.insert([make_row(1, courier="FedEx"), make_row(2, destination="Boston, MA"), make_row(3)])
+
+    assert [row["id"] for row in storage.search(destination="los")] == [3, 1]
+    assert [row["id"] for row in storage.search(courier="fed")] == [1]
+    assert [row["id"] for row in storage.search(limit=1, after=3)] == [2]
+
+
+def test_update_and_delete(storage, make_row):
+    storage.insert(make_row(1))
+
+    assert storage.update(1, {"status": "In Transit", "id": 99})["status"] == "In Transit"
+    assert storage.update(2, {"status": "In Transit"}) is None
+    assert storage.delete(1)["id"] == 1
+    assert storage.delete(1) is None
+
+
+def test_owner_scopes_reads_and_writes(storage, make_row):
+    storage.insert([make_row(1, owner="alice"), make_row(2, owner="bob")])
+
+    assert [row["id"] for row in storage.list(10, 0, owner="alice")] == [1]
+    assert storage.update(1, {"status": "Delivered"}, owner="bob") is None
+    assert storage.update_many({"status": "Delivered"}, ids=[1, 2], owner="bob")[0]["id"] == 2
+    assert storage.delete(1, owner="bob") is None
+
+
+def test_history_between(storage):
+    storage.insert_history([
+        {"package_id": 1, "status_code": 0, "changed_at": 100, "owner": "alice"},
+        {"package_id": 2, "status_code": 1, "changed_at": 200, "owner": "bob"},
+        {"package_id": 1, "status_code": 1, "changed_at": 300, "owner": "alice"},
+    ])
+
+    assert [event["changed_at"] for event in storage.history_between(100, 300, 10)] == [100, 200]
+    assert [event["package_id"] for event in storage.history_between(0, 1000, 10, owner="bob")] == [2]
+    assert [event["changed_at"] for event in storage.package_history(1)] == [100, 300]
+
+
+def test_update_many_with_expected_status(storage, make_row):
+    first, second = storage.insert([make_row(1), make_row(2, status="In Transit")])
+
+    rows = storage.update_many({"status": "Delivered"}, ids=[first["id"], second["id"]], expected_status="Pending")
+
+    assert [row["id"] for row in rows] == [first["id"]]
+    assert storage.get(second["id"])["status"] == "In Transit"